@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Primary-key benchmark: random uuid4 vs time-ordered uuid7 ids.
+
+Inserts rows shaped like notifications (id primary key, agent_id index)
+in committed batches and reports insert throughput and primary-key index
+size for each id scheme.
+
+SQLite (default) measures index pages with the dbstat virtual table.
+With --database-url pointing at Postgres it also compares VARCHAR ids with
+the native UUID storage used when MINIBOOK_COMPACT_IDS=1.
+
+Usage:
+  python3 benchmarks/bench_ids.py --rows 200000
+  python3 benchmarks/bench_ids.py --rows 200000 --database-url "postgresql://..."
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# Allow running from repo root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.models import uuid7
+
+SCHEMES = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def run(engine, scheme: str, id_type: str, rows: int, batch: int) -> tuple[float, int]:
+    """Insert `rows` rows; return (rows/s, primary-key index bytes)."""
+    table = f"bench_ids_{scheme}_{id_type.lower()}"
+    make_id = SCHEMES[scheme]
+    agents = [str(uuid.uuid4()) for _ in range(50)]
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(
+            f"CREATE TABLE {table} (id {id_type} PRIMARY KEY, agent_id VARCHAR NOT NULL, "
+            f"type VARCHAR NOT NULL, payload TEXT)"
+        ))
+        conn.execute(text(f"CREATE INDEX ix_{table}_agent ON {table} (agent_id)"))
+
+    insert = text(f"INSERT INTO {table} (id, agent_id, type, payload) VALUES (:id, :agent_id, 'mention', '{{}}')")
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        params = [{"id": str(make_id()), "agent_id": random.choice(agents)} for _ in range(min(batch, rows - offset))]
+        with engine.begin() as conn:
+            conn.execute(insert, params)
+    elapsed = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            size = conn.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar()
+        else:
+            size = conn.execute(text(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = :name"
+            ), {"name": f"sqlite_autoindex_{table}_1"}).scalar()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {table}"))
+    return rows / elapsed, size or 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--database-url", default=None, help="Benchmark against this database instead of a temp SQLite file")
+    args = ap.parse_args()
+
+    url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp(prefix='minibook_bench_')) / 'ids.db'}"
+    engine = create_engine(url)
+    id_types = ["VARCHAR", "UUID"] if engine.dialect.name == "postgresql" else ["VARCHAR"]
+
+    print(f"{engine.dialect.name}, {args.rows} rows, batches of {args.batch}")
+    for id_type in id_types:
+        for scheme in SCHEMES:
+            rate, size = run(engine, scheme, id_type, args.rows, args.batch)
+            print(f"{scheme:<6} {id_type:<8} {rate:10.0f} rows/s  pk index {size / 1024 / 1024:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Serialization microbenchmark: encoding a 1,000-post listing.
+
+Compares the ways a list_posts response can be produced from ORM rows:
+
+  pydantic+stdlib   PostResponse per row, jsonable_encoder + json.dumps
+                    (what FastAPI does for a custom response class)
+  pydantic+revalid  PostResponse per row, re-validated against the
+                    response model and dumped by Pydantic (FastAPI default)
+  row+fastjson      post_row() dicts rendered by FastJSONResponse
+
+Usage:
+  python3 benchmarks/bench_serialization.py --posts 1000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+# Allow running from repo root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from src.models import Post
+from src.responses import FastJSONResponse, post_row, orjson
+from src.schemas import PostResponse
+
+
+def make_posts(count: int) -> list[Post]:
+    now = datetime.utcnow()
+    posts = []
+    for i in range(count):
+        post = Post(
+            id=f"post-{i:06d}", project_id="project-1", author_id=f"agent-{i % 20}",
+            title=f"PR #{i}: tighten retry loop in webhook dispatcher",
+            content="Body line with `code` and @reviewer mentions.\n" * 40,
+            type="review", status="open", pin_order=None, github_ref=None,
+            created_at=now - timedelta(minutes=i), updated_at=now,
+        )
+        post.tags = ["github", "pr", "backend"]
+        post.mentions = ["reviewer", "lead"]
+        posts.append(post)
+    return posts
+
+
+def build_models(posts: list[Post]) -> list[PostResponse]:
+    return [PostResponse(
+        id=p.id, project_id=p.project_id, author_id=p.author_id, author_name="Agent",
+        title=p.title, content=p.content, type=p.type, status=p.status,
+        tags=p.tags, mentions=p.mentions, pinned=(p.pin_order is not None), pin_order=p.pin_order,
+        github_ref=p.github_ref, comment_count=3, created_at=p.created_at, updated_at=p.updated_at
+    ) for p in posts]
+
+
+def pydantic_stdlib(posts: list[Post]) -> bytes:
+    return json.dumps(jsonable_encoder(build_models(posts))).encode()
+
+
+ADAPTER = TypeAdapter(List[PostResponse])
+
+
+def pydantic_revalidate(posts: list[Post]) -> bytes:
+    validated = ADAPTER.validate_python(build_models(posts), from_attributes=True)
+    return ADAPTER.dump_json(validated)
+
+
+def row_fastjson(posts: list[Post]) -> bytes:
+    return FastJSONResponse([post_row(p, "Agent", 3) for p in posts]).body
+
+
+def bench(fn, posts, repeat: int) -> list[float]:
+    fn(posts)  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(posts)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    posts = make_posts(args.posts)
+    assert json.loads(pydantic_stdlib(posts)) == json.loads(row_fastjson(posts)), "encoders disagree"
+
+    print(f"{args.posts} posts, {args.repeat} runs, orjson={'yes' if orjson else 'no'}")
+    baseline = None
+    for name, fn in [("pydantic+stdlib", pydantic_stdlib),
+                     ("pydantic+revalid", pydantic_revalidate),
+                     ("row+fastjson", row_fastjson)]:
+        samples = bench(fn, posts, args.repeat)
+        median = statistics.median(samples)
+        baseline = baseline or median
+        print(f"{name:<18} median={median:8.2f}ms  min={min(samples):8.2f}ms  x{baseline / median:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
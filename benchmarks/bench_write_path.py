@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Write-path latency benchmark: create_project, create_post, create_comment.
+
+Runs the API in-process against a throwaway SQLite file (so every commit is a
+real fsync) and reports p50/p99 latency per route.
+
+Usage:
+  python3 benchmarks/bench_write_path.py --iterations 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow running from repo root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(name: str, samples: list[float]) -> None:
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<16} n={len(ms):<5} p50={percentile(ms, 50):7.2f}ms  "
+          f"p99={percentile(ms, 99):7.2f}ms  mean={statistics.mean(ms):7.2f}ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=200)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from src import main as main_module
+
+    tmpdir = tempfile.mkdtemp(prefix="minibook_bench_")
+    main_module.DB_PATH = str(Path(tmpdir) / "bench.db")
+    main_module.DB_URL = None
+
+    with TestClient(main_module.app) as client:
+        # Benchmarks measure latency, not the limiter
+        for action in ("post", "comment"):
+            main_module.rate_limiter.limits[action] = (10 ** 9, 60)
+
+        def register(name: str) -> dict:
+            data = client.post("/api/v1/agents", json={"name": name}).json()
+            return {"name": data["name"], "headers": {"Authorization": f"Bearer {data['api_key']}"}}
+
+        author, commenter, watcher = register("bench-author"), register("bench-commenter"), register("bench-watcher")
+
+        timings: dict[str, list[float]] = {"create_project": [], "create_post": [], "create_comment": []}
+
+        def timed(name: str, method: str, url: str, **kwargs):
+            start = time.perf_counter()
+            resp = client.request(method, url, **kwargs)
+            timings[name].append(time.perf_counter() - start)
+            assert resp.status_code == 200, resp.text
+            return resp.json()
+
+        project_id = None
+        for i in range(args.iterations):
+            project_id = timed("create_project", "POST", "/api/v1/projects",
+                               headers=author["headers"], json={"name": f"bench-{i}"})["id"]
+        for agent in (commenter, watcher):
+            client.post(f"/api/v1/projects/{project_id}/join", headers=agent["headers"], json={"role": "developer"})
+
+        post_id = None
+        for i in range(args.iterations):
+            post_id = timed("create_post", "POST", f"/api/v1/projects/{project_id}/posts",
+                            headers=author["headers"],
+                            json={"title": f"Post {i}", "content": f"@{watcher['name']} please look"})["id"]
+
+        # Seed a participant so thread_update fan-out runs too
+        client.post(f"/api/v1/posts/{post_id}/comments", headers=watcher["headers"], json={"content": "following"})
+        for i in range(args.iterations):
+            timed("create_comment", "POST", f"/api/v1/posts/{post_id}/comments",
+                  headers=commenter["headers"],
+                  json={"content": f"Comment {i} cc @{author['name']}"})
+
+    for name, samples in timings.items():
+        report(name, samples)
+
+
+if __name__ == "__main__":
+    main()
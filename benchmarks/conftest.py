@@ -0,0 +1,249 @@
+"""
+Pytest harness for the performance regression suite (test_performance.py).
+
+Each benchmark records the SQL statements one call issues and the median
+seconds per call (timeit autorange, several repeats), keyed "name[size]",
+and compares them with baseline.json:
+
+  - SQL statements (always): fail on more than --bench-sql-threshold extra
+    statements. Counts are deterministic, so this gate is portable.
+  - latency (opt-in, --bench-latency): fail when slower than
+    baseline * (1 + --bench-latency-threshold). Timings only compare on the
+    machine that recorded them, so this is skipped (with a warning) when the
+    baseline's machine fingerprint differs from the current one.
+
+Benchmarks missing from the baseline only report.
+
+  python -m pytest benchmarks                          # SQL-count gate
+  python -m pytest benchmarks --bench-latency          # plus latency, same machine only
+  python -m pytest benchmarks --bench-save             # record a new baseline
+  python -m pytest benchmarks --bench-sizes s,m        # skip the large dataset
+
+To gate latency on CI, record the baseline there (--bench-save on the base
+commit), then run the change with --bench-latency.
+
+Sizes build throwaway SQLite databases with generate_dataset.py (fixed
+seed) and serve them through the app with a TestClient.
+"""
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+REPEAT = 5
+
+# Dataset (generate_dataset.py flags) and micro-benchmark scale per size
+SIZES = {
+    "s": {"dataset": ["--agents", "50", "--projects", "5", "--posts", "500", "--comments", "3000"],
+          "text_bytes": 1_000, "history": 10},
+    "m": {"dataset": ["--agents", "300", "--projects", "10", "--posts", "3000", "--comments", "20000"],
+          "text_bytes": 10_000, "history": 100},
+    "l": {"dataset": ["--agents", "1500", "--projects", "20", "--posts", "15000", "--comments", "100000"],
+          "text_bytes": 100_000, "history": 1_000},
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("minibook benchmarks")
+    group.addoption("--bench-save", action="store_true", help="Write results to the baseline instead of comparing")
+    group.addoption("--bench-baseline", default=str(BASELINE), help="Baseline JSON path")
+    group.addoption("--bench-latency", action="store_true",
+                    help="Also fail on latency regressions (only if the baseline was recorded on this machine)")
+    group.addoption("--bench-latency-threshold", type=float, default=0.5,
+                    help="Allowed slowdown over baseline as a fraction (0.5 = +50%%)")
+    group.addoption("--bench-sql-threshold", type=int, default=0, help="Allowed extra SQL statements per call")
+    group.addoption("--bench-sizes", default=",".join(SIZES), help="Comma-separated data sizes to run")
+
+
+def pytest_collection_modifyitems(config, items):
+    sizes = set(config.getoption("--bench-sizes").split(","))
+    selected, deselected = [], []
+    for item in items:
+        size = getattr(item, "callspec", None) and item.callspec.params.get("size")
+        (deselected if size and size not in sizes else selected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def machine() -> str:
+    """Fingerprint of the hardware and interpreter that timings depend on."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return (f"{platform.system()} {platform.machine()} {cpu or 'unknown cpu'} x{os.cpu_count()} "
+            f"{platform.python_implementation()} {platform.python_version()}")
+
+
+class Bench:
+    """Measures callables and checks them against the baseline."""
+
+    def __init__(self, config):
+        self.config = config
+        self.path = Path(config.getoption("--bench-baseline"))
+        stored = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.machine = machine()
+        self.baseline_machine = stored.get("machine")
+        self.baseline = stored.get("results", {})
+        self.results = {}
+        self.latency = config.getoption("--bench-latency")
+        if self.latency and self.baseline_machine != self.machine:
+            warnings.warn(f"Baseline was recorded on {self.baseline_machine!r}, not {self.machine!r}; "
+                          "skipping latency checks (re-record with --bench-save)")
+            self.latency = False
+
+    @contextmanager
+    def statements(self, engine):
+        """Collect the SQL statements `engine` runs inside the block."""
+        from sqlalchemy import event
+
+        seen = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            seen.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield seen
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    def __call__(self, name: str, fn, engine=None) -> dict:
+        fn()  # warm caches and connections
+        statements = 0
+        if engine is not None:
+            with self.statements(engine) as seen:
+                fn()
+            statements = len(seen)
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        seconds = statistics.median(t / number for t in timer.repeat(REPEAT, number))
+        result = self.results[name] = {"seconds": seconds, "statements": statements}
+        if not self.config.getoption("--bench-save"):
+            self.check(name, result)
+        return result
+
+    def check(self, name: str, result: dict) -> None:
+        base = self.baseline.get(name)
+        if base is None:
+            return
+        problems = []
+        extra = self.config.getoption("--bench-sql-threshold")
+        if result["statements"] > base["statements"] + extra:
+            problems.append(f"{result['statements']} SQL statements > baseline {base['statements']} + {extra}")
+        threshold = self.config.getoption("--bench-latency-threshold")
+        limit = base["seconds"] * (1 + threshold)
+        if self.latency and result["seconds"] > limit:
+            problems.append(f"latency {result['seconds'] * 1000:.3f}ms > {limit * 1000:.3f}ms "
+                            f"(baseline {base['seconds'] * 1000:.3f}ms +{threshold:.0%})")
+        if problems:
+            pytest.fail(f"{name} regressed: " + "; ".join(problems), pytrace=False)
+
+    def save(self) -> None:
+        # Timings from another machine are meaningless next to ours, so a new machine starts over
+        kept = self.baseline if self.baseline_machine == self.machine else {}
+        stored = {"machine": self.machine, "results": {**kept, **self.results}}
+        self.path.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="session")
+def bench(request):
+    bench = Bench(request.config)
+    request.config._minibook_bench = bench
+    yield bench
+    if request.config.getoption("--bench-save") and bench.results:
+        bench.save()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    bench = getattr(config, "_minibook_bench", None)
+    if bench is None or not bench.results:
+        return
+    terminalreporter.section("minibook benchmarks")
+    terminalreporter.write_line(f"machine:  {bench.machine}")
+    terminalreporter.write_line(f"baseline: {bench.baseline_machine or '-'}"
+                                f"{'' if bench.latency else '  (latency not gated)'}")
+    terminalreporter.write_line(f"{'benchmark':<36} {'ms/call':>10} {'baseline':>10} {'change':>8} {'sql':>5} {'base':>5}")
+    for name, result in sorted(bench.results.items()):
+        base = bench.baseline.get(name)
+        ms = result["seconds"] * 1000
+        if base:
+            baseline, change = f"{base['seconds'] * 1000:10.3f}", f"{result['seconds'] / base['seconds'] - 1:+8.0%}"
+            base_sql = f"{base['statements']:>5}"
+        else:
+            baseline, change, base_sql = f"{'-':>10}", f"{'new':>8}", f"{'-':>5}"
+        terminalreporter.write_line(f"{name:<36} {ms:10.3f} {baseline} {change} {result['statements']:>5} {base_sql}")
+    if config.getoption("--bench-save"):
+        terminalreporter.write_line(f"Baseline written to {bench.path}")
+
+
+# --- Data ---
+
+@pytest.fixture(scope="session", params=list(SIZES))
+def size(request):
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def dataset(size):
+    """The app serving a generated database of the given size.
+
+    Yields {"client", "engine", "project_id", "post_id", "agent_id"}: the
+    busiest project, the longest thread and the most active agent.
+    """
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+
+    import generate_dataset
+    from src import main as main_module
+    from src.database import init_db
+
+    tmpdir = tempfile.mkdtemp(prefix=f"minibook_bench_{size}_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    args = generate_dataset.parser().parse_args(["--db", db_path, *SIZES[size]["dataset"]])
+    engine = init_db(db_path=db_path).kw["bind"]
+    with engine.connect() as conn:
+        generate_dataset.generate(conn, args)
+    engine.dispose()
+
+    saved = main_module.DB_PATH, main_module.DB_URL, dict(main_module.config)
+    main_module.DB_PATH, main_module.DB_URL = db_path, None
+    main_module.config.update(slow_request_ms=0, slow_query_ms=0)  # Keep slow logs out of the repo
+    try:
+        with TestClient(main_module.app) as client:
+            engine = main_module.SessionLocal.kw["bind"]
+            with engine.connect() as conn:
+                project_id = conn.execute(text(
+                    "SELECT project_id FROM posts GROUP BY project_id ORDER BY count(*) DESC, project_id LIMIT 1"
+                )).scalar()
+                post_id = conn.execute(text(
+                    "SELECT post_id FROM comments GROUP BY post_id ORDER BY count(*) DESC, post_id LIMIT 1"
+                )).scalar()
+                agent_id = conn.execute(text(
+                    "SELECT author_id FROM comments GROUP BY author_id ORDER BY count(*) DESC, author_id LIMIT 1"
+                )).scalar()
+            yield {"client": client, "engine": engine, "project_id": project_id, "post_id": post_id,
+                   "agent_id": agent_id}
+    finally:
+        main_module.DB_PATH, main_module.DB_URL = saved[0], saved[1]
+        main_module.config.clear()
+        main_module.config.update(saved[2])
+        shutil.rmtree(tmpdir, ignore_errors=True)
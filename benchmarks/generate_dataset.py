@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Synthetic dataset generator for benchmarking indexes, search and pagination.
+
+Bulk-inserts agents, projects, memberships, posts, nested comments,
+mentions, tags and notifications with Core executemany batches (no ORM
+unit of work), so a ~10M-row database builds in minutes:
+
+  - thread sizes follow a power law (Pareto --alpha): most posts get a few
+    comments, a handful get thousands; project size and agent activity are
+    skewed the same way
+  - titles and bodies look like GitHub issues/PRs: headings, checklists,
+    code fences, issue refs, links, and @mentions of project members
+  - comments reply to earlier comments in the thread (nested), and are
+    spread over hours to days after the post
+  - mention and reply notifications are written the way the API writes
+    them; --read-ratio of them are already read
+
+Ids are UUIDv7 built from each row's created_at, so id order matches time
+order as it does for live data. Unread counters and post participants are
+then filled by the app's startup backfills; dashboard stats rebuild lazily
+on first read. Rows go into a fresh database only.
+
+Usage:
+  python3 benchmarks/generate_dataset.py --db data/bench.db
+  python3 benchmarks/generate_dataset.py --db data/big.db --agents 5000 --projects 500 \\
+      --posts 600000 --comments 3600000             # ~10M rows, ~6 minutes on SQLite
+  python3 benchmarks/generate_dataset.py --database-url "postgresql://..." --posts 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import itertools
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Allow running from repo root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.database import init_db
+from src.models import Agent, Comment, Mention, Notification, Post, Project, ProjectMember
+
+EPOCH = datetime(1970, 1, 1)
+HOUR_MS = 3600 * 1000
+
+NAME_WORDS = ["amber", "brisk", "cobalt", "delta", "ember", "fable", "granite", "harbor", "indigo", "juniper",
+              "kestrel", "lumen", "maple", "nimbus", "onyx", "pixel", "quartz", "raven", "sable", "tundra"]
+AGENT_KINDS = ["coder", "reviewer", "planner", "tester", "scribe", "auditor", "builder", "scout"]
+ROLES = ["developer", "developer", "developer", "reviewer", "reviewer", "tester", "security-auditor", "docs"]
+POST_TYPES = ["discussion"] * 5 + ["review"] * 2 + ["question"] * 2 + ["announcement"]
+STATUSES = ["open"] * 6 + ["resolved"] * 3 + ["closed"]
+TAGS = ["bug", "enhancement", "performance", "refactor", "docs", "tests", "ci", "security", "api", "database",
+        "frontend", "backend", "infra", "release", "good-first-issue", "help-wanted", "question", "design",
+        "migration", "dependencies", "flaky", "regression", "ux", "monitoring", "search", "auth", "webhooks",
+        "notifications", "cleanup", "blocked"]
+TAG_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(TAGS))))  # Zipf
+
+MODULES = ["auth", "webhooks", "notifications", "search", "scheduler", "cache", "parser", "storage", "api",
+           "dashboard", "billing", "importer", "sync", "rate limiter", "session store", "queue worker"]
+NOUNS = ["timeout", "memory leak", "race condition", "pagination", "retry logic", "error handling", "config",
+         "migration", "index", "serializer", "connection pool", "cursor", "fixture", "log format", "payload"]
+VERBS = ["Fix", "Refactor", "Add", "Remove", "Speed up", "Document", "Handle", "Validate", "Cache", "Retry"]
+PROBLEMS = ["fails intermittently", "is slow under load", "returns stale data", "leaks connections",
+            "ignores the config value", "breaks on empty input", "double-counts retries", "times out on CI"]
+SENTENCES = [
+    "The {noun} in {module} {problem} when the input is large.",
+    "I traced it to the {noun} handling in `{func}()`.",
+    "This looks related to #{issue}, which touched the same code path.",
+    "Proposal: move the {noun} into {module} and keep the old path behind a flag.",
+    "Benchmarks show p99 going from {a}ms to {b}ms after the change.",
+    "We should add a regression test for the {noun} before merging.",
+    "Not sure the {noun} belongs in {module}; happy to hear other opinions.",
+    "See {url} for the upstream discussion.",
+    "The {module} tests pass locally but the {noun} check {problem}.",
+    "Rolling this out behind `{flag}` first seems safest.",
+]
+REPLIES = ["LGTM.", "Looks good to me, one nit below.", "Can you add a test for this?", "+1, this matches what I saw.",
+           "I can take this one.", "Fixed in the latest push.", "Still reproduces on main for me.",
+           "Agreed, let's ship it.", "Should we backport this?", "Closing the loop: this is done."]
+CODE = [
+    "```python\ndef {func}(items):\n    for item in items:\n        if item is None:\n            continue\n"
+    "        yield normalize(item)\n```",
+    "```\nTraceback (most recent call last):\n  File \"{module_file}.py\", line {line}, in {func}\n"
+    "TimeoutError: {noun} exceeded {a}ms\n```",
+    "```sql\nSELECT id, created_at FROM events WHERE project_id = ? ORDER BY created_at DESC LIMIT 50;\n```",
+    "```bash\npytest -q tests/test_{module_file}.py -k {func}\n```",
+]
+
+
+def id_at(ms: int, rng: random.Random) -> str:
+    """A UUIDv7 for a row created at epoch milliseconds `ms` (same layout as models.uuid7)."""
+    return str(uuid.UUID(int=(ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | rng.getrandbits(12) << 64
+                        | 0x2 << 62 | rng.getrandbits(62)))
+
+
+def at(ms: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=ms)
+
+
+class Text:
+    """GitHub-flavoured titles and bodies.
+
+    Sentences and code blocks are filled from the templates once into
+    fixed pools and then recombined, which keeps text generation from
+    dominating the load time.
+    """
+
+    POOL = 4096
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.sentences = [self._fill(rng.choice(SENTENCES)) for _ in range(self.POOL)]
+        self.code = [self._fill(rng.choice(CODE)) for _ in range(self.POOL // 4)]
+
+    def _fill(self, template: str) -> str:
+        r = self.rng
+        module = r.choice(MODULES)
+        return template.format(
+            noun=r.choice(NOUNS), module=module, module_file=module.replace(" ", "_"), problem=r.choice(PROBLEMS),
+            func=f"{r.choice(['load', 'apply', 'flush', 'parse', 'sync'])}_{r.choice(NOUNS).split()[-1]}",
+            issue=r.randint(1, 9999), a=r.randint(50, 900), b=r.randint(5, 400), line=r.randint(10, 800),
+            url=f"https://github.com/minibook/{module.replace(' ', '-')}/issues/{r.randint(1, 9999)}",
+            flag=f"{module.replace(' ', '_')}_v2",
+        )
+
+    def _sentences(self, n: int) -> str:
+        return " ".join(self.rng.sample(self.sentences, n))
+
+    def title(self) -> str:
+        r = self.rng
+        if r.random() < 0.5:
+            return f"{r.choice(VERBS)} {r.choice(NOUNS)} in {r.choice(MODULES)}"
+        return f"{r.choice(MODULES).capitalize()}: {r.choice(NOUNS)} {r.choice(PROBLEMS)}"
+
+    def post_body(self, mentions: list[str]) -> str:
+        r = self.rng
+        parts = ["## Summary", self._sentences(r.randint(1, 4))]
+        if r.random() < 0.5:
+            parts += ["## Details", r.choice(self.code)]
+        if r.random() < 0.4:
+            parts += ["## Checklist"] + [f"- [{r.choice(' x')}] {sentence}"
+                                         for sentence in r.sample(self.sentences, r.randint(2, 5))]
+        if mentions:
+            parts.append(" ".join(f"@{name}" for name in mentions) + " could you take a look?")
+        return "\n\n".join(parts)
+
+    def comment_body(self, mentions: list[str]) -> str:
+        r = self.rng
+        roll = r.random()
+        if roll < 0.3:
+            text = r.choice(REPLIES)
+        elif roll < 0.85:
+            text = self._sentences(r.randint(1, 3))
+        else:
+            text = r.choice(self.sentences) + "\n\n" + r.choice(self.code)
+        if r.random() < 0.15:
+            text = f"> {r.choice(self.sentences)}\n\n{text}"
+        if mentions:
+            text = " ".join(f"@{name}" for name in mentions) + " " + text
+        return text
+
+
+class Writer:
+    """Buffers rows per table and flushes them as executemany batches."""
+
+    ORDER = [Agent, Project, ProjectMember, Post, Comment, Mention, Notification]  # FK order
+
+    def __init__(self, conn, batch: int):
+        self.conn, self.batch = conn, batch
+        self.rows = {model: [] for model in self.ORDER}
+        self.counts = {model.__tablename__: 0 for model in self.ORDER}
+
+    def add(self, model, row: dict) -> None:
+        self.rows[model].append(row)
+
+    def flush(self, force: bool = False) -> None:
+        if not force and sum(len(rows) for rows in self.rows.values()) < self.batch:
+            return
+        for model in self.ORDER:
+            rows = self.rows[model]
+            if rows:
+                self.conn.execute(model.__table__.insert(), rows)
+                self.counts[model.__tablename__] += len(rows)
+                rows.clear()
+        self.conn.commit()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def weighted(rng: random.Random, items: list, cum_weights: list):
+    return items[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def thread_sizes(rng: random.Random, posts: int, comments: int, alpha: float) -> list[int]:
+    """Split `comments` across `posts` with Pareto-distributed weights."""
+    weights = [rng.paretovariate(alpha) for _ in range(posts)]
+    scale = comments / sum(weights)
+    sizes = [int(w * scale) for w in weights]
+    for _ in range(comments - sum(sizes)):
+        sizes[rng.randrange(posts)] += 1
+    return sizes
+
+
+def generate(conn, args) -> dict:
+    rng = random.Random(args.seed)
+    text = Text(rng)
+    out = Writer(conn, args.batch)
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - args.days * 24 * HOUR_MS
+
+    # Agents, with power-law activity (who posts and comments)
+    agents = []
+    for i in range(args.agents):
+        ms = start_ms + rng.randrange(24 * HOUR_MS)
+        agent = {"id": id_at(ms, rng), "name": f"{rng.choice(NAME_WORDS)}-{rng.choice(AGENT_KINDS)}-{i}"}
+        agents.append(agent)
+        out.add(Agent, {**agent, "api_key": f"mb_{rng.getrandbits(128):032x}", "created_at": at(ms),
+                        "last_seen": at(now_ms - int(rng.expovariate(1 / (48 * HOUR_MS))))})
+    activity = {a["id"]: rng.paretovariate(args.alpha) for a in agents}
+
+    # Projects (popularity skewed) and memberships; the first member is the lead
+    popularity = list(itertools.accumulate(rng.paretovariate(args.alpha) for _ in range(args.projects)))
+    members = [[] for _ in range(args.projects)]
+    for i, agent in enumerate(agents):
+        joined = {i % args.projects} if i < args.projects else set()
+        while not joined or (len(joined) < args.projects and rng.random() < 0.4):
+            joined.add(weighted(rng, range(args.projects), popularity))
+        for p in joined:
+            members[p].append(agent)
+    projects = []
+    for p in range(args.projects):
+        ms = start_ms + rng.randrange(24 * HOUR_MS)
+        lead = members[p][0]
+        project = {"id": id_at(ms, rng), "members": members[p],
+                   "cum": list(itertools.accumulate(activity[a["id"]] for a in members[p]))}
+        projects.append(project)
+        out.add(Project, {"id": project["id"], "name": f"{rng.choice(MODULES).replace(' ', '-')}-{p}",
+                          "description": text.title(), "primary_lead_agent_id": lead["id"],
+                          "role_descriptions": {}, "created_at": at(ms)})
+        for agent in members[p]:
+            joined_ms = ms + rng.randrange(24 * HOUR_MS)
+            out.add(ProjectMember, {"id": id_at(joined_ms, rng), "agent_id": agent["id"], "project_id": project["id"],
+                                    "role": "Lead" if agent is lead else rng.choice(ROLES),
+                                    "joined_at": at(joined_ms)})
+    out.flush(force=True)
+
+    def pick_mentions(project: dict, author: dict) -> list[dict]:
+        if rng.random() >= args.mention_rate or len(project["members"]) < 2:
+            return []
+        picked = {}
+        for _ in range(1 if rng.random() < 0.8 else 2):
+            agent = weighted(rng, project["members"], project["cum"])
+            if agent is not author:
+                picked[agent["name"]] = agent
+        return list(picked.values())
+
+    def notify(ms: int, agent_id: str, notif_type: str, payload: dict) -> None:
+        out.add(Notification, {"id": id_at(ms, rng), "agent_id": agent_id, "type": notif_type, "payload": payload,
+                               "read": rng.random() < args.read_ratio, "created_at": at(ms)})
+
+    # Posts in time order, each followed by its thread
+    sizes = thread_sizes(rng, args.posts, args.comments, args.alpha)
+    post_times = sorted(rng.randrange(start_ms + 24 * HOUR_MS, now_ms) for _ in range(args.posts))
+    started = time.perf_counter()
+    for n, (post_ms, size) in enumerate(zip(post_times, sizes)):
+        project = weighted(rng, projects, popularity)
+        author = weighted(rng, project["members"], project["cum"])
+        mentioned = pick_mentions(project, author)
+        post_id, title = id_at(post_ms, rng), text.title()
+        tags = list(dict.fromkeys(weighted(rng, TAGS, TAG_WEIGHTS) for _ in range(rng.choice((0, 1, 1, 2, 2, 3)))))
+        out.add(Post, {
+            "id": post_id, "project_id": project["id"], "author_id": author["id"], "title": title,
+            "content": text.post_body([a["name"] for a in mentioned]), "type": rng.choice(POST_TYPES),
+            "status": rng.choice(STATUSES), "tags": tags, "mentions": [a["name"] for a in mentioned],
+            "pin_order": rng.randint(0, 5) if rng.random() < 0.002 else None,
+            "github_ref": f"https://github.com/minibook/{project['id'][:8]}/pull/{n + 1}" if rng.random() < 0.1 else None,
+            "created_at": at(post_ms), "updated_at": at(post_ms),
+        })
+        for agent in mentioned:
+            out.add(Mention, {"id": id_at(post_ms, rng), "agent_id": agent["id"], "author_id": author["id"],
+                              "project_id": project["id"], "post_id": post_id, "comment_id": None,
+                              "created_at": at(post_ms)})
+            notify(post_ms, agent["id"], "mention", {"post_id": post_id, "title": title, "by": author["name"]})
+
+        # Comments: gaps shrink as a thread heats up; ~40% reply to a recent comment
+        comment_ms, thread = post_ms, []
+        mean_gap = args.thread_hours * HOUR_MS / max(size, 1)
+        for _ in range(size):
+            comment_ms = min(now_ms, comment_ms + 1 + int(rng.expovariate(1 / mean_gap)))
+            commenter = weighted(rng, project["members"], project["cum"])
+            mentioned = pick_mentions(project, commenter)
+            comment_id = id_at(comment_ms, rng)
+            parent_id = rng.choice(thread[-5:]) if thread and rng.random() < 0.4 else None
+            thread.append(comment_id)
+            out.add(Comment, {"id": comment_id, "post_id": post_id, "author_id": commenter["id"],
+                              "parent_id": parent_id, "content": text.comment_body([a["name"] for a in mentioned]),
+                              "mentions": [a["name"] for a in mentioned], "created_at": at(comment_ms)})
+            payload = {"post_id": post_id, "comment_id": comment_id, "by": commenter["name"]}
+            for agent in mentioned:
+                out.add(Mention, {"id": id_at(comment_ms, rng), "agent_id": agent["id"],
+                                  "author_id": commenter["id"], "project_id": project["id"], "post_id": post_id,
+                                  "comment_id": comment_id, "created_at": at(comment_ms)})
+                notify(comment_ms, agent["id"], "mention", payload)
+            if commenter is not author:
+                notify(comment_ms, author["id"], "reply", payload)
+
+        total_before = out.total
+        out.flush()
+        if out.total != total_before and out.total // 1_000_000 != total_before // 1_000_000:
+            elapsed = time.perf_counter() - started
+            print(f"  {out.total:>11,} rows  {n + 1:>9,}/{args.posts:,} posts  {out.total / elapsed:,.0f} rows/s")
+    out.flush(force=True)
+    return out.counts
+
+
+def parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default="data/bench.db", help="SQLite path (ignored with --database-url/DATABASE_URL)")
+    ap.add_argument("--database-url", default=None)
+    ap.add_argument("--agents", type=int, default=500)
+    ap.add_argument("--projects", type=int, default=50)
+    ap.add_argument("--posts", type=int, default=50_000)
+    ap.add_argument("--comments", type=int, default=300_000, help="Total comments, split by power law")
+    ap.add_argument("--alpha", type=float, default=1.2, help="Pareto shape for threads/projects/agents (lower = more skew)")
+    ap.add_argument("--days", type=int, default=365, help="History covered by created_at")
+    ap.add_argument("--thread-hours", type=float, default=48, help="Typical time from a post to its last comment")
+    ap.add_argument("--mention-rate", type=float, default=0.25, help="Share of posts/comments with @mentions")
+    ap.add_argument("--read-ratio", type=float, default=0.9, help="Share of notifications already read")
+    ap.add_argument("--batch", type=int, default=20_000, help="Rows per committed batch")
+    ap.add_argument("--seed", type=int, default=1)
+    return ap
+
+
+def main() -> None:
+    args = parser().parse_args()
+    args.projects = max(1, min(args.projects, args.agents))
+
+    SessionLocal = init_db(db_url=args.database_url, db_path=args.db)
+    engine = SessionLocal.kw["bind"]
+    with engine.connect() as conn:
+        if conn.execute(Post.__table__.select().limit(1)).first() is not None:
+            sys.exit("Target database already has posts; generate into a fresh one.")
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")  # Bulk load only; a crash means regenerate
+
+        print(f"Generating into {engine.url.render_as_string(hide_password=True)}")
+        start = time.perf_counter()
+        counts = generate(conn, args)
+        elapsed = time.perf_counter() - start
+
+    # Derived tables, exactly as the app fills them for pre-existing data
+    from src import main as main_module
+    main_module.SessionLocal = SessionLocal
+    main_module.backfill_unread_counts()
+    main_module.backfill_post_participants()
+
+    total = sum(counts.values())
+    print(f"\n{total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    for table, count in counts.items():
+        print(f"  {table:<16} {count:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Load test: N concurrent agents following the SKILL.md heartbeat loop.
+
+Starts the API with uvicorn on a throwaway SQLite file (or targets --url),
+plus a stub HTTP receiver for project webhooks. It seeds agents, projects
+and posts through the API, then runs every agent's loop concurrently for
+--duration seconds:
+
+  heartbeat -> unread-count -> (unread notifications) -> list posts ->
+  read a post and its comments -> comment @mentioning a peer (project
+  leads occasionally use @all) -> mark handled notifications read
+
+Reports overall throughput and p50/p95/p99 per endpoint. SQL statements
+per request come from the server's /metrics (difference before/after the
+run). Rate limits and the @all cooldown are lifted when the server is
+started here, so the loop itself is what gets measured.
+
+Usage:
+  python3 benchmarks/loadtest.py --agents 50 --duration 30
+  python3 benchmarks/loadtest.py --url http://localhost:3456 --agents 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+# Allow running from repo root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+STATEMENTS = re.compile(r'minibook_db_statements_per_request_(sum|count)\{method="(\w+)",route="([^"]*)"\} (\S+)')
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- Stub webhook receiver ---
+
+class WebhookStub:
+    """Accepts webhook POSTs with 204 and counts them."""
+
+    def __init__(self):
+        self.received = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub.received += 1
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", free_port()), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+# --- In-process server ---
+
+def start_server(db_path: str):
+    import uvicorn
+    from src import main as main_module
+
+    main_module.DB_PATH = db_path
+    main_module.DB_URL = None
+    main_module.config.setdefault("slow_request_ms", 0)  # don't write slow logs into the repo
+    main_module.config.setdefault("slow_query_ms", 0)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    # Measure the loop, not the limiters
+    from src import utils
+    for action in ("post", "comment"):
+        main_module.rate_limiter.limits[action] = (10 ** 9, 60)
+    utils.ALL_MENTION_COOLDOWN_MINUTES = 0
+    return f"http://127.0.0.1:{port}", server, thread
+
+
+# --- Load ---
+
+class Stats:
+    def __init__(self):
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        resp = await client.request(method, url, **kwargs)
+        self.latency[label].append(time.perf_counter() - start)
+        if resp.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return resp.json() if resp.content else None
+
+
+async def seed(base: str, args, webhook_url: str, run_id: str) -> tuple[list[dict], list[dict]]:
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        async def register(i: int) -> dict:
+            data = (await client.post("/api/v1/agents", json={"name": f"load-{run_id}-{i}"})).json()
+            return {"name": data["name"], "headers": {"Authorization": f"Bearer {data['api_key']}"}}
+
+        agents = [await register(i) for i in range(args.agents)]
+        projects = []
+        for p in range(args.projects):
+            lead = agents[p % len(agents)]
+            project = (await client.post("/api/v1/projects", headers=lead["headers"], json={
+                "name": f"load-{run_id}-{p}", "description": "Load test"
+            })).json()
+            await client.post(f"/api/v1/projects/{project['id']}/webhooks", headers=lead["headers"], json={
+                "url": webhook_url, "events": ["new_post", "new_comment", "mention"]
+            })
+            members = [a for i, a in enumerate(agents) if i % args.projects == p]
+            for agent in members:
+                if agent is not lead:
+                    await client.post(f"/api/v1/projects/{project['id']}/join", headers=agent["headers"],
+                                      json={"role": "developer"})
+            post_ids = []
+            for i in range(args.posts):
+                author = members[i % len(members)]
+                post = (await client.post(f"/api/v1/projects/{project['id']}/posts", headers=author["headers"], json={
+                    "title": f"Seed post {i}", "content": f"Context for task {i}, cc @{lead['name']}"
+                })).json()
+                post_ids.append(post["id"])
+            projects.append({"id": project["id"], "lead": lead, "members": members, "posts": post_ids})
+        for i, agent in enumerate(agents):
+            agent["project"] = projects[i % args.projects]
+        return agents, projects
+
+
+async def agent_loop(base: str, agent: dict, stats: Stats, deadline: float, args, rng: random.Random) -> int:
+    project = agent["project"]
+    peers = [m["name"] for m in project["members"] if m is not agent] or [agent["name"]]
+    loops = 0
+    async with httpx.AsyncClient(base_url=base, headers=agent["headers"], timeout=30) as client:
+        while time.monotonic() < deadline:
+            await stats.call(client, "POST /api/v1/agents/heartbeat", "POST", "/api/v1/agents/heartbeat")
+            counts = await stats.call(client, "GET /api/v1/notifications/unread-count",
+                                      "GET", "/api/v1/notifications/unread-count")
+            handled = []
+            if counts and counts["total"]:
+                unread = await stats.call(client, "GET /api/v1/notifications", "GET", "/api/v1/notifications",
+                                          params={"unread_only": "true"}) or []
+                handled = [n["id"] for n in unread]
+
+            await stats.call(client, "GET /api/v1/projects/{project_id}/posts",
+                             "GET", f"/api/v1/projects/{project['id']}/posts")
+            post_id = rng.choice(project["posts"])
+            await stats.call(client, "GET /api/v1/posts/{post_id}", "GET", f"/api/v1/posts/{post_id}")
+            await stats.call(client, "GET /api/v1/posts/{post_id}/comments", "GET", f"/api/v1/posts/{post_id}/comments")
+
+            content = f"Update {loops} from {agent['name']}, cc @{rng.choice(peers)}"
+            if agent is project["lead"] and rng.random() < args.all_ratio:
+                content += " @all"
+            await stats.call(client, "POST /api/v1/posts/{post_id}/comments", "POST",
+                             f"/api/v1/posts/{post_id}/comments", json={"content": content})
+
+            if handled:
+                await stats.call(client, "POST /api/v1/notifications/read", "POST", "/api/v1/notifications/read",
+                                 json={"ids": handled})
+            loops += 1
+            if args.think:
+                await asyncio.sleep(rng.uniform(0, 2 * args.think))
+    return loops
+
+
+def scrape_statements(base: str) -> dict[str, list[float]]:
+    """{"METHOD /route": [sum, count]} from /metrics."""
+    result: dict[str, list[float]] = defaultdict(lambda: [0.0, 0.0])
+    for kind, method, route, value in STATEMENTS.findall(httpx.get(f"{base}/metrics", timeout=30).text):
+        result[f"{method} {route}"][0 if kind == "sum" else 1] = float(value)
+    return result
+
+
+async def run(base: str, args, webhook_url: str) -> None:
+    run_id = f"{int(time.time()) % 100000}"
+    t0 = time.perf_counter()
+    agents, projects = await seed(base, args, webhook_url, run_id)
+    print(f"Seeded {len(agents)} agents, {len(projects)} projects, {args.posts} posts each "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+    before = scrape_statements(base)
+    stats = Stats()
+    rng = random.Random(args.seed)
+    deadline = time.monotonic() + args.duration
+    start = time.perf_counter()
+    loops = await asyncio.gather(*(
+        agent_loop(base, agent, stats, deadline, args, random.Random(rng.random())) for agent in agents
+    ))
+    elapsed = time.perf_counter() - start
+    after = scrape_statements(base)
+
+    total = sum(len(samples) for samples in stats.latency.values())
+    print(f"\n{total} requests, {sum(loops)} agent loops in {elapsed:.1f}s: "
+          f"{total / elapsed:.1f} req/s, {sum(loops) / elapsed:.1f} loops/s\n")
+    print(f"{'endpoint':<44} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql/req':>8} {'errors':>7}")
+    for label in sorted(stats.latency, key=lambda k: -sum(stats.latency[k])):
+        ms = [s * 1000 for s in stats.latency[label]]
+        sql_sum = after[label][0] - before[label][0]
+        sql_count = after[label][1] - before[label][1]
+        sql = f"{sql_sum / sql_count:8.1f}" if sql_count else f"{'-':>8}"
+        print(f"{label:<44} {len(ms):>6} {percentile(ms, 50):8.2f} {percentile(ms, 95):8.2f} "
+              f"{percentile(ms, 99):8.2f} {sql} {stats.errors.get(label, 0):>7}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--agents", type=int, default=50)
+    ap.add_argument("--projects", type=int, default=5)
+    ap.add_argument("--posts", type=int, default=20, help="Seed posts per project")
+    ap.add_argument("--duration", type=float, default=30, help="Seconds of load after seeding")
+    ap.add_argument("--think", type=float, default=0.0, help="Mean seconds an agent sleeps between loops")
+    ap.add_argument("--all-ratio", type=float, default=0.02, help="Chance a project lead's comment uses @all")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--url", default=None, help="Target a running server instead of starting one")
+    args = ap.parse_args()
+    args.projects = max(1, min(args.projects, args.agents))
+
+    stub = WebhookStub()
+    server = None
+    if args.url:
+        base = args.url.rstrip("/")
+    else:
+        tmpdir = tempfile.mkdtemp(prefix="minibook_load_")
+        base, server, _ = start_server(str(Path(tmpdir) / "load.db"))
+        print(f"Server {base} on {tmpdir}/load.db")
+    try:
+        asyncio.run(run(base, args, stub.url))
+        print(f"\nWebhook stub received {stub.received} deliveries")
+    finally:
+        stub.stop()
+        if server:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Performance regression suite for hot paths, at data sizes s/m/l.
+
+Run with `python -m pytest benchmarks` (see conftest.py for options); the
+default `python -m pytest` run only collects tests/.
+"""
+
+import random
+
+import pytest
+
+from conftest import SIZES
+
+
+def test_parse_mentions(bench, size):
+    from generate_dataset import Text
+    from src.utils import parse_mentions
+
+    rng = random.Random(1)
+    text, names = Text(rng), [f"agent-{i}" for i in range(50)]
+    parts, length = [], 0
+    while length < SIZES[size]["text_bytes"]:
+        parts.append(text.comment_body(rng.sample(names, rng.choice((0, 0, 1, 2)))))
+        length += len(parts[-1]) + 2
+    body = "\n\n".join(parts)
+
+    bench(f"parse_mentions[{size}]", lambda: parse_mentions(body))
+
+
+def test_rate_limiter_check(bench, size):
+    import time
+    from src.ratelimit import RateLimiter
+
+    limiter = RateLimiter({"rate_limits": {"comment": {"limit": 10 ** 9, "window": 3600}}})
+    now = time.time()
+    for i in range(100):  # Other agents' history, plus `history` recent actions for the one checked
+        limiter.history[f"agent-{i}"] = [(now, "comment"), (now, "post")] * (SIZES[size]["history"] // 2)
+
+    def check():
+        limiter.check("agent-0", "comment")
+        limiter.history["agent-0"].pop()  # Keep the history at its size across iterations
+
+    bench(f"RateLimiter.check[{size}]", check)
+
+
+def test_create_all_notifications(bench, dataset, size):
+    from sqlalchemy import text
+    from src import main as main_module
+    from src.utils import create_all_notifications
+
+    db = main_module.SessionLocal()
+    try:
+        author_id, author_name = db.execute(text("SELECT id, name FROM agents WHERE id = :id"),
+                                            {"id": dataset["agent_id"]}).one()
+
+        def fan_out():
+            create_all_notifications(db, dataset["project_id"], author_id, author_name, dataset["post_id"])
+            db.flush()
+            db.rollback()
+
+        bench(f"create_all_notifications[{size}]", fan_out, engine=dataset["engine"])
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("name, url", [
+    ("list_posts", "/api/v1/projects/{project_id}/posts"),
+    ("search_posts", "/api/v1/search?q=connection+pool"),
+    ("list_comments", "/api/v1/posts/{post_id}/comments"),
+    ("get_agent_profile", "/api/v1/agents/{agent_id}/profile"),
+])
+def test_route(bench, dataset, size, name, url):
+    client, url = dataset["client"], url.format(**dataset)
+
+    def call():
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.text
+
+    bench(f"{name}[{size}]", call, engine=dataset["engine"])
@@ -88,6 +88,18 @@ export interface Comment {
   created_at: string;
 }
 
+export interface ProjectStats {
+  project_id: string;
+  posts: number;
+  posts_by_status: Record<string, number>;
+  posts_by_type: Record<string, number>;
+  comments: number;
+  members: number;
+  active_agents: number;
+  active_window_days: number;
+  activity: { day: string; posts: number; comments: number }[];
+}
+
 export interface Notification {
   id: string;
   type: string;
@@ -124,6 +136,9 @@ export const apiClient = {
   listMembers: (projectId: string) => 
     api<Member[]>(`/api/v1/projects/${projectId}/members`),
   
+  getProjectStats: (projectId: string, days = 30) =>
+    api<ProjectStats>(`/api/v1/projects/${projectId}/stats?days=${days}`),
+  
   // Posts
   createPost: (token: string, projectId: string, data: { title: string; content: string; type: string; tags: string[] }) =>
     api<Post>(`/api/v1/projects/${projectId}/posts`, { method: 'POST', token, body: data }),
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Rebuild the normalized mentions table from the posts/comments `mentions` columns.
+
+Safe to re-run: existing rows are replaced in one transaction. Rows are
+written in created_at order so their (time-ordered) ids keep the
+/agents/me/mentions cursor chronological.
+
+Usage:
+  python3 scripts/backfill_mentions.py [--db data/minibook.db] [--batch 1000]
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import literal
+
+from src.database import init_db
+from src.models import Agent, Post, Comment, Mention
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default="data/minibook.db", help="SQLite path (ignored if DATABASE_URL is set)")
+    ap.add_argument("--batch", type=int, default=1000)
+    args = ap.parse_args()
+
+    SessionLocal = init_db(db_path=args.db)
+    db = SessionLocal()
+    try:
+        ids_by_name = dict(db.query(Agent.name, Agent.id).all())
+        project_by_post = dict(db.query(Post.id, Post.project_id).all())
+
+        # (created_at, author_id, post_id, comment_id, mentions) for every post body and comment,
+        # merged in time order so generated ids sort like the original writes
+        sources = db.query(Post.created_at, Post.author_id, Post.id, literal(None), Post.mentions).all()
+        sources += db.query(Comment.created_at, Comment.author_id, Comment.post_id, Comment.id, Comment.mentions).all()
+        sources.sort(key=lambda row: (row[0], row[3] or ""))
+
+        db.query(Mention).delete(synchronize_session=False)
+        rows = 0
+        for created_at, author_id, post_id, comment_id, names in sources:
+            if post_id not in project_by_post:
+                continue
+            for agent_id in dict.fromkeys(ids_by_name[n] for n in (names or []) if n in ids_by_name):
+                db.add(Mention(agent_id=agent_id, author_id=author_id, project_id=project_by_post[post_id],
+                               post_id=post_id, comment_id=comment_id, created_at=created_at))
+                rows += 1
+                if rows % args.batch == 0:
+                    db.flush()
+        db.commit()
+        print(f"Wrote {rows} mentions from {len(sources)} posts/comments")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
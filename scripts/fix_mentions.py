@@ -23,22 +23,22 @@ def main():
     posts = db.query(Post).all()
     fixed_posts = 0
     for post in posts:
-        raw = parse_mentions(post.content)
+        raw, _ = parse_mentions(post.content)
         valid = [m for m in raw if m in valid_names]
         if set(post.mentions) != set(valid):
             print(f"Post '{post.title}': {post.mentions} -> {valid}")
-            post._mentions = str(valid)  # Direct update
+            post.mentions = valid
             fixed_posts += 1
     
     # Fix comments
     comments = db.query(Comment).all()
     fixed_comments = 0
     for comment in comments:
-        raw = parse_mentions(comment.content)
+        raw, _ = parse_mentions(comment.content)
         valid = [m for m in raw if m in valid_names]
         if set(comment.mentions) != set(valid):
             print(f"Comment {comment.id[:8]}: {comment.mentions} -> {valid}")
-            comment._mentions = str(valid)
+            comment.mentions = valid
             fixed_comments += 1
     
     db.commit()
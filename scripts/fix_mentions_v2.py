@@ -3,7 +3,6 @@
 
 import sys
 import os
-import json
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.database import init_db
@@ -24,10 +23,9 @@ def main():
     posts = db.query(Post).all()
     fixed_posts = 0
     for post in posts:
-        raw = parse_mentions(post.content)
+        raw, _ = parse_mentions(post.content)
         valid = [m for m in raw if m in valid_names]
-        # Use JSON format!
-        post._mentions = json.dumps(valid)
+        post.mentions = valid
         fixed_posts += 1
         print(f"Post '{post.title[:30]}': mentions = {valid}")
     
@@ -35,10 +33,9 @@ def main():
     comments = db.query(Comment).all()
     fixed_comments = 0
     for comment in comments:
-        raw = parse_mentions(comment.content)
+        raw, _ = parse_mentions(comment.content)
         valid = [m for m in raw if m in valid_names]
-        # Use JSON format!
-        comment._mentions = json.dumps(valid)
+        comment.mentions = valid
         fixed_comments += 1
     
     db.commit()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Online migration: JSON-in-Text columns -> native JSON/JSONB.
+
+Older Minibook databases store tags, mentions, payloads, events, labels and
+role descriptions as JSON strings in TEXT columns. The models now declare
+them as JSON (JSONB on Postgres). This script converts existing databases in
+small batches so the server can keep running while it works.
+
+Phase 1 (all databases): normalize values in batches. NULL/empty values
+become the column default, and values the old code wrote as Python reprs
+(e.g. "['alice']") or as a (names, has_all) pair are repaired.
+
+Phase 2 (Postgres only), per column still typed TEXT:
+  1. add a shadow <col>_jsonb column plus a trigger that keeps it in sync
+     with writes from servers still running the old code
+  2. backfill the shadow column in batches, committing each batch
+  3. in one short locked transaction: catch up, drop the trigger and swap
+     the columns. The old column is kept as <col>_text_backup.
+  4. create the GIN indexes CONCURRENTLY
+
+SQLite stores JSON as text, so phase 1 is all it needs.
+
+Usage:
+  python3 scripts/migrate_json_columns.py --sqlite data/minibook.db
+  python3 scripts/migrate_json_columns.py --database-url "postgresql://..." [--drop-backup]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+
+# Allow running from repo root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+# (table, column, default JSON)
+JSON_COLUMNS = [
+    ("projects", "role_descriptions", "{}"),
+    ("posts", "tags", "[]"),
+    ("posts", "mentions", "[]"),
+    ("comments", "mentions", "[]"),
+    ("webhooks", "events", '["new_post", "new_comment", "status_change", "mention"]'),
+    ("github_webhooks", "events", '["pull_request", "issues", "push"]'),
+    ("github_webhooks", "labels", "[]"),
+    ("notifications", "payload", "{}"),
+]
+
+# (index name, table, column, operator class)
+GIN_INDEXES = [
+    ("ix_posts_tags_gin", "posts", "tags", "jsonb_ops"),
+    ("ix_notifications_payload_gin", "notifications", "payload", "jsonb_path_ops"),
+]
+
+
+def normalize(raw, default: str, where: str = "") -> str:
+    """Return canonical JSON text for a stored value (`where` names the row in warnings)."""
+    if raw is None or (isinstance(raw, str) and not raw.strip()):
+        return default
+    if not isinstance(raw, str):
+        value = raw  # already decoded (JSON column)
+    else:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            try:
+                value = ast.literal_eval(raw)  # Python repr written by old scripts
+            except (ValueError, SyntaxError):
+                print(f"  {where or 'value'}: unparseable {raw[:80]!r}, reset to {default}", file=sys.stderr)
+                return default
+    # (names, has_all) pair stored by the old GitHub handler
+    if isinstance(value, list) and len(value) == 2 and isinstance(value[0], list) and isinstance(value[1], bool):
+        value = value[0]
+    return json.dumps(value)
+
+
+def is_jsonb(engine, table: str, column: str) -> bool:
+    for col in inspect(engine).get_columns(table):
+        if col["name"] == column:
+            return col["type"].__class__.__name__.upper() in ("JSON", "JSONB")
+    return False
+
+
+def normalize_column(engine, table: str, column: str, default: str, batch_size: int) -> int:
+    """Phase 1: rewrite malformed values, keyset-paginated by id."""
+    fixed = 0
+    last_id = ""
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                f"SELECT id, {column} FROM {table} WHERE id > :last ORDER BY id LIMIT :n"
+            ), {"last": last_id, "n": batch_size}).all()
+            if not rows:
+                return fixed
+            for row_id, raw in rows:
+                value = normalize(raw, default, f"{table}.{column} id={row_id}")
+                if value != raw:
+                    conn.execute(text(f"UPDATE {table} SET {column} = :v WHERE id = :id"), {"v": value, "id": row_id})
+                    fixed += 1
+            last_id = rows[-1][0]
+
+
+def convert_postgres_column(engine, table: str, column: str, default: str, batch_size: int, drop_backup: bool) -> None:
+    """Phase 2: shadow column + trigger, batched backfill, locked swap."""
+    shadow = f"{column}_jsonb"
+    trigger = f"minibook_sync_{table}_{column}"
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {shadow} JSONB"))
+        conn.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {trigger}() RETURNS trigger AS $$
+            BEGIN
+                NEW.{shadow} := COALESCE(NULLIF(NEW.{column}, ''), '{default}')::jsonb;
+                RETURN NEW;
+            END $$ LANGUAGE plpgsql
+        """))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger} ON {table}"))
+        conn.execute(text(
+            f"CREATE TRIGGER {trigger} BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {trigger}()"
+        ))
+
+    backfill = text(f"""
+        UPDATE {table} SET {shadow} = COALESCE(NULLIF({column}, ''), '{default}')::jsonb
+        WHERE id IN (SELECT id FROM {table} WHERE {shadow} IS NULL LIMIT :n)
+    """)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            updated = conn.execute(backfill, {"n": batch_size}).rowcount
+        total += updated
+        if updated < batch_size:
+            break
+        time.sleep(0.01)  # let foreground traffic through
+    print(f"  {table}.{column}: backfilled {total} rows")
+
+    with engine.begin() as conn:
+        conn.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(
+            f"UPDATE {table} SET {shadow} = COALESCE(NULLIF({column}, ''), '{default}')::jsonb "
+            f"WHERE {shadow} IS NULL"
+        ))
+        conn.execute(text(f"DROP TRIGGER {trigger} ON {table}"))
+        conn.execute(text(f"DROP FUNCTION {trigger}()"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {column} TO {column}_text_backup"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {shadow} TO {column}"))
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT '{default}'::jsonb"))
+        if drop_backup:
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}_text_backup"))
+    print(f"  {table}.{column}: swapped to JSONB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sqlite", default=None, help="SQLite database path")
+    ap.add_argument("--database-url", default=None, help="SQLAlchemy URL (e.g. postgresql://...)")
+    ap.add_argument("--batch-size", type=int, default=1000)
+    ap.add_argument("--drop-backup", action="store_true", help="Drop the old TEXT columns after the swap (Postgres)")
+    args = ap.parse_args()
+
+    if bool(args.sqlite) == bool(args.database_url):
+        ap.error("Provide exactly one of --sqlite or --database-url")
+    engine = create_engine(args.database_url or f"sqlite:///{args.sqlite}")
+    postgres = engine.dialect.name == "postgresql"
+    tables = set(inspect(engine).get_table_names())
+
+    for table, column, default in JSON_COLUMNS:
+        if table not in tables:
+            continue
+        if postgres and is_jsonb(engine, table, column):
+            print(f"{table}.{column}: already JSONB, skipping")
+            continue
+        fixed = normalize_column(engine, table, column, default, args.batch_size)
+        print(f"{table}.{column}: normalized {fixed} rows")
+        if postgres:
+            convert_postgres_column(engine, table, column, default, args.batch_size, args.drop_backup)
+
+    if postgres:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for name, table, column, opclass in GIN_INDEXES:
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column} {opclass})"
+                ))
+                print(f"index {name}: ready")
+
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
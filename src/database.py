@@ -3,11 +3,98 @@
 from __future__ import annotations
 
 import os
-from sqlalchemy import create_engine
+import logging
+import uuid
+from sqlalchemy import create_engine, JSON, String, TypeDecorator, exists, func, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 Base = declarative_base()
+logger = logging.getLogger(__name__)
+
+# JSON column type: JSONB on Postgres (GIN-indexable), JSON text elsewhere.
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Store primary/foreign keys as 16-byte native UUIDs on Postgres instead of
+# 36-char strings. Only affects newly created tables; off by default so
+# existing VARCHAR schemas keep working.
+COMPACT_IDS = os.getenv("MINIBOOK_COMPACT_IDS", "").lower() in ("1", "true", "yes")
+
+
+class IDType(TypeDecorator):
+    """Row identifier: a UUID string in Python, native UUID on Postgres when COMPACT_IDS is set."""
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if COMPACT_IDS and dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_UUID(as_uuid=False))
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not (COMPACT_IDS and dialect.name == "postgresql"):
+            return value
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            return None  # not a UUID, so it cannot match any row (avoids a cast error)
+
+
+def _is_postgres(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def json_array_contains(db, column, value):
+    """Filter: `value` is an element of the JSON array in `column` (evaluated in the database)."""
+    if _is_postgres(db):
+        return type_coerce(column, JSONB).contains([value])  # @>, served by the GIN index
+    elements = func.json_each(column).table_valued("value")
+    return exists(select(1).select_from(elements).where(elements.c.value == value))
+
+
+def json_array_elements(db, column):
+    """Table-valued function yielding each element of a JSON array column as `.c.value`."""
+    if _is_postgres(db):
+        return func.jsonb_array_elements_text(column).table_valued("value")
+    return func.json_each(column).table_valued("value")
+
+
+def json_field_equals(db, column, key: str, value):
+    """Filter: JSON object `column` has `key` equal to `value` (value None = key absent)."""
+    if _is_postgres(db):
+        if value is None:
+            return ~type_coerce(column, JSONB).has_key(key)
+        return type_coerce(column, JSONB).contains({key: value})
+    if value is None:
+        return column[key].as_string().is_(None)
+    return column[key].as_string() == value
+
+
+def insert_ignore(db, model, rows: list) -> None:
+    """Bulk INSERT that skips rows conflicting with an existing primary/unique key."""
+    if not rows:
+        return
+    if _is_postgres(db):
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    db.execute(insert(model).on_conflict_do_nothing(), rows)
+
+
+def upsert(db, model, rows: list, keys: list, add: tuple = (), replace: tuple = ()) -> None:
+    """Bulk INSERT; rows conflicting on `keys` instead add their `add` columns to the
+    existing row and overwrite its `replace` columns, in one atomic statement."""
+    if not rows:
+        return
+    if _is_postgres(db):
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(model)
+    set_ = {name: getattr(model, name) + stmt.excluded[name] for name in add}
+    set_.update({name: stmt.excluded[name] for name in replace})
+    db.execute(stmt.on_conflict_do_update(index_elements=keys, set_=set_), rows)
 
 
 def get_engine(*, db_url: str | None = None, db_path: str = "data/minibook.db") -> Engine:
@@ -29,8 +116,70 @@ def get_engine(*, db_url: str | None = None, db_path: str = "data/minibook.db")
     return create_engine(f"sqlite:///{db_path}", echo=False)
 
 
+def check_json_columns(engine: Engine) -> None:
+    """Refuse to start on a Postgres database whose JSON columns are still TEXT.
+
+    Older databases stored these values as JSON strings; the drivers return
+    them as str, which breaks tag filters, mentions and notification payloads.
+    scripts/migrate_json_columns.py converts them (online, in batches).
+    """
+    if engine.dialect.name != "postgresql":
+        return  # SQLite stores JSON as text either way
+    from sqlalchemy import inspect
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    stale = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        types = {col["name"]: col["type"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if isinstance(column.type, JSON) and column.name in types and not isinstance(types[column.name], JSON):
+                stale.append(f"{table.name}.{column.name}")
+    if stale:
+        raise RuntimeError(
+            f"Columns {', '.join(stale)} are not JSONB yet. Run "
+            "`python3 scripts/migrate_json_columns.py --database-url ...` before starting this version."
+        )
+
+
+def add_missing_columns(engine: Engine) -> None:
+    """Add nullable model columns to tables that predate them (create_all skips existing tables)."""
+    from sqlalchemy import inspect
+    from sqlalchemy.schema import CreateColumn
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+            logger.info("Added column %s.%s", table.name, column.name)
+
+
+def create_missing_indexes(engine: Engine) -> None:
+    """Create model indexes on tables that predate them (create_all skips existing tables)."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except Exception as e:
+                # e.g. a GIN index on a column not yet migrated to JSONB
+                logger.warning("Could not create index %s: %s", index.name, e)
+
+
 def init_db(*, db_url: str | None = None, db_path: str = "data/minibook.db"):
     """Initialize database and return session maker."""
     engine = get_engine(db_url=db_url, db_path=db_path)
     Base.metadata.create_all(engine)
+    check_json_columns(engine)
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
     return sessionmaker(bind=engine)
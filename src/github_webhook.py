@@ -6,9 +6,48 @@ Processes GitHub events and creates/updates posts accordingly.
 
 import hmac
 import hashlib
-from typing import Optional, Tuple
-from .models import Post, GitHubWebhook, Agent, Comment
-from .utils import parse_mentions, create_notifications
+from typing import List, NamedTuple, Optional, Tuple
+from .cache import TTLCache
+from .mentions import mention_index
+from .models import Post, GitHubWebhook, Comment
+from .utils import add_notifications, record_change, follow_post, record_mentions
+from . import stats
+
+
+class WebhookConfig(NamedTuple):
+    """Detached snapshot of an active GitHubWebhook row."""
+    project_id: str
+    secret: str
+    events: List[str]
+    labels: List[str]
+
+
+class SystemAgent(NamedTuple):
+    """The agent GitHub posts are attributed to, resolved once at startup."""
+    id: str
+    name: str
+
+
+# project_id -> WebhookConfig, or False for "no active config". Invalidated by
+# the create/delete endpoints; the TTL bounds staleness across worker processes.
+_config_cache = TTLCache(ttl=60)
+
+
+def get_webhook_config(db, project_id: str) -> Optional[WebhookConfig]:
+    """Active GitHub webhook config for a project, cached in-process."""
+    cached = _config_cache.get(project_id)
+    if cached is None:
+        row = db.query(GitHubWebhook).filter(
+            GitHubWebhook.project_id == project_id,
+            GitHubWebhook.active == True
+        ).first()
+        cached = WebhookConfig(row.project_id, row.secret, list(row.events or []), list(row.labels or [])) if row else False
+        _config_cache.set(project_id, cached)
+    return cached or None
+
+
+def invalidate_webhook_config(project_id: str):
+    _config_cache.invalidate(project_id)
 
 
 def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
@@ -25,7 +64,7 @@ def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
     return hmac.compare_digest(expected, signature)
 
 
-def should_process_event(config: GitHubWebhook, event_type: str, payload: dict) -> bool:
+def should_process_event(config: WebhookConfig, event_type: str, payload: dict) -> bool:
     """Check if this event should be processed based on config filters."""
     # Check if event type is enabled
     if event_type not in config.events:
@@ -186,13 +225,13 @@ def format_push_post(payload: dict) -> Tuple[str, str, str]:
 
 def process_github_event(
     db,
-    config: GitHubWebhook,
+    config: WebhookConfig,
     event_type: str,
     payload: dict,
-    system_agent: Agent
+    system_agent: SystemAgent
 ) -> Optional[dict]:
     """
-    Process a GitHub webhook event and create/update posts.
+    Process a GitHub webhook event and create/update posts (caller commits).
     
     Returns dict with action taken, or None if skipped.
     """
@@ -225,7 +264,8 @@ def process_github_event(
     else:
         return None
     
-    mentions = parse_mentions(content)
+    known, _ = mention_index.resolve(db, content)
+    mentions = list(known)
     
     if existing_post:
         # Add comment to existing post instead of creating new one
@@ -239,18 +279,26 @@ def process_github_event(
             db.add(comment)
             
             # Update post status if closed
+            old_status = existing_post.status
             if action == "closed":
                 pr_merged = payload.get("pull_request", {}).get("merged", False)
                 existing_post.status = "resolved" if pr_merged else "closed"
             
-            db.commit()
+            db.flush()
+            record_change(db, config.project_id, "comment", comment.id, "created")
+            stats.comment_created(db, config.project_id, comment)
+            if existing_post.status != old_status:
+                record_change(db, config.project_id, "post", existing_post.id, "status")
+                stats.post_status_changed(db, config.project_id, old_status, existing_post.status)
             
             if mentions:
-                create_notifications(db, mentions, "mention", {
+                add_notifications(db, [known[name] for name in mentions], "mention", {
                     "post_id": existing_post.id,
                     "comment_id": comment.id,
                     "by": system_agent.name
                 })
+                record_mentions(db, [known[name] for name in mentions], system_agent.id,
+                                config.project_id, existing_post.id, comment.id)
             
             return {"action": "comment_added", "post_id": existing_post.id}
     else:
@@ -266,15 +314,18 @@ def process_github_event(
         post.tags = tags
         post.mentions = mentions
         db.add(post)
-        db.commit()
-        db.refresh(post)
+        db.flush()
+        record_change(db, config.project_id, "post", post.id, "created")
+        stats.post_created(db, post)
+        follow_post(db, post.id, system_agent.id)
         
         if mentions:
-            create_notifications(db, mentions, "mention", {
+            add_notifications(db, [known[name] for name in mentions], "mention", {
                 "post_id": post.id,
                 "title": post.title,
                 "by": system_agent.name
             })
+            record_mentions(db, [known[name] for name in mentions], system_agent.id, config.project_id, post.id)
         
         return {"action": "post_created", "post_id": post.id}
     
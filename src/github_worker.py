@@ -0,0 +1,175 @@
+"""
+Background processing of GitHub webhook deliveries.
+
+The receive endpoint only verifies, stores and acknowledges a delivery
+(202). This worker turns stored deliveries into posts and comments off
+the request path, retrying failures with backoff. The database row is the
+source of truth: the in-memory queue only carries ids, and pending
+deliveries are picked up again on startup.
+
+Several worker processes may share the table. A worker claims a delivery
+by setting it to "processing" with a lease (claimed_at); only leases older
+than LEASE_TIMEOUT, left by a worker that crashed or was killed, are put
+back to "pending". Finished deliveries are deleted after RETENTION_DAYS.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import or_
+
+from .github_webhook import SystemAgent, get_webhook_config, process_github_event
+from .models import GitHubDelivery
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryWorker:
+    """Single asyncio task draining a queue of GitHubDelivery ids."""
+
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 5.0  # seconds, multiplied by the attempt number
+    LEASE_TIMEOUT = 600.0  # seconds before a "processing" delivery counts as abandoned
+    MAINTENANCE_INTERVAL = 300.0  # seconds between lease/retention sweeps
+    RETENTION_DAYS = 7  # processed, skipped and failed deliveries are deleted after this (0 keeps them)
+
+    def __init__(self):
+        self.session_factory = None
+        self.system_agent: Optional[SystemAgent] = None
+        self.retention_days = self.RETENTION_DAYS
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self, session_factory, system_agent: SystemAgent, retention_days: Optional[int] = None):
+        """Start the worker on the running loop and requeue unfinished deliveries."""
+        self.session_factory = session_factory
+        self.system_agent = system_agent
+        if retention_days is not None:
+            self.retention_days = retention_days
+        self.queue = asyncio.Queue()
+        for delivery_id in self.maintain(requeue_pending=True):
+            self.enqueue(delivery_id)
+        self.tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._maintain_loop())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.tasks = []
+
+    def maintain(self, requeue_pending: bool = False) -> List[str]:
+        """Release expired leases and delete finished deliveries past retention.
+
+        Returns the ids to enqueue: the released deliveries, or every pending
+        one with `requeue_pending` (startup).
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            # A worker that crashed or was killed leaves "processing" rows behind; live ones finish within the lease
+            expired = [delivery_id for (delivery_id,) in db.query(GitHubDelivery.id).filter(
+                GitHubDelivery.status == "processing",
+                or_(GitHubDelivery.claimed_at == None,
+                    GitHubDelivery.claimed_at < now - timedelta(seconds=self.LEASE_TIMEOUT))
+            ).all()]
+            if expired:
+                db.query(GitHubDelivery).filter(
+                    GitHubDelivery.id.in_(expired), GitHubDelivery.status == "processing"
+                ).update({GitHubDelivery.status: "pending", GitHubDelivery.claimed_at: None}, synchronize_session=False)
+                logger.warning("Requeued %d GitHub deliveries with expired leases", len(expired))
+            if self.retention_days:
+                db.query(GitHubDelivery).filter(
+                    GitHubDelivery.status.in_(("processed", "skipped", "failed")),
+                    GitHubDelivery.received_at < now - timedelta(days=self.retention_days)
+                ).delete(synchronize_session=False)
+            db.commit()
+            if not requeue_pending:
+                return expired
+            return [delivery_id for (delivery_id,) in db.query(GitHubDelivery.id).filter(
+                GitHubDelivery.status == "pending"
+            ).order_by(GitHubDelivery.received_at).all()]
+        finally:
+            db.close()
+
+    async def _maintain_loop(self):
+        while True:
+            await asyncio.sleep(self.MAINTENANCE_INTERVAL)
+            try:
+                for delivery_id in await asyncio.to_thread(self.maintain):
+                    self.enqueue(delivery_id)
+            except Exception:
+                logger.exception("GitHub delivery maintenance failed")
+
+    def enqueue(self, delivery_id: str, delay: float = 0):
+        if self.queue is None:
+            return  # Not started (e.g. scripts); the row stays pending until the next startup
+        if delay:
+            asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, delivery_id)
+        else:
+            self.queue.put_nowait(delivery_id)
+
+    async def _run(self):
+        while True:
+            delivery_id = await self.queue.get()
+            try:
+                retry = await asyncio.to_thread(self.process, delivery_id)
+            except Exception:
+                logger.exception("GitHub delivery %s: worker error", delivery_id)
+                retry = None
+            if retry is not None:
+                self.enqueue(delivery_id, delay=retry)
+
+    def process(self, delivery_id: str) -> Optional[float]:
+        """Process one delivery. Returns a retry delay if it failed and should be retried."""
+        with tracing.start_span("github.delivery", "consumer", **{"github.delivery_id": delivery_id}):
+            return self._process(delivery_id)
+
+    def _process(self, delivery_id: str) -> Optional[float]:
+        db = self.session_factory()
+        try:
+            # Claim it; another worker process may have picked it up already
+            claimed = db.query(GitHubDelivery).filter(
+                GitHubDelivery.id == delivery_id, GitHubDelivery.status == "pending"
+            ).update({
+                GitHubDelivery.status: "processing",
+                GitHubDelivery.attempts: GitHubDelivery.attempts + 1,
+                GitHubDelivery.claimed_at: datetime.utcnow(),
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return None
+
+            delivery = db.query(GitHubDelivery).filter(GitHubDelivery.id == delivery_id).first()
+            try:
+                config = get_webhook_config(db, delivery.project_id)
+                result = None
+                if config:
+                    payload = json.loads(delivery.payload)
+                    result = process_github_event(db, config, delivery.event_type, payload, self.system_agent)
+                delivery.status = "processed" if result else "skipped"
+                delivery.result = result
+                delivery.error = None
+                delivery.processed_at = datetime.utcnow()
+                db.commit()  # Posts/comments and the delivery status land together
+                return None
+            except Exception as e:
+                db.rollback()
+                logger.warning("GitHub delivery %s failed (attempt %d): %s", delivery_id, delivery.attempts, e)
+                retry = delivery.attempts < self.MAX_ATTEMPTS
+                delivery.status = "pending" if retry else "failed"
+                delivery.claimed_at = None
+                delivery.error = f"{type(e).__name__}: {e}"
+                db.commit()
+                return self.RETRY_DELAY * delivery.attempts if retry else None
+        finally:
+            db.close()
+
+
+delivery_worker = DeliveryWorker()
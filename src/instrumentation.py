@@ -0,0 +1,45 @@
+"""
+One set of SQLAlchemy engine events feeding metrics, the slow log and tracing.
+
+Each statement is timed once: before_cursor_execute pushes (start time,
+tracing span) onto a per-connection stack, and after_cursor_execute pops
+it, finishes the span and hands the duration to metrics.record_statement
+and slowlog.record_statement. handle_error pops the entry of a
+failed statement and closes its span with the error.
+"""
+
+import time
+
+from sqlalchemy import event
+
+from . import metrics, slowlog, tracing
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement run on `engine` for metrics, the slow log and tracing."""
+    if getattr(engine, "_minibook_instrumented", False):
+        return
+    engine._minibook_instrumented = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("minibook_statements", []).append(
+            (time.perf_counter(), tracing.start_statement(conn, statement))
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start, span = conn.info["minibook_statements"].pop()
+        seconds = time.perf_counter() - start
+        if span is not None:
+            tracing.finish(span)
+        metrics.record_statement(seconds)
+        slowlog.record_statement(conn, statement, parameters, executemany, seconds)  # may EXPLAIN
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        stack = context.connection.info.get("minibook_statements") if context.connection is not None else None
+        if stack:
+            _, span = stack.pop()
+            if span is not None:
+                tracing.finish(span, context.original_exception)
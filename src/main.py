@@ -5,36 +5,45 @@ Minibook API Server
 A small Moltbook for agent collaboration on software projects.
 """
 
+import asyncio
 import os
 import yaml
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Union
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Depends, Header
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.orm import joinedload, load_only, with_expression
 
-from .database import init_db
-from .models import Agent, Project, ProjectMember, Post, Comment, Webhook, Notification, GitHubWebhook
+from .database import init_db, json_array_contains, json_array_elements
+from .models import Agent, Project, ProjectMember, Post, Comment, Webhook, Notification, NotificationCounter, GitHubWebhook, GitHubDelivery, ProjectChange, PostParticipant, Mention
 from .schemas import (
     AgentCreate, AgentResponse, AgentProfileResponse, AgentMembership, RecentPost, RecentComment,
-    ProjectCreate, ProjectUpdate, ProjectResponse,
+    ProjectCreate, ProjectUpdate, ProjectResponse, ProjectStatsResponse,
     JoinProject, MemberUpdate, MemberResponse,
-    PostCreate, PostUpdate, PostResponse,
-    CommentCreate, CommentResponse,
+    PostCreate, PostUpdate, PostResponse, SparsePostResponse,
+    CommentCreate, CommentResponse, CommentTreeNode, CommentTreeResponse, SubscriptionResponse,
+    BatchCreate, BatchResponse, ChangesResponse, FeedResponse,
     WebhookCreate, WebhookResponse,
-    NotificationResponse,
-    GitHubWebhookCreate, GitHubWebhookResponse
+    NotificationResponse, NotificationBulkRead, UnreadCountResponse, MentionsResponse,
+    GitHubWebhookCreate, GitHubWebhookResponse, GitHubDeliveryResponse
 )
 from .utils import (
-    parse_mentions, validate_mentions, trigger_webhooks, create_notifications, 
+    trigger_webhooks, trigger_webhooks_batch,
     create_thread_update_notifications, can_use_all_mention, check_all_mention_rate_limit,
-    record_all_mention, create_all_notifications
+    record_all_mention, create_all_notifications, bump_unread_count,
+    rebuild_unread_counts, record_change, follow_post, add_notifications, record_mentions, replace_post_mentions
 )
 from .ratelimit import rate_limiter, init_rate_limiter
-from .github_webhook import verify_signature, process_github_event
+from .responses import FastJSONResponse, dumps, post_row, comment_row, notification_row
+from .cache import TTLCache
+from .mentions import mention_index
+from . import instrumentation, metrics, profiler, slowlog, stats, tracing
+from .github_webhook import SystemAgent, get_webhook_config, invalidate_webhook_config, verify_signature
+from .github_worker import delivery_worker
 
 
 # --- Config ---
@@ -56,8 +65,11 @@ PUBLIC_URL = config.get("public_url", f"http://{HOSTNAME}")
 # Admin token can be provided via env for containerized deployments.
 # Priority: env ADMIN_TOKEN > config.yaml admin_token
 ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or config.get("admin_token", None)
+# Seconds a rendered /api/v1/feed page is reused for the same agent (0 disables)
+FEED_CACHE_TTL = config.get("feed_cache_ttl", 5)
 
 SessionLocal = None
+feed_cache = TTLCache(ttl=FEED_CACHE_TTL)
 
 
 # --- App ---
@@ -66,8 +78,21 @@ SessionLocal = None
 async def lifespan(app: FastAPI):
     global SessionLocal
     SessionLocal = init_db(db_url=DB_URL, db_path=DB_PATH)
+    instrumentation.instrument_engine(SessionLocal.kw["bind"])
+    metrics.instrument_sessions(SessionLocal)
+    slowlog.configure(config, default_dir=os.path.dirname(DB_PATH) or ".")
+    tracing.configure(config, default_dir=os.path.dirname(DB_PATH) or ".")
     init_rate_limiter(config)
+    backfill_unread_counts()
+    backfill_post_participants()
+    backfill_project_stats()
+    load_mention_index()
+    mention_reloader = asyncio.create_task(mention_index.reload_periodically(load_mention_index))
+    delivery_worker.start(SessionLocal, resolve_system_agent(), config.get("github_delivery_retention_days"))
     yield
+    mention_reloader.cancel()
+    await delivery_worker.stop()
+    tracing.shutdown()
 
 app = FastAPI(
     title="Minibook",
@@ -84,6 +109,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(slowlog.SlowRequestMiddleware)
+app.add_middleware(profiler.CPUTimeMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
 
 # Static files
 static_dir = ROOT / "static"
@@ -91,6 +120,54 @@ if static_dir.exists():
     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
 
+def backfill_unread_counts():
+    """Populate unread counters for databases created before they existed."""
+    db = SessionLocal()
+    try:
+        if not db.query(NotificationCounter).first() and db.query(Notification).filter(Notification.read == False).first():
+            rebuild_unread_counts(db)
+    finally:
+        db.close()
+
+
+def backfill_post_participants():
+    """Populate post_participants (authors + commenters) for databases created before it existed."""
+    from sqlalchemy import insert, select, union, literal, func
+    
+    db = SessionLocal()
+    try:
+        if not db.query(PostParticipant).first() and db.query(Post).first():
+            followers = union(
+                select(Post.id, Post.author_id),
+                select(Comment.post_id, Comment.author_id)
+            ).subquery()
+            db.execute(insert(PostParticipant).from_select(
+                ["post_id", "agent_id", "state", "created_at"],
+                select(followers.c[0], followers.c[1], literal("participant"), func.current_timestamp())
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+
+def backfill_project_stats():
+    """Build dashboard counters for projects created before they existed."""
+    db = SessionLocal()
+    try:
+        stats.backfill(db)
+    finally:
+        db.close()
+
+
+def load_mention_index():
+    """Build the @mention index for this database (the index is per process, not per app)."""
+    db = SessionLocal()
+    try:
+        mention_index.load(db)
+    finally:
+        db.close()
+
+
 # --- Dependencies ---
 
 def get_db():
@@ -137,6 +214,12 @@ async def health():
     return {"status": "ok", "hostname": HOSTNAME}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text-format metrics for this worker process."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/v1/version")
 async def version():
     """Get version info including git commit SHA."""
@@ -222,6 +305,7 @@ async def register_agent(data: AgentCreate, db=Depends(get_db)):
     db.add(agent)
     db.commit()
     db.refresh(agent)
+    mention_index.add(agent.name, agent.id)
     
     return AgentResponse(id=agent.id, name=agent.name, api_key=agent.api_key, created_at=agent.created_at)
 
@@ -253,6 +337,40 @@ async def get_ratelimit(agent: Agent = Depends(require_agent)):
     return rate_limiter.get_stats(agent.id)
 
 
+@app.get("/api/v1/agents/me/mentions", response_model=MentionsResponse)
+async def list_my_mentions(
+    before: Optional[str] = None,
+    limit: int = 50,
+    agent: Agent = Depends(require_agent),
+    db=Depends(get_db)
+):
+    """
+    Posts and comments that @mentioned you, newest first.
+    
+    Unlike mention notifications these are never marked read or deduplicated.
+    Page back with before=<next_cursor>. @all is not included.
+    """
+    limit = max(1, min(limit, 100))
+    query = db.query(
+        Mention.id, Mention.project_id, Mention.post_id, Mention.comment_id,
+        Post.title, Agent.name, Mention.created_at
+    ).join(Post, Post.id == Mention.post_id).join(Agent, Agent.id == Mention.author_id).filter(
+        Mention.agent_id == agent.id
+    )
+    if before:
+        query = query.filter(Mention.id < before)
+    rows = query.order_by(Mention.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return FastJSONResponse({
+        "items": [{
+            "id": r.id, "project_id": r.project_id, "post_id": r.post_id, "comment_id": r.comment_id,
+            "post_title": r.title, "by": r.name, "created_at": r.created_at,
+        } for r in rows],
+        "next_cursor": rows[-1].id if has_more else None,
+    })
+
+
 @app.get("/api/v1/agents", response_model=List[AgentResponse])
 async def list_agents(online_only: bool = False, db=Depends(get_db)):
     """List all agents. Use online_only=true to filter to online agents."""
@@ -283,16 +401,16 @@ async def get_agent_profile(agent_id: str, db=Depends(get_db)):
     
     # Get memberships
     memberships = []
-    members = db.query(ProjectMember).filter(ProjectMember.agent_id == agent_id).all()
-    for m in members:
-        project = db.query(Project).filter(Project.id == m.project_id).first()
-        if project:
-            memberships.append(AgentMembership(
-                project_id=project.id,
-                project_name=project.name,
-                role=m.role,
-                is_primary_lead=(project.primary_lead_agent_id == agent_id)
-            ))
+    members = db.query(ProjectMember, Project).join(
+        Project, Project.id == ProjectMember.project_id
+    ).filter(ProjectMember.agent_id == agent_id).all()
+    for m, project in members:
+        memberships.append(AgentMembership(
+            project_id=project.id,
+            project_name=project.name,
+            role=m.role,
+            is_primary_lead=(project.primary_lead_agent_id == agent_id)
+        ))
     
     # Get recent posts (last 5)
     recent_posts = []
@@ -308,13 +426,14 @@ async def get_agent_profile(agent_id: str, db=Depends(get_db)):
     
     # Get recent comments (last 5)
     recent_comments = []
-    comments = db.query(Comment).filter(Comment.author_id == agent_id).order_by(Comment.created_at.desc()).limit(5).all()
-    for c in comments:
-        post = db.query(Post).filter(Post.id == c.post_id).first()
+    comments = db.query(Comment, Post.title).outerjoin(Post, Post.id == Comment.post_id).filter(
+        Comment.author_id == agent_id
+    ).order_by(Comment.created_at.desc()).limit(5).all()
+    for c, post_title in comments:
         recent_comments.append(RecentComment(
             id=c.id,
             post_id=c.post_id,
-            post_title=post.title if post else "Unknown",
+            post_title=post_title or "Unknown",
             content_preview=c.content[:100] + "..." if len(c.content) > 100 else c.content,
             created_at=c.created_at
         ))
@@ -341,31 +460,31 @@ async def create_project(data: ProjectCreate, agent: Agent = Depends(require_age
     if db.query(Project).filter(Project.name == data.name).first():
         raise HTTPException(400, "Project name already taken")
     
-    project = Project(name=data.name, description=data.description)
+    # Creator is the primary lead
+    project = Project(name=data.name, description=data.description, primary_lead_agent_id=agent.id)
     db.add(project)
-    db.commit()
+    db.flush()
     
     member = ProjectMember(agent_id=agent.id, project_id=project.id, role="lead")
     db.add(member)
-    db.commit()
-    db.refresh(project)
-    
-    # Set creator as primary lead
-    project.primary_lead_agent_id = agent.id
-    db.commit()
+    record_change(db, project.id, "member", agent.id, "joined")
+    stats.mark_complete(db, project.id)
     
-    return ProjectResponse(
+    response = ProjectResponse(
         id=project.id, name=project.name, description=project.description,
         primary_lead_agent_id=project.primary_lead_agent_id,
         primary_lead_name=agent.name,
         created_at=project.created_at
     )
+    db.commit()
+    feed_cache.invalidate(agent.id)
+    return response
 
 
 @app.get("/api/v1/projects", response_model=List[ProjectResponse])
 async def list_projects(db=Depends(get_db)):
     """List all projects."""
-    projects = db.query(Project).all()
+    projects = db.query(Project).options(joinedload(Project.primary_lead)).all()
     return [ProjectResponse(
         id=p.id, name=p.name, description=p.description,
         primary_lead_agent_id=p.primary_lead_agent_id,
@@ -405,7 +524,9 @@ async def join_project(project_id: str, data: JoinProject, agent: Agent = Depend
     role = (data.role or "member").strip() or "member"
     member = ProjectMember(agent_id=agent.id, project_id=project_id, role=role)
     db.add(member)
+    record_change(db, project_id, "member", agent.id, "joined")
     db.commit()
+    feed_cache.invalidate(agent.id)
     db.refresh(member)
 
     return MemberResponse(agent_id=agent.id, agent_name=agent.name, role=member.role, joined_at=member.joined_at)
@@ -414,7 +535,9 @@ async def join_project(project_id: str, data: JoinProject, agent: Agent = Depend
 @app.get("/api/v1/projects/{project_id}/members", response_model=List[MemberResponse])
 async def list_members(project_id: str, db=Depends(get_db)):
     """List project members with online status."""
-    members = db.query(ProjectMember).filter(ProjectMember.project_id == project_id).all()
+    members = db.query(ProjectMember).options(joinedload(ProjectMember.agent)).filter(
+        ProjectMember.project_id == project_id
+    ).all()
     return [MemberResponse(
         agent_id=m.agent_id, 
         agent_name=m.agent.name, 
@@ -465,8 +588,8 @@ async def create_post(project_id: str, data: PostCreate, agent: Agent = Depends(
         raise HTTPException(404, "Project not found")
     
     content = data.get_content()
-    raw_mentions, has_all = parse_mentions(content)
-    mentions = validate_mentions(db, raw_mentions)
+    known, has_all = mention_index.resolve(db, content)
+    mentions = list(known)
     
     # Handle @all mention
     if has_all:
@@ -482,33 +605,125 @@ async def create_post(project_id: str, data: PostCreate, agent: Agent = Depends(
     post.tags = data.tags
     post.mentions = mentions + (['all'] if has_all else [])
     db.add(post)
-    db.commit()
-    db.refresh(post)
+    db.flush()
+    record_change(db, project_id, "post", post.id, "created")
+    stats.post_created(db, post)
+    follow_post(db, post.id, agent.id)
     
     # Create individual mention notifications
     if mentions:
-        create_notifications(db, mentions, "mention", {"post_id": post.id, "title": post.title, "by": agent.name})
+        add_notifications(db, [known[name] for name in mentions], "mention", {"post_id": post.id, "title": post.title, "by": agent.name})
+        record_mentions(db, [known[name] for name in mentions], agent.id, project_id, post.id)
     
     # Create @all notifications
     if has_all:
-        record_all_mention(project_id)
         create_all_notifications(db, project_id, agent.id, agent.name, post.id)
     
-    await trigger_webhooks(db, project_id, "new_post", {"post_id": post.id, "title": post.title, "author": agent.name})
-    
-    return PostResponse(
+    # Build the response before commit so the new row needs no refresh
+    response = PostResponse(
         id=post.id, project_id=post.project_id, author_id=post.author_id, author_name=agent.name,
         title=post.title, content=post.content, type=post.type, status=post.status,
         tags=post.tags, mentions=post.mentions, pinned=(post.pin_order is not None), pin_order=post.pin_order, github_ref=post.github_ref,
         comment_count=0,
         created_at=post.created_at, updated_at=post.updated_at
     )
+    db.commit()
+    if has_all:
+        record_all_mention(project_id)
+    
+    await trigger_webhooks(db, project_id, "new_post", {"post_id": response.id, "title": response.title, "author": agent.name})
+    
+    return response
+
+
+# Sparse fieldsets: response field -> columns it needs loaded
+POST_PREVIEW_CHARS = 200
+POST_FIELD_COLUMNS = {
+    "id": [Post.id],
+    "project_id": [Post.project_id],
+    "author_id": [Post.author_id],
+    "author_name": [Post.author_id],
+    "title": [Post.title],
+    "content": [Post.content],
+    "content_preview": [],
+    "type": [Post.type],
+    "status": [Post.status],
+    "tags": [Post.tags],
+    "mentions": [Post.mentions],
+    "pinned": [Post.pin_order],
+    "pin_order": [Post.pin_order],
+    "github_ref": [Post.github_ref],
+    "comment_count": [],
+    "created_at": [Post.created_at],
+    "updated_at": [Post.updated_at],
+}
+POST_FIELD_VALUES = {
+    "author_name": lambda p, counts: p.author.name,
+    "content_preview": lambda p, counts: p.content_preview,
+    "tags": lambda p, counts: p.tags,
+    "mentions": lambda p, counts: p.mentions,
+    "pinned": lambda p, counts: p.pin_order is not None,
+    "comment_count": lambda p, counts: counts.get(p.id, 0),
+}
+
+
+def parse_post_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a `fields=` parameter into PostResponse field names (None = full posts)."""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in POST_FIELD_COLUMNS]
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}. Valid: {', '.join(POST_FIELD_COLUMNS)}")
+    return names
+
+
+def apply_post_fields(query, fields: List[str]):
+    """Restrict a Post query to the columns a sparse fieldset needs."""
+    columns = {Post.id} | {c for f in fields for c in POST_FIELD_COLUMNS[f]}
+    query = query.options(load_only(*columns, raiseload=True))
+    if "author_name" in fields:
+        query = query.options(joinedload(Post.author).load_only(Agent.name))
+    if "content_preview" in fields:
+        from sqlalchemy import func
+        query = query.options(with_expression(Post.content_preview, func.substr(Post.content, 1, POST_PREVIEW_CHARS)))
+    return query
+
+
+# Post listings return PostResponse objects, or SparsePostResponse ones with `fields=`.
+# The route returns the JSON itself, so the schema is declared for the docs only.
+POST_LIST_RESPONSES = {200: {
+    "model": List[Union[PostResponse, SparsePostResponse]],
+    "description": "Full posts; with `fields=`, objects holding only the requested keys",
+}}
 
 
-@app.get("/api/v1/projects/{project_id}/posts", response_model=List[PostResponse])
-async def list_posts(project_id: str, status: Optional[str] = None, type: Optional[str] = None, db=Depends(get_db)):
-    """List posts (pinned first)."""
+def sparse_posts_response(posts, fields: List[str], comment_counts: dict) -> FastJSONResponse:
+    """Serialize posts with only the requested fields."""
+    return FastJSONResponse([
+        {f: POST_FIELD_VALUES[f](p, comment_counts) if f in POST_FIELD_VALUES else getattr(p, f) for f in fields}
+        for p in posts
+    ])
+
+
+@app.get("/api/v1/projects/{project_id}/posts", response_model=None, responses=POST_LIST_RESPONSES)
+async def list_posts(
+    project_id: str,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    fields: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """
+    List posts (pinned first).
+    
+    fields: comma-separated subset of PostResponse fields to return, e.g.
+    `id,title,status,content_preview` (content_preview = first 200 chars of content).
+    Only the requested columns are loaded.
+    """
+    field_names = parse_post_fields(fields)
     query = db.query(Post).filter(Post.project_id == project_id)
+    query = apply_post_fields(query, field_names) if field_names else query.options(joinedload(Post.author))
     if status:
         query = query.filter(Post.status == status)
     if type:
@@ -520,23 +735,20 @@ async def list_posts(project_id: str, status: Optional[str] = None, type: Option
     # Get comment counts for all posts in one query
     post_ids = [p.id for p in posts]
     comment_counts = {}
-    if post_ids:
+    if post_ids and (not field_names or "comment_count" in field_names):
         from sqlalchemy import func
         counts = db.query(Comment.post_id, func.count(Comment.id)).filter(
             Comment.post_id.in_(post_ids)
         ).group_by(Comment.post_id).all()
         comment_counts = {post_id: count for post_id, count in counts}
     
-    return [PostResponse(
-        id=p.id, project_id=p.project_id, author_id=p.author_id, author_name=p.author.name,
-        title=p.title, content=p.content, type=p.type, status=p.status,
-        tags=p.tags, mentions=p.mentions, pinned=(p.pin_order is not None), pin_order=p.pin_order, github_ref=p.github_ref,
-        comment_count=comment_counts.get(p.id, 0),
-        created_at=p.created_at, updated_at=p.updated_at
-    ) for p in posts]
+    if field_names:
+        return sparse_posts_response(posts, field_names, comment_counts)
+    
+    return FastJSONResponse([post_row(p, p.author.name, comment_counts.get(p.id, 0)) for p in posts])
 
 
-@app.get("/api/v1/search", response_model=List[PostResponse])
+@app.get("/api/v1/search", response_model=None, responses=POST_LIST_RESPONSES)
 async def search_posts(
     q: str,
     project_id: Optional[str] = None,
@@ -544,6 +756,7 @@ async def search_posts(
     tag: Optional[str] = None,
     type: Optional[str] = None,
     limit: int = 20,
+    fields: Optional[str] = None,
     db=Depends(get_db)
 ):
     """
@@ -552,10 +765,14 @@ async def search_posts(
     Filters:
     - project_id: limit to specific project
     - author: filter by author name
-    - tag: filter by tag
+    - tag: posts carrying exactly this tag (case-sensitive)
     - type: filter by post type
+    
+    fields: sparse fieldset, as for listing posts
     """
+    field_names = parse_post_fields(fields)
     query = db.query(Post)
+    query = apply_post_fields(query, field_names) if field_names else query.options(joinedload(Post.author))
     
     # Keyword search (LIKE on title and content)
     if q:
@@ -570,8 +787,8 @@ async def search_posts(
     if author:
         query = query.join(Agent, Post.author_id == Agent.id).filter(Agent.name.ilike(f"%{author}%"))
     if tag:
-        # Search in JSON tags field
-        query = query.filter(Post._tags.ilike(f"%{tag}%"))
+        # Tag membership, evaluated in the database (GIN-indexed on Postgres)
+        query = query.filter(json_array_contains(db, Post.tags, tag))
     if type:
         query = query.filter(Post.type == type)
     
@@ -580,20 +797,17 @@ async def search_posts(
     # Get comment counts
     post_ids = [p.id for p in posts]
     comment_counts = {}
-    if post_ids:
+    if post_ids and (not field_names or "comment_count" in field_names):
         from sqlalchemy import func
         counts = db.query(Comment.post_id, func.count(Comment.id)).filter(
             Comment.post_id.in_(post_ids)
         ).group_by(Comment.post_id).all()
         comment_counts = {post_id: count for post_id, count in counts}
     
-    return [PostResponse(
-        id=p.id, project_id=p.project_id, author_id=p.author_id, author_name=p.author.name,
-        title=p.title, content=p.content, type=p.type, status=p.status,
-        tags=p.tags, mentions=p.mentions, pinned=(p.pin_order is not None), pin_order=p.pin_order, github_ref=p.github_ref,
-        comment_count=comment_counts.get(p.id, 0),
-        created_at=p.created_at, updated_at=p.updated_at
-    ) for p in posts]
+    if field_names:
+        return sparse_posts_response(posts, field_names, comment_counts)
+    
+    return FastJSONResponse([post_row(p, p.author.name, comment_counts.get(p.id, 0)) for p in posts])
 
 
 @app.get("/api/v1/projects/{project_id}/tags", response_model=List[str])
@@ -603,18 +817,31 @@ async def get_project_tags(project_id: str, db=Depends(get_db)):
     if not project:
         raise HTTPException(404, "Project not found")
     
-    posts = db.query(Post).filter(Post.project_id == project_id).all()
-    all_tags = set()
-    for post in posts:
-        if post.tags:
-            all_tags.update(post.tags)
-    return sorted(list(all_tags))
+    from sqlalchemy import true
+    tags = json_array_elements(db, Post.tags)
+    rows = db.query(tags.c.value).select_from(Post).join(tags, true()).filter(
+        Post.project_id == project_id
+    ).distinct().all()
+    return sorted(tag for (tag,) in rows)
+
+
+@app.get("/api/v1/projects/{project_id}/stats", response_model=ProjectStatsResponse)
+async def get_project_stats(project_id: str, days: int = 30, db=Depends(get_db)):
+    """
+    Project dashboard stats: post counts by status and type, comment total,
+    active agents, and a daily posts/comments histogram for the last `days` days (1-365).
+    
+    Served from counters maintained on each write, so cost does not grow with project size.
+    """
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(404, "Project not found")
+    return stats.get_project_stats(db, project_id, max(1, min(days, 365)))
 
 
 @app.get("/api/v1/posts/{post_id}", response_model=PostResponse)
 async def get_post(post_id: str, db=Depends(get_db)):
     """Get a post by ID."""
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post).options(joinedload(Post.author)).filter(Post.id == post_id).first()
     if not post:
         raise HTTPException(404, "Post not found")
     comment_count = db.query(Comment).filter(Comment.post_id == post_id).count()
@@ -635,13 +862,17 @@ async def update_post(post_id: str, data: PostUpdate, agent: Agent = Depends(req
         raise HTTPException(404, "Post not found")
     
     old_status = post.status
+    old_pin_order = post.pin_order
+    edited = any(v is not None for v in (data.title, data.content, data.tags))
     
     if data.title is not None:
         post.title = data.title
     if data.content is not None:
         post.content = data.content
-        raw_mentions, has_all = parse_mentions(data.content)
-        post.mentions = validate_mentions(db, raw_mentions) + (['all'] if has_all else [])
+        known, has_all = mention_index.resolve(db, data.content)
+        mentions = list(known)
+        post.mentions = mentions + (['all'] if has_all else [])
+        replace_post_mentions(db, post, [known[name] for name in mentions], agent.id)
     if data.status is not None:
         post.status = data.status
     # Handle pin_order (new) and pinned (legacy) 
@@ -653,6 +884,13 @@ async def update_post(post_id: str, data: PostUpdate, agent: Agent = Depends(req
     if data.tags is not None:
         post.tags = data.tags
     
+    if edited:
+        record_change(db, post.project_id, "post", post.id, "updated")
+    if post.status != old_status:
+        record_change(db, post.project_id, "post", post.id, "status")
+        stats.post_status_changed(db, post.project_id, old_status, post.status)
+    if post.pin_order != old_pin_order:
+        record_change(db, post.project_id, "post", post.id, "pin")
     db.commit()
     db.refresh(post)
     
@@ -683,8 +921,8 @@ async def create_comment(post_id: str, data: CommentCreate, agent: Agent = Depen
     if not post:
         raise HTTPException(404, "Post not found")
     
-    raw_mentions, has_all = parse_mentions(data.content)
-    mentions = validate_mentions(db, raw_mentions)
+    known, has_all = mention_index.resolve(db, data.content)
+    mentions = list(known)
     
     # Handle @all mention
     if has_all:
@@ -704,44 +942,374 @@ async def create_comment(post_id: str, data: CommentCreate, agent: Agent = Depen
     from datetime import datetime
     post.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(comment)
+    db.flush()
+    record_change(db, post.project_id, "comment", comment.id, "created")
+    stats.comment_created(db, post.project_id, comment)
     
     # Create individual mention notifications
     if mentions:
-        create_notifications(db, mentions, "mention", {"post_id": post_id, "comment_id": comment.id, "by": agent.name})
+        add_notifications(db, [known[name] for name in mentions], "mention", {"post_id": post_id, "comment_id": comment.id, "by": agent.name})
+        record_mentions(db, [known[name] for name in mentions], agent.id, post.project_id, post_id, comment.id)
     
     # Create @all notifications
     if has_all:
-        record_all_mention(post.project_id)
         create_all_notifications(db, post.project_id, agent.id, agent.name, post_id, comment.id)
     
-    # Notify post author
-    if post.author_id != agent.id:
-        notif = Notification(agent_id=post.author_id, type="reply")
-        notif.payload = {"post_id": post_id, "comment_id": comment.id, "by": agent.name}
-        db.add(notif)
-        db.commit()
-    
-    # Notify thread participants (excluding commenter, post author, and @mentioned)
-    create_thread_update_notifications(db, post, comment.id, agent.id, agent.name, mentions)
+    # Notify post author ('reply') and thread participants ('thread_update'), minus muted/@mentioned
+    create_thread_update_notifications(db, post, comment.id, agent.id, agent.name, list(known.values()))
     
-    await trigger_webhooks(db, post.project_id, "new_comment", {"post_id": post_id, "comment_id": comment.id, "author": agent.name})
-    
-    return CommentResponse(
+    # Build the response and webhook target before commit so nothing needs a refresh
+    project_id = post.project_id
+    response = CommentResponse(
         id=comment.id, post_id=comment.post_id, author_id=comment.author_id, author_name=agent.name,
         parent_id=comment.parent_id, content=comment.content, mentions=comment.mentions, created_at=comment.created_at
     )
+    db.commit()
+    if has_all:
+        record_all_mention(project_id)
+    
+    await trigger_webhooks(db, project_id, "new_comment", {"post_id": post_id, "comment_id": response.id, "author": agent.name})
+    
+    return response
 
 
 @app.get("/api/v1/posts/{post_id}/comments", response_model=List[CommentResponse])
 async def list_comments(post_id: str, db=Depends(get_db)):
     """List comments on a post."""
-    comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at).all()
-    return [CommentResponse(
-        id=c.id, post_id=c.post_id, author_id=c.author_id, author_name=c.author.name,
-        parent_id=c.parent_id, content=c.content, mentions=c.mentions, created_at=c.created_at
-    ) for c in comments]
+    comments = db.query(Comment).options(joinedload(Comment.author)).filter(
+        Comment.post_id == post_id
+    ).order_by(Comment.created_at).all()
+    return FastJSONResponse([comment_row(c, c.author.name) for c in comments])
+
+
+# --- Thread subscriptions ---
+
+def set_thread_state(db, post_id: str, agent_id: str, state: str) -> SubscriptionResponse:
+    if not db.query(Post.id).filter(Post.id == post_id).first():
+        raise HTTPException(404, "Post not found")
+    updated = db.query(PostParticipant).filter(
+        PostParticipant.post_id == post_id, PostParticipant.agent_id == agent_id
+    ).update({PostParticipant.state: state}, synchronize_session=False)
+    if not updated:
+        db.add(PostParticipant(post_id=post_id, agent_id=agent_id, state=state))
+    db.commit()
+    return SubscriptionResponse(post_id=post_id, state=state)
+
+
+@app.get("/api/v1/posts/{post_id}/subscription", response_model=SubscriptionResponse)
+async def get_subscription(post_id: str, agent: Agent = Depends(require_agent), db=Depends(get_db)):
+    """Your relationship to a thread: participant, subscribed, muted, or none."""
+    state = db.query(PostParticipant.state).filter(
+        PostParticipant.post_id == post_id, PostParticipant.agent_id == agent.id
+    ).scalar()
+    return SubscriptionResponse(post_id=post_id, state=state or "none")
+
+
+@app.post("/api/v1/posts/{post_id}/subscribe", response_model=SubscriptionResponse)
+async def subscribe_post(post_id: str, agent: Agent = Depends(require_agent), db=Depends(get_db)):
+    """Get thread_update notifications for a post without commenting (also unmutes)."""
+    return set_thread_state(db, post_id, agent.id, "subscribed")
+
+
+@app.post("/api/v1/posts/{post_id}/mute", response_model=SubscriptionResponse)
+async def mute_post(post_id: str, agent: Agent = Depends(require_agent), db=Depends(get_db)):
+    """Stop reply/thread_update notifications for a post (@mentions still arrive)."""
+    return set_thread_state(db, post_id, agent.id, "muted")
+
+
+@app.get("/api/v1/posts/{post_id}/comments/tree", response_model=CommentTreeResponse)
+async def list_comment_tree(
+    post_id: str,
+    parent_id: Optional[str] = None,
+    depth: int = 3,
+    limit: int = 20,
+    after: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """
+    List comments as a nested tree.
+    
+    - parent_id: subtree root (omit for top-level comments)
+    - depth: levels of nesting to return (1-10)
+    - limit: max comments per level of each subtree (1-100)
+    - after: cursor from next_cursor to page through the top level
+    
+    Nodes report reply_count / has_more_replies; load a truncated subtree
+    by calling again with parent_id set to that node.
+    """
+    from sqlalchemy import select, func, literal, or_, and_
+    
+    depth = max(1, min(depth, 10))
+    limit = max(1, min(limit, 100))
+    
+    if not db.query(Post.id).filter(Post.id == post_id).first():
+        raise HTTPException(404, "Post not found")
+    
+    # Page through the requested level
+    roots = db.query(Comment.id).filter(Comment.post_id == post_id, Comment.parent_id == parent_id)
+    if after:
+        cursor = db.query(Comment.created_at, Comment.id).filter(Comment.id == after, Comment.post_id == post_id).first()
+        if not cursor:
+            raise HTTPException(400, "Invalid cursor")
+        roots = roots.filter(or_(
+            Comment.created_at > cursor.created_at,
+            and_(Comment.created_at == cursor.created_at, Comment.id > cursor.id)
+        ))
+    root_ids = [r.id for r in roots.order_by(Comment.created_at, Comment.id).limit(limit + 1).all()]
+    next_cursor = root_ids[limit - 1] if len(root_ids) > limit else None
+    root_ids = root_ids[:limit]
+    if not root_ids:
+        return CommentTreeResponse(comments=[])
+    
+    # Walk the subtrees with one recursive CTE, keeping the first `limit` children per parent
+    tree = select(Comment.id, literal(1).label("depth")).where(Comment.id.in_(root_ids)).cte("tree", recursive=True)
+    tree = tree.union_all(
+        select(Comment.id, tree.c.depth + 1).where(Comment.parent_id == tree.c.id, tree.c.depth < depth)
+    )
+    ranked = select(
+        tree.c.id,
+        func.row_number().over(partition_by=Comment.parent_id, order_by=(Comment.created_at, Comment.id)).label("rn")
+    ).select_from(tree.join(Comment, Comment.id == tree.c.id)).subquery()
+    rows = db.query(Comment, Agent.name).join(ranked, ranked.c.id == Comment.id).join(
+        Agent, Agent.id == Comment.author_id
+    ).filter(ranked.c.rn <= limit).order_by(Comment.created_at, Comment.id).all()
+    
+    reply_counts = dict(db.query(Comment.parent_id, func.count(Comment.id)).filter(
+        Comment.parent_id.in_([c.id for c, _ in rows])
+    ).group_by(Comment.parent_id).all())
+    
+    nodes = {c.id: CommentTreeNode(
+        id=c.id, post_id=c.post_id, author_id=c.author_id, author_name=author_name,
+        parent_id=c.parent_id, content=c.content, mentions=c.mentions, created_at=c.created_at,
+        reply_count=reply_counts.get(c.id, 0)
+    ) for c, author_name in rows}
+    for c, _ in rows:
+        if c.id not in root_ids and c.parent_id in nodes:
+            nodes[c.parent_id].replies.append(nodes[c.id])
+    for node in nodes.values():
+        node.has_more_replies = node.reply_count > len(node.replies)
+    
+    return CommentTreeResponse(comments=[nodes[i] for i in root_ids], next_cursor=next_cursor)
+
+
+# --- Batch ---
+
+MAX_BATCH_ITEMS = 100
+
+
+@app.post("/api/v1/projects/{project_id}/batch", response_model=BatchResponse)
+async def create_batch(project_id: str, data: BatchCreate, agent: Agent = Depends(require_agent), db=Depends(get_db)):
+    """
+    Create many posts and/or comments in one transaction.
+    
+    All items are validated up front; either every item is written or none is.
+    Comments may target any existing post in this project.
+    """
+    if not data.posts and not data.comments:
+        raise HTTPException(400, "Batch is empty")
+    if len(data.posts) + len(data.comments) > MAX_BATCH_ITEMS:
+        raise HTTPException(400, f"Batch too large: max {MAX_BATCH_ITEMS} items")
+    
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(404, "Project not found")
+    
+    # Validate comment targets with one query per table
+    posts_by_id = {}
+    if data.comments:
+        post_ids = {c.post_id for c in data.comments}
+        posts_by_id = {p.id: p for p in db.query(Post).filter(
+            Post.id.in_(post_ids), Post.project_id == project_id
+        ).all()}
+        parent_ids = {c.parent_id for c in data.comments if c.parent_id}
+        parents = dict(db.query(Comment.id, Comment.post_id).filter(Comment.id.in_(parent_ids)).all()) if parent_ids else {}
+        for i, c in enumerate(data.comments):
+            if c.post_id not in posts_by_id:
+                raise HTTPException(400, f"comments[{i}]: Post not found in this project")
+            if c.parent_id and parents.get(c.parent_id) != c.post_id:
+                raise HTTPException(400, f"comments[{i}]: Parent comment not found on this post")
+    
+    # Resolve mentions for the whole batch at once
+    post_contents = [p.get_content() for p in data.posts]
+    parsed = [mention_index.resolve(db, text) for text in post_contents + [c.content for c in data.comments]]
+    has_all = any(all_flag for _, all_flag in parsed)
+    
+    if has_all:
+        allowed, reason = can_use_all_mention(db, agent.id, project_id)
+        if not allowed:
+            raise HTTPException(403, f"Cannot use @all: {reason}")
+        
+        rate_ok, wait_seconds = check_all_mention_rate_limit(project_id)
+        if not rate_ok:
+            raise HTTPException(429, f"@all rate limited. Try again in {wait_seconds // 60} minutes.")
+    
+    # Every item counts against the agent's rate limits (both checked before either is recorded)
+    rate_limiter.check_many(agent.id, {"post": len(data.posts), "comment": len(data.comments)})
+    
+    from datetime import datetime
+    webhook_events = []
+    
+    posts = []
+    for item, content, (known, item_all) in zip(data.posts, post_contents, parsed):
+        mentions = list(known)
+        post = Post(project_id=project_id, author_id=agent.id, title=item.title, content=content, type=item.type)
+        post.tags = item.tags
+        post.mentions = mentions + (['all'] if item_all else [])
+        db.add(post)
+        db.flush()
+        record_change(db, project_id, "post", post.id, "created")
+        stats.post_created(db, post)
+        follow_post(db, post.id, agent.id)
+        posts.append(post)
+        
+        add_notifications(db, [known[name] for name in mentions], "mention", {"post_id": post.id, "title": post.title, "by": agent.name})
+        record_mentions(db, [known[name] for name in mentions], agent.id, project_id, post.id)
+        if item_all:
+            create_all_notifications(db, project_id, agent.id, agent.name, post.id)
+        webhook_events.append(("new_post", {"post_id": post.id, "title": post.title, "author": agent.name}))
+    
+    comments = []
+    for item, (known, item_all) in zip(data.comments, parsed[len(data.posts):]):
+        mentions = list(known)
+        post = posts_by_id[item.post_id]
+        comment = Comment(post_id=post.id, author_id=agent.id, parent_id=item.parent_id, content=item.content)
+        comment.mentions = mentions + (['all'] if item_all else [])
+        db.add(comment)
+        post.updated_at = datetime.utcnow()
+        db.flush()
+        record_change(db, project_id, "comment", comment.id, "created")
+        stats.comment_created(db, project_id, comment)
+        comments.append(comment)
+        
+        add_notifications(db, [known[name] for name in mentions], "mention", {"post_id": post.id, "comment_id": comment.id, "by": agent.name})
+        record_mentions(db, [known[name] for name in mentions], agent.id, project_id, post.id, comment.id)
+        if item_all:
+            create_all_notifications(db, project_id, agent.id, agent.name, post.id, comment.id)
+        create_thread_update_notifications(db, post, comment.id, agent.id, agent.name, list(known.values()))
+        webhook_events.append(("new_comment", {"post_id": post.id, "comment_id": comment.id, "author": agent.name}))
+    
+    # Build the response before commit so the new rows need no refresh
+    response = BatchResponse(
+        posts=[PostResponse(
+            id=p.id, project_id=p.project_id, author_id=p.author_id, author_name=agent.name,
+            title=p.title, content=p.content, type=p.type, status=p.status,
+            tags=p.tags, mentions=p.mentions, pinned=(p.pin_order is not None), pin_order=p.pin_order, github_ref=p.github_ref,
+            comment_count=0,
+            created_at=p.created_at, updated_at=p.updated_at
+        ) for p in posts],
+        comments=[CommentResponse(
+            id=c.id, post_id=c.post_id, author_id=c.author_id, author_name=agent.name,
+            parent_id=c.parent_id, content=c.content, mentions=c.mentions, created_at=c.created_at
+        ) for c in comments]
+    )
+    
+    db.commit()
+    if has_all:
+        record_all_mention(project_id)
+    
+    await trigger_webhooks_batch(db, project_id, webhook_events)
+    
+    return response
+
+
+# --- Change feed ---
+
+def change_entries(db, changes: List[ProjectChange]) -> List[dict]:
+    """Change-log rows as feed entries, each with the entity's current state (one query per entity type)."""
+    from sqlalchemy import func
+    
+    ids = {"post": set(), "comment": set(), "member": set()}
+    for c in changes:
+        ids[c.entity].add(c.entity_id)
+    data = {}
+    if ids["post"]:
+        posts = db.query(Post).options(joinedload(Post.author)).filter(Post.id.in_(ids["post"])).all()
+        counts = dict(db.query(Comment.post_id, func.count(Comment.id)).filter(
+            Comment.post_id.in_(ids["post"])
+        ).group_by(Comment.post_id).all())
+        data.update({("post", p.id): post_row(p, p.author.name, counts.get(p.id, 0)) for p in posts})
+    if ids["comment"]:
+        comments = db.query(Comment).options(joinedload(Comment.author)).filter(Comment.id.in_(ids["comment"])).all()
+        data.update({("comment", c.id): comment_row(c, c.author.name) for c in comments})
+    if ids["member"]:
+        project_ids = {c.project_id for c in changes if c.entity == "member"}
+        members = db.query(ProjectMember).options(joinedload(ProjectMember.agent)).filter(
+            ProjectMember.project_id.in_(project_ids), ProjectMember.agent_id.in_(ids["member"])
+        ).all()
+        data.update({("member", m.project_id, m.agent_id): {
+            "agent_id": m.agent_id, "agent_name": m.agent.name, "role": m.role, "joined_at": m.joined_at
+        } for m in members})
+    
+    def state(c):
+        if c.entity == "member":
+            return data.get(("member", c.project_id, c.entity_id))
+        return data.get((c.entity, c.entity_id))
+    
+    return [{
+        "seq": c.seq, "project_id": c.project_id, "entity": c.entity, "entity_id": c.entity_id, "op": c.op,
+        "created_at": c.created_at, "data": state(c),
+    } for c in changes]
+
+
+@app.get("/api/v1/projects/{project_id}/changes", response_model=ChangesResponse)
+async def list_changes(project_id: str, since: int = 0, limit: int = 100, db=Depends(get_db)):
+    """
+    Incremental sync: changes to posts, comments and members after `since`.
+    
+    Start with since=0, then pass back next_since. Each entry carries the
+    entity's current state, so applying entries in order keeps a local copy
+    in sync without re-listing the project.
+    """
+    limit = max(1, min(limit, 500))
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(404, "Project not found")
+    
+    changes = db.query(ProjectChange).filter(
+        ProjectChange.project_id == project_id, ProjectChange.seq > since
+    ).order_by(ProjectChange.seq).limit(limit + 1).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    return FastJSONResponse({
+        "changes": change_entries(db, changes),
+        "next_since": changes[-1].seq if changes else since,
+        "has_more": has_more,
+    })
+
+
+@app.get("/api/v1/feed", response_model=FeedResponse)
+async def get_feed(
+    before: Optional[int] = None,
+    limit: int = 50,
+    agent: Agent = Depends(require_agent),
+    db=Depends(get_db)
+):
+    """
+    Recent activity across all of your projects, newest first.
+    
+    Page back with before=<next_cursor>. Pages are cached per agent for
+    FEED_CACHE_TTL seconds, so the newest entries may lag by that much.
+    """
+    limit = max(1, min(limit, 100))
+    key = (agent.id, before, limit)
+    cached = feed_cache.get(key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+    
+    project_ids = db.query(ProjectMember.project_id).filter(ProjectMember.agent_id == agent.id).subquery()
+    query = db.query(ProjectChange).filter(ProjectChange.project_id.in_(project_ids.select()))
+    if before is not None:
+        query = query.filter(ProjectChange.seq < before)
+    changes = query.order_by(ProjectChange.seq.desc()).limit(limit + 1).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    body = dumps({
+        "items": change_entries(db, changes),
+        "next_cursor": changes[-1].seq if has_more else None,
+    })
+    feed_cache.set(key, body)
+    return Response(body, media_type="application/json")
 
 
 # --- Webhooks ---
@@ -788,8 +1356,18 @@ async def list_notifications(unread_only: bool = False, agent: Agent = Depends(r
     query = db.query(Notification).filter(Notification.agent_id == agent.id)
     if unread_only:
         query = query.filter(Notification.read == False)
-    notifications = query.order_by(Notification.created_at.desc()).limit(50).all()
-    return [NotificationResponse(id=n.id, type=n.type, payload=n.payload, read=n.read, created_at=n.created_at) for n in notifications]
+    notifications = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(50).all()
+    return FastJSONResponse([notification_row(n) for n in notifications])
+
+
+@app.get("/api/v1/notifications/unread-count", response_model=UnreadCountResponse)
+async def unread_count(agent: Agent = Depends(require_agent), db=Depends(get_db)):
+    """Get unread notification counts by type (served from materialized counters)."""
+    counters = db.query(NotificationCounter.type, NotificationCounter.unread).filter(
+        NotificationCounter.agent_id == agent.id
+    ).all()
+    by_type = {notif_type: unread for notif_type, unread in counters if unread > 0}
+    return UnreadCountResponse(total=sum(by_type.values()), by_type=by_type)
 
 
 @app.post("/api/v1/notifications/{notification_id}/read")
@@ -798,15 +1376,58 @@ async def mark_read(notification_id: str, agent: Agent = Depends(require_agent),
     notif = db.query(Notification).filter(Notification.id == notification_id, Notification.agent_id == agent.id).first()
     if not notif:
         raise HTTPException(404, "Notification not found")
-    notif.read = True
+    if not notif.read:
+        notif.read = True
+        bump_unread_count(db, agent.id, notif.type, -1)
     db.commit()
     return {"status": "read"}
 
 
+@app.post("/api/v1/notifications/read")
+async def mark_read_bulk(data: NotificationBulkRead, agent: Agent = Depends(require_agent), db=Depends(get_db)):
+    """
+    Mark many notifications as read in a single UPDATE.
+    
+    - ids: explicit notification IDs
+    - up_to: a notification ID; it and everything listed after it (older) are marked read.
+      Ties on created_at (one fan-out) are broken by id, as in the listing.
+    """
+    if not data.ids and not data.up_to:
+        raise HTTPException(400, "Provide ids or up_to")
+    
+    from sqlalchemy import and_, func, or_
+    conditions = []
+    if data.ids:
+        conditions.append(Notification.id.in_(data.ids))
+    if data.up_to:
+        cursor = db.query(Notification.created_at, Notification.id).filter(
+            Notification.id == data.up_to, Notification.agent_id == agent.id
+        ).first()
+        if not cursor:
+            raise HTTPException(404, "Notification not found")
+        conditions.append(or_(
+            Notification.created_at < cursor.created_at,
+            and_(Notification.created_at == cursor.created_at, Notification.id <= cursor.id)
+        ))
+    
+    query = db.query(Notification).filter(
+        Notification.agent_id == agent.id,
+        Notification.read == False,
+        or_(*conditions)
+    )
+    by_type = query.with_entities(Notification.type, func.count(Notification.id)).group_by(Notification.type).all()
+    updated = query.update({Notification.read: True}, synchronize_session=False)
+    for notif_type, count in by_type:
+        bump_unread_count(db, agent.id, notif_type, -count)
+    db.commit()
+    return {"status": "read", "updated": updated}
+
+
 @app.post("/api/v1/notifications/read-all")
 async def mark_all_read(agent: Agent = Depends(require_agent), db=Depends(get_db)):
     """Mark all notifications as read."""
     db.query(Notification).filter(Notification.agent_id == agent.id, Notification.read == False).update({Notification.read: True})
+    db.query(NotificationCounter).filter(NotificationCounter.agent_id == agent.id).update({NotificationCounter.unread: 0})
     db.commit()
     return {"status": "all read"}
 
@@ -816,16 +1437,31 @@ async def mark_all_read(agent: Agent = Depends(require_agent), db=Depends(get_db
 SYSTEM_AGENT_NAME = "GitHubBot"  # System agent for GitHub-created posts
 
 def get_or_create_system_agent(db) -> Agent:
-    """Get or create the system agent for GitHub posts."""
+    """Get or create the system agent for GitHub posts (safe if another process creates it concurrently)."""
+    from sqlalchemy.exc import IntegrityError
+    
     agent = db.query(Agent).filter(Agent.name == SYSTEM_AGENT_NAME).first()
     if not agent:
-        agent = Agent(name=SYSTEM_AGENT_NAME)
-        db.add(agent)
-        db.commit()
-        db.refresh(agent)
+        try:
+            agent = Agent(name=SYSTEM_AGENT_NAME)
+            db.add(agent)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            agent = db.query(Agent).filter(Agent.name == SYSTEM_AGENT_NAME).one()
     return agent
 
 
+def resolve_system_agent() -> SystemAgent:
+    """Look up (or create) the system agent once, at startup."""
+    db = SessionLocal()
+    try:
+        agent = get_or_create_system_agent(db)
+        return SystemAgent(agent.id, agent.name)
+    finally:
+        db.close()
+
+
 @app.post("/api/v1/projects/{project_id}/github-webhook", response_model=GitHubWebhookResponse)
 async def create_github_webhook(
     project_id: str,
@@ -852,6 +1488,7 @@ async def create_github_webhook(
     db.add(config)
     db.commit()
     db.refresh(config)
+    invalidate_webhook_config(project_id)
     
     return GitHubWebhookResponse(
         id=config.id,
@@ -886,12 +1523,13 @@ async def delete_github_webhook(project_id: str, agent: Agent = Depends(require_
         raise HTTPException(404, "GitHub webhook not configured")
     db.delete(config)
     db.commit()
+    invalidate_webhook_config(project_id)
     return {"status": "deleted"}
 
 
 from fastapi import Request
 
-@app.post("/api/v1/github-webhook/{project_id}")
+@app.post("/api/v1/github-webhook/{project_id}", status_code=202)
 async def receive_github_webhook(project_id: str, request: Request, db=Depends(get_db)):
     """
     Receive GitHub webhook events.
@@ -900,12 +1538,16 @@ async def receive_github_webhook(project_id: str, request: Request, db=Depends(g
     POST https://your-minibook-host/api/v1/github-webhook/{project_id}
     
     Set content type to application/json and provide your secret.
+    
+    The verified delivery is stored and acknowledged with 202 right away;
+    posts and comments are created by the background delivery worker.
+    Redeliveries (same X-GitHub-Delivery) are acknowledged without
+    being processed again.
     """
-    # Get config
-    config = db.query(GitHubWebhook).filter(
-        GitHubWebhook.project_id == project_id,
-        GitHubWebhook.active == True
-    ).first()
+    from sqlalchemy.exc import IntegrityError
+    
+    # Get config (cached in-process; invalidated on create/delete)
+    config = get_webhook_config(db, project_id)
     if not config:
         raise HTTPException(404, "GitHub webhook not configured for this project")
     
@@ -926,17 +1568,27 @@ async def receive_github_webhook(project_id: str, request: Request, db=Depends(g
         payload = await request.json()
     except Exception:
         raise HTTPException(400, "Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(400, "Invalid JSON payload")
     
-    # Get or create system agent
-    system_agent = get_or_create_system_agent(db)
+    from .models import generate_id
+    delivery_id = request.headers.get("X-GitHub-Delivery") or generate_id()
     
-    # Process the event
-    result = process_github_event(db, config, event_type, payload, system_agent)
+    # The only statement on this path: the unique index rejects redeliveries
+    delivery = GitHubDelivery(project_id=project_id, delivery_id=delivery_id, event_type=event_type,
+                              payload=body.decode("utf-8"))
+    db.add(delivery)
+    try:
+        db.flush()
+        queued_id = delivery.id
+        db.commit()
+    except IntegrityError:
+        # Already stored (GitHub redelivery)
+        db.rollback()
+        return JSONResponse({"status": "duplicate", "delivery_id": delivery_id}, status_code=200)
     
-    if result:
-        return {"status": "processed", **result}
-    else:
-        return {"status": "skipped", "reason": "Event filtered or not applicable"}
+    delivery_worker.enqueue(queued_id)
+    return {"status": "queued", "delivery_id": delivery_id}
 
 
 # --- Role Descriptions ---
@@ -1020,10 +1672,13 @@ async def set_plan(
     
     if plan:
         # Update existing
+        if plan.pin_order != 0:
+            record_change(db, project_id, "post", plan.id, "pin")
         plan.title = title
         plan.content = content
         plan.pin_order = 0  # Plans are always pinned at top
         plan.author_id = author.id  # Update author to whoever edited it
+        record_change(db, project_id, "post", plan.id, "updated")
     else:
         # Create new
         plan = Post(
@@ -1035,6 +1690,10 @@ async def set_plan(
             pin_order=0  # Plans are always pinned at top
         )
         db.add(plan)
+        db.flush()
+        record_change(db, project_id, "post", plan.id, "created")
+        stats.post_created(db, plan)
+        follow_post(db, plan.id, author.id)
     
     db.commit()
     db.refresh(plan)
@@ -1053,7 +1712,7 @@ async def set_plan(
 @app.get("/api/v1/admin/projects", response_model=List[ProjectResponse])
 async def admin_list_projects(_: bool = Depends(require_admin), db=Depends(get_db)):
     """List all projects (admin only)."""
-    projects = db.query(Project).all()
+    projects = db.query(Project).options(joinedload(Project.primary_lead)).all()
     return [ProjectResponse(
         id=p.id, name=p.name, description=p.description,
         primary_lead_agent_id=p.primary_lead_agent_id,
@@ -1115,7 +1774,9 @@ async def admin_update_project(
 @app.get("/api/v1/admin/projects/{project_id}/members", response_model=List[MemberResponse])
 async def admin_list_members(project_id: str, _: bool = Depends(require_admin), db=Depends(get_db)):
     """List project members (admin only)."""
-    members = db.query(ProjectMember).filter(ProjectMember.project_id == project_id).all()
+    members = db.query(ProjectMember).options(joinedload(ProjectMember.agent)).filter(
+        ProjectMember.project_id == project_id
+    ).all()
     return [MemberResponse(
         agent_id=m.agent_id, 
         agent_name=m.agent.name, 
@@ -1143,6 +1804,7 @@ async def admin_update_member_role(
         raise HTTPException(404, "Member not found in this project")
     
     member.role = data.role
+    record_change(db, project_id, "member", agent_id, "role")
     db.commit()
     db.refresh(member)
     
@@ -1183,7 +1845,9 @@ async def admin_remove_member(
         )
     
     db.delete(member)
+    record_change(db, project_id, "member", agent_id, "removed")
     db.commit()
+    feed_cache.invalidate(agent_id)
     
     return {"status": "removed", "agent_id": agent_id, "project_id": project_id}
 
@@ -1198,6 +1862,79 @@ async def admin_list_agents(_: bool = Depends(require_admin), db=Depends(get_db)
     ) for a in agents]
 
 
+def github_delivery_response(d: GitHubDelivery) -> GitHubDeliveryResponse:
+    return GitHubDeliveryResponse(
+        id=d.id, project_id=d.project_id, delivery_id=d.delivery_id, event_type=d.event_type,
+        status=d.status, attempts=d.attempts, error=d.error, result=d.result,
+        received_at=d.received_at, processed_at=d.processed_at
+    )
+
+
+@app.get("/api/v1/admin/github-deliveries", response_model=List[GitHubDeliveryResponse])
+async def admin_list_github_deliveries(
+    status: Optional[str] = None,
+    project_id: Optional[str] = None,
+    limit: int = 50,
+    _: bool = Depends(require_admin),
+    db=Depends(get_db)
+):
+    """List recent GitHub webhook deliveries, newest first (admin only). Filter with status=failed to find replay candidates."""
+    query = db.query(GitHubDelivery).options(load_only(
+        GitHubDelivery.id, GitHubDelivery.project_id, GitHubDelivery.delivery_id, GitHubDelivery.event_type,
+        GitHubDelivery.status, GitHubDelivery.attempts, GitHubDelivery.error, GitHubDelivery.result,
+        GitHubDelivery.received_at, GitHubDelivery.processed_at
+    ))
+    if status:
+        query = query.filter(GitHubDelivery.status == status)
+    if project_id:
+        query = query.filter(GitHubDelivery.project_id == project_id)
+    deliveries = query.order_by(GitHubDelivery.received_at.desc()).limit(max(1, min(limit, 200))).all()
+    return [github_delivery_response(d) for d in deliveries]
+
+
+@app.post("/api/v1/admin/github-deliveries/{delivery_id}/replay", response_model=GitHubDeliveryResponse, status_code=202)
+async def admin_replay_github_delivery(delivery_id: str, _: bool = Depends(require_admin), db=Depends(get_db)):
+    """Queue a stored delivery for processing again (admin only), e.g. after fixing the cause of a failure."""
+    delivery = db.query(GitHubDelivery).filter(GitHubDelivery.id == delivery_id).first()
+    if not delivery:
+        raise HTTPException(404, "Delivery not found")
+    if delivery.status in ("pending", "processing"):
+        raise HTTPException(409, "Delivery is already queued")
+    
+    delivery.status = "pending"
+    delivery.attempts = 0
+    delivery.error = None
+    response = github_delivery_response(delivery)
+    db.commit()
+    delivery_worker.enqueue(delivery_id)
+    return response
+
+
+@app.post("/api/v1/admin/profile", response_class=PlainTextResponse)
+async def admin_profile(seconds: float = 10, interval_ms: float = 5, _: bool = Depends(require_admin)):
+    """
+    Sample every thread's stack for `seconds` (max 120) and return collapsed
+    stacks ("a;b;c count" lines) for flamegraph.pl / speedscope (admin only).
+    """
+    import asyncio
+    
+    if profiler.sampler.running:
+        raise HTTPException(409, "A profile is already running")
+    seconds = max(0.1, min(seconds, profiler.StackSampler.MAX_SECONDS))
+    interval = max(1, min(interval_ms, 1000)) / 1000
+    try:
+        collapsed = await asyncio.to_thread(profiler.sampler.run, seconds, interval)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+    return PlainTextResponse(collapsed)
+
+
+@app.get("/api/v1/admin/profile/routes")
+async def admin_profile_routes(_: bool = Depends(require_admin)):
+    """Cumulative event-loop CPU and wall time per route since startup, most CPU first (admin only)."""
+    return profiler.route_cpu_report()
+
+
 # --- Run ---
 
 def run():
@@ -0,0 +1,170 @@
+"""
+@mention extraction against the set of registered agent names.
+
+Bodies are scanned once: fenced and inline code are skipped, an "@" only
+starts a mention at a word boundary (so emails don't count), and names
+are matched against an in-memory index of known agents. Only real agents
+come out, already resolved to ids.
+
+The index is per process: loaded at startup and reloaded in the
+background every RELOAD_INTERVAL seconds, with agents registered here
+added immediately. A plain @name (word characters and dashes) that misses
+the index may belong to an agent another worker just registered, so it is
+looked up once in the agents table (one IN query for all of a body's
+misses); names that turn out not to exist are remembered until the next
+reload, so a PR body full of `@decorators` queries for each of them at
+most once per interval. Names with other characters registered elsewhere
+are only picked up by the reload.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from typing import Callable, Dict, Tuple
+
+from .models import Agent
+
+logger = logging.getLogger(__name__)
+
+# Markdown code: ``` / ~~~ fences (to the closing fence or end of text) and `inline` spans.
+# Both start with a literal so the regex engine can skip ahead to candidates.
+_FENCE = re.compile(r"\n[ \t]{0,3}(`{3,}|~{3,})[^\n]*\n.*?(?:\n[ \t]{0,3}\1[ \t]*(?=\n|\Z)|\Z)", re.DOTALL)
+_INLINE = re.compile(r"`(`*)(?!`).+?(?<!`)`\1(?!`)", re.DOTALL)
+_MENTION = re.compile(r"@(?<![\w@-]@)([\w-]+)")  # "@" not preceded by a word char, so emails don't match
+_NAME = re.compile(r"[\w-]+")
+_END = ""  # Trie key marking the end of a name; its value is the agent id
+
+
+def strip_code(text: str) -> str:
+    """Blank out fenced code blocks and inline code spans."""
+    if "```" in text or "~~~" in text:
+        text = _FENCE.sub("\n", "\n" + text)[1:]
+    if "`" in text:
+        text = _INLINE.sub(" ", text)
+    return text
+
+
+class MentionIndex:
+    """
+    Registered agent names -> ids.
+
+    Plain names (word characters and dashes) are matched by a dict lookup
+    on each @token. Names with other characters ("Alice Smith", "bot.v2")
+    go into a character trie, walked only when a token equals the first
+    word of such a name; the longest registered name wins.
+    """
+
+    RELOAD_INTERVAL = 60.0  # seconds; bounds how stale names registered by other workers can be
+    MAX_ABSENT = 10_000  # remembered unknown names, forgotten at each reload (or when full)
+
+    def __init__(self):
+        self._names: Dict[str, str] = {}
+        self._trie: dict = {}
+        self._heads: set = set()  # First words of the names in the trie
+        self._absent: set = set()  # Plain @tokens looked up since the last load and not found
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _insert(self, names: dict, trie: dict, heads: set, name: str, agent_id: str) -> None:
+        names[name] = agent_id
+        if _NAME.fullmatch(name):
+            return
+        node = trie
+        for ch in name:
+            node = node.setdefault(ch, {})
+        node[_END] = agent_id
+        head = _NAME.match(name)
+        if head:
+            heads.add(head.group())
+
+    def add(self, name: str, agent_id: str) -> None:
+        with self._lock:
+            self._insert(self._names, self._trie, self._heads, name, agent_id)
+            self._absent.discard(name)
+
+    def load(self, db) -> None:
+        """Rebuild the index from the agents table."""
+        names, trie, heads = {}, {}, set()
+        for name, agent_id in db.query(Agent.name, Agent.id).all():
+            self._insert(names, trie, heads, name, agent_id)
+        with self._lock:
+            self._names, self._trie, self._heads = names, trie, heads
+            self._absent = set()
+            self._loaded = True
+
+    async def reload_periodically(self, load: Callable[[], None]) -> None:
+        """Call `load` every RELOAD_INTERVAL seconds in a thread, off the request path (run as a task)."""
+        while True:
+            await asyncio.sleep(self.RELOAD_INTERVAL)
+            try:
+                await asyncio.to_thread(load)
+            except Exception:
+                logger.exception("Reloading the mention index failed")
+
+    def _walk(self, text: str, start: int):
+        """Longest trie name starting at text[start] that ends at a word boundary, as (end, agent_id)."""
+        node, i, n, match = self._trie, start, len(text), None
+        while i < n and text[i] in node:
+            node = node[text[i]]
+            i += 1
+            if _END in node and (i == n or not _NAME.match(text[i])):
+                match = (i, node[_END])
+        return match
+
+    def _scan(self, text: str) -> Tuple[Dict[str, str], bool, list]:
+        """find(), plus the plain @tokens that are not in the index."""
+        found: Dict[str, str] = {}
+        has_all = False
+        misses: list = []
+        if "@" not in text:
+            return found, has_all, misses
+        text = strip_code(text)
+        names, heads = self._names, self._heads
+        for m in _MENTION.finditer(text):
+            token = m.group(1)
+            if token == "all":
+                has_all = True
+                continue
+            if token in heads:
+                match = self._walk(text, m.start(1))
+                if match:
+                    found.setdefault(text[m.start(1):match[0]], match[1])
+                    continue
+            if token.lower() == "all":
+                continue
+            agent_id = names.get(token)
+            if agent_id:
+                found.setdefault(token, agent_id)
+            else:
+                misses.append(token)
+        return found, has_all, misses
+
+    def find(self, text: str) -> Tuple[Dict[str, str], bool]:
+        """
+        Return ({name: agent_id} in order of first mention, has_all) for indexed agents only.
+        Does not touch the database; request handlers use resolve().
+        """
+        found, has_all, _ = self._scan(text)
+        return found, has_all
+
+    def resolve(self, db, text: str) -> Tuple[Dict[str, str], bool]:
+        """find(), looking up plain names the index doesn't know and hasn't looked up since the last load."""
+        if not self._loaded and "@" in text:
+            self.load(db)  # Used without the app's startup (scripts)
+        found, has_all, misses = self._scan(text)
+        unknown = set(misses) - self._absent
+        if unknown:
+            rows = db.query(Agent.name, Agent.id).filter(Agent.name.in_(unknown)).all()
+            with self._lock:
+                if len(self._absent) + len(unknown) > self.MAX_ABSENT:
+                    self._absent = set()
+                self._absent |= unknown - {name for name, _ in rows}
+            if rows:  # registered by another worker since the last load
+                for name, agent_id in rows:
+                    self.add(name, agent_id)
+                found, has_all, _ = self._scan(text)
+        return found, has_all
+
+
+mention_index = MentionIndex()
@@ -0,0 +1,200 @@
+"""
+In-process Prometheus metrics.
+
+A minimal registry of counters and histograms rendered in the Prometheus
+text exposition format at GET /metrics, so any Prometheus-compatible
+scraper works without a client library or sidecar. Values are per worker
+process (scrape each worker, or run one).
+
+Sources:
+  - MetricsMiddleware: request count and latency per route template, and
+    SQL statements / SQL time per request
+  - record_statement (from instrumentation.instrument_engine) and
+    instrument_sessions: SQL statement counts and connection checkout wait
+  - direct calls from the webhook sender, rate limiter and notification helpers
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._values.get(labels)
+        return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, hits in zip(self.buckets, series):
+                    cumulative += hits
+                    le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, _INF)} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.counter(
+    "minibook_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+http_latency = REGISTRY.histogram(
+    "minibook_http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+request_statements = REGISTRY.histogram(
+    "minibook_db_statements_per_request", "SQL statements executed per HTTP request.", ("method", "route"), COUNT_BUCKETS)
+request_db_time = REGISTRY.histogram(
+    "minibook_db_time_per_request_seconds", "Time spent executing SQL per HTTP request.", ("method", "route"))
+db_statements = REGISTRY.counter(
+    "minibook_db_statements_total", "SQL statements executed (including background work).")
+db_checkout_wait = REGISTRY.histogram(
+    "minibook_db_connection_checkout_seconds", "Time a session waited for a pooled connection.")
+webhook_latency = REGISTRY.histogram(
+    "minibook_webhook_delivery_duration_seconds", "Outbound webhook delivery latency.", ("event",))
+webhook_failures = REGISTRY.counter(
+    "minibook_webhook_delivery_failures_total", "Outbound webhook deliveries that errored or got a 4xx/5xx.", ("event",))
+ratelimit_rejections = REGISTRY.counter(
+    "minibook_ratelimit_rejections_total", "Requests rejected by the rate limiter.", ("action",))
+notification_fanout = REGISTRY.histogram(
+    "minibook_notification_fanout_size", "Recipients per notification fan-out.", ("type",), COUNT_BUCKETS)
+
+# [statements, seconds] for the HTTP request being handled, if any
+_request_sql: ContextVar[Optional[list]] = ContextVar("minibook_request_sql", default=None)
+
+
+def record_statement(seconds: float) -> None:
+    """Count one SQL statement (called by the shared engine hook in instrumentation.py)."""
+    db_statements.inc()
+    current = _request_sql.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += seconds
+
+
+def instrument_sessions(session_factory) -> None:
+    """Time how long sessions made by `session_factory` wait to get a connection."""
+    @event.listens_for(session_factory, "after_transaction_create")
+    def after_transaction_create(session, transaction):
+        if transaction.parent is None:
+            session.info["metrics_checkout_start"] = time.perf_counter()
+
+    @event.listens_for(session_factory, "after_begin")
+    def after_begin(session, transaction, connection):
+        start = session.info.pop("metrics_checkout_start", None)
+        if start is not None:
+            db_checkout_wait.observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_sql.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"  # template, not the raw path
+            http_requests.inc(scope["method"], route, str(status[0]))
+            http_latency.observe(elapsed, scope["method"], route)
+            request_statements.observe(sql[0], scope["method"], route)
+            request_db_time.observe(sql[1], scope["method"], route)
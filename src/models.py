@@ -42,6 +42,17 @@ Comment
 ├── mentions[]
 └── created_at
 
+PostParticipant (thread followers for fan-out)
+├── post_id
+├── agent_id
+└── state (participant/subscribed/muted)
+
+Mention (normalized @mentions, for "mentions of me")
+├── agent_id
+├── author_id
+├── project_id / post_id / comment_id
+└── created_at
+
 Webhook
 ├── id
 ├── project_id
@@ -49,6 +60,14 @@ Webhook
 ├── events[] (new_post/new_comment/status_change/mention)
 └── active
 
+GitHubDelivery (async webhook ingestion queue)
+├── delivery_id (X-GitHub-Delivery)
+├── event_type
+├── payload (raw body)
+├── status / attempts / error
+├── claimed_at (lease of the worker processing it)
+└── received_at / processed_at
+
 Notification
 ├── id
 ├── agent_id
@@ -56,18 +75,64 @@ Notification
 ├── payload
 ├── read
 └── created_at
+
+NotificationCounter (materialized unread counts)
+├── agent_id
+├── type
+└── unread
+
+ProjectChange (append-only change log for incremental sync)
+├── seq (monotonic)
+├── project_id
+├── entity (post/comment/member)
+├── entity_id
+├── op (created/updated/status/pin/joined/role/removed)
+└── created_at
+
+ProjectStat / ProjectActivity / ProjectAgentActivity (incremental dashboard aggregates)
+├── counters by (metric, key): posts by status/type, comment total
+├── posts/comments per UTC day
+└── last activity per agent
 """
 
+import os
+import threading
+import time
 import uuid
-import json
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Integer
-from sqlalchemy.orm import relationship
-from .database import Base
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Integer, Index
+from sqlalchemy.orm import relationship, query_expression
+from .database import Base, IDType, JSONType
+
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)  # (ms, 12-bit sequence)
+
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit ms timestamp, 12-bit sequence, 62 random bits.
+
+    New rows land at the right edge of primary-key and foreign-key indexes
+    instead of at random pages, and id order follows creation order (the
+    sequence keeps ids generated within one millisecond in order too).
+    """
+    global _uuid7_last
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        last_ms, seq = _uuid7_last
+        if ms <= last_ms:
+            ms, seq = last_ms, seq + 1
+            if seq > 0xFFF:  # sequence exhausted: borrow the next millisecond
+                ms, seq = ms + 1, 0
+        else:
+            seq = 0
+        _uuid7_last = (ms, seq)
+    rand = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(int=(ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | seq << 64 | 0x2 << 62 | rand)
 
 
 def generate_id():
-    return str(uuid.uuid4())
+    return str(uuid7())
 
 
 def generate_api_key():
@@ -78,7 +143,7 @@ class Agent(Base):
     """Global agent identity."""
     __tablename__ = "agents"
     
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(IDType, primary_key=True, default=generate_id)
     name = Column(String, nullable=False, unique=True)
     api_key = Column(String, nullable=False, unique=True, default=generate_api_key)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -99,34 +164,26 @@ class Project(Base):
     """A project workspace for agent collaboration."""
     __tablename__ = "projects"
     
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(IDType, primary_key=True, default=generate_id)
     name = Column(String, nullable=False, unique=True)
     description = Column(Text, default="")
-    primary_lead_agent_id = Column(String, ForeignKey("agents.id"), nullable=True)
-    _role_descriptions = Column("role_descriptions", Text, default="{}")  # JSON: {"Lead": "desc", ...}
+    primary_lead_agent_id = Column(IDType, ForeignKey("agents.id"), nullable=True)
+    role_descriptions = Column(JSONType, default=dict)  # {"Lead": "desc", ...}
     created_at = Column(DateTime, default=datetime.utcnow)
     
     members = relationship("ProjectMember", back_populates="project")
     posts = relationship("Post", back_populates="project")
     webhooks = relationship("Webhook", back_populates="project")
     primary_lead = relationship("Agent", foreign_keys=[primary_lead_agent_id])
-    
-    @property
-    def role_descriptions(self):
-        return json.loads(self._role_descriptions) if self._role_descriptions else {}
-    
-    @role_descriptions.setter
-    def role_descriptions(self, value):
-        self._role_descriptions = json.dumps(value)
 
 
 class ProjectMember(Base):
     """Agent membership in a project with role (free text)."""
     __tablename__ = "project_members"
     
-    id = Column(String, primary_key=True, default=generate_id)
-    agent_id = Column(String, ForeignKey("agents.id"), nullable=False)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    id = Column(IDType, primary_key=True, default=generate_id)
+    agent_id = Column(IDType, ForeignKey("agents.id"), nullable=False)
+    project_id = Column(IDType, ForeignKey("projects.id"), nullable=False)
     role = Column(String, default="member")  # Free text: developer, reviewer, lead, security-auditor, etc.
     joined_at = Column(DateTime, default=datetime.utcnow)
     
@@ -138,136 +195,210 @@ class Post(Base):
     """A discussion post in a project."""
     __tablename__ = "posts"
     
-    id = Column(String, primary_key=True, default=generate_id)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
-    author_id = Column(String, ForeignKey("agents.id"), nullable=False)
+    id = Column(IDType, primary_key=True, default=generate_id)
+    project_id = Column(IDType, ForeignKey("projects.id"), nullable=False)
+    author_id = Column(IDType, ForeignKey("agents.id"), nullable=False)
     title = Column(String, nullable=False)
     content = Column(Text, default="")
     type = Column(String, default="discussion")  # Free text: discussion, review, question, announcement, etc.
     status = Column(String, default="open")  # open, resolved, closed
-    _tags = Column("tags", Text, default="[]")
-    _mentions = Column("mentions", Text, default="[]")
+    tags = Column(JSONType, default=list)
+    mentions = Column(JSONType, default=list)
     pin_order = Column(Integer, nullable=True)  # null = not pinned, lower number = higher priority
     github_ref = Column(String, nullable=True, index=True)  # GitHub PR/Issue URL for deduplication
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    content_preview = query_expression()  # Truncated content, populated only by sparse listings
     
     project = relationship("Project", back_populates="posts")
     author = relationship("Agent")
     comments = relationship("Comment", back_populates="post")
     
-    @property
-    def tags(self):
-        return json.loads(self._tags) if self._tags else []
-    
-    @tags.setter
-    def tags(self, value):
-        self._tags = json.dumps(value)
-    
-    @property
-    def mentions(self):
-        return json.loads(self._mentions) if self._mentions else []
-    
-    @mentions.setter
-    def mentions(self, value):
-        self._mentions = json.dumps(value)
+    __table_args__ = (
+        Index("ix_posts_tags_gin", "tags", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
 
 class Comment(Base):
     """A comment on a post with nested reply support."""
     __tablename__ = "comments"
     
-    id = Column(String, primary_key=True, default=generate_id)
-    post_id = Column(String, ForeignKey("posts.id"), nullable=False)
-    author_id = Column(String, ForeignKey("agents.id"), nullable=False)
-    parent_id = Column(String, ForeignKey("comments.id"), nullable=True)
+    id = Column(IDType, primary_key=True, default=generate_id)
+    post_id = Column(IDType, ForeignKey("posts.id"), nullable=False, index=True)
+    author_id = Column(IDType, ForeignKey("agents.id"), nullable=False)
+    parent_id = Column(IDType, ForeignKey("comments.id"), nullable=True, index=True)
     content = Column(Text, nullable=False)
-    _mentions = Column("mentions", Text, default="[]")
+    mentions = Column(JSONType, default=list)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     post = relationship("Post", back_populates="comments")
     author = relationship("Agent")
     parent = relationship("Comment", remote_side=[id], backref="replies")
+
+
+class PostParticipant(Base):
+    """An agent following a post's thread: its author, commenters, or explicit subscribers.
+
+    Drives thread_update/reply fan-out; state "muted" opts out of both.
+    """
+    __tablename__ = "post_participants"
     
-    @property
-    def mentions(self):
-        return json.loads(self._mentions) if self._mentions else []
+    post_id = Column(IDType, ForeignKey("posts.id"), primary_key=True)
+    agent_id = Column(IDType, ForeignKey("agents.id"), primary_key=True)
+    state = Column(String, nullable=False, default="participant")  # participant, subscribed, muted
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Mention(Base):
+    """One @mention of an agent in a post or comment (explicit names only, not @all)."""
+    __tablename__ = "mentions"
+    
+    id = Column(IDType, primary_key=True, default=generate_id)  # Time-ordered; used as the page cursor
+    agent_id = Column(IDType, ForeignKey("agents.id"), nullable=False)  # Who was mentioned
+    author_id = Column(IDType, ForeignKey("agents.id"), nullable=False)  # Who mentioned them
+    project_id = Column(IDType, ForeignKey("projects.id"), nullable=False)
+    post_id = Column(IDType, ForeignKey("posts.id"), nullable=False)
+    comment_id = Column(IDType, ForeignKey("comments.id"), nullable=True)  # Null = in the post body
+    created_at = Column(DateTime, default=datetime.utcnow)
     
-    @mentions.setter
-    def mentions(self, value):
-        self._mentions = json.dumps(value)
+    __table_args__ = (
+        Index("ix_mentions_agent_id", "agent_id", "id"),
+        Index("ix_mentions_post_id", "post_id"),
+    )
 
 
 class Webhook(Base):
     """Webhook configuration for project events."""
     __tablename__ = "webhooks"
     
-    id = Column(String, primary_key=True, default=generate_id)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    id = Column(IDType, primary_key=True, default=generate_id)
+    project_id = Column(IDType, ForeignKey("projects.id"), nullable=False)
     url = Column(String, nullable=False)
-    _events = Column("events", Text, default='["new_post","new_comment","status_change","mention"]')
+    events = Column(JSONType, default=lambda: ["new_post", "new_comment", "status_change", "mention"])
     active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     project = relationship("Project", back_populates="webhooks")
-    
-    @property
-    def events(self):
-        return json.loads(self._events) if self._events else []
-    
-    @events.setter
-    def events(self, value):
-        self._events = json.dumps(value)
 
 
 class GitHubWebhook(Base):
     """GitHub webhook configuration for a project."""
     __tablename__ = "github_webhooks"
     
-    id = Column(String, primary_key=True, default=generate_id)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False, unique=True)
+    id = Column(IDType, primary_key=True, default=generate_id)
+    project_id = Column(IDType, ForeignKey("projects.id"), nullable=False, unique=True)
     secret = Column(String, nullable=False)  # For verifying X-Hub-Signature-256
-    _events = Column("events", Text, default='["pull_request","issues","push"]')  # GitHub event types to handle
-    _labels = Column("labels", Text, default='[]')  # Only handle PRs/issues with these labels (empty = all)
+    events = Column(JSONType, default=lambda: ["pull_request", "issues", "push"])  # GitHub event types to handle
+    labels = Column(JSONType, default=list)  # Only handle PRs/issues with these labels (empty = all)
     active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     project = relationship("Project")
-    
-    @property
-    def events(self):
-        return json.loads(self._events) if self._events else []
-    
-    @events.setter
-    def events(self, value):
-        self._events = json.dumps(value)
-    
-    @property
-    def labels(self):
-        return json.loads(self._labels) if self._labels else []
-    
-    @labels.setter
-    def labels(self, value):
-        self._labels = json.dumps(value)
+
+
+class GitHubDelivery(Base):
+    """A verified GitHub webhook delivery, queued for background processing."""
+    __tablename__ = "github_deliveries"
+    
+    id = Column(IDType, primary_key=True, default=generate_id)
+    project_id = Column(IDType, ForeignKey("projects.id"), nullable=False)
+    delivery_id = Column(String, nullable=False)  # X-GitHub-Delivery (reused by GitHub redeliveries)
+    event_type = Column(String, nullable=False)  # X-GitHub-Event
+    payload = Column(Text, nullable=False)  # Raw request body, replayed as-is
+    status = Column(String, nullable=False, default="pending")  # pending, processing, processed, skipped, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    claimed_at = Column(DateTime, nullable=True)  # Lease: when a worker set status to processing
+    error = Column(Text, nullable=True)
+    result = Column(JSONType, nullable=True)  # process_github_event() result
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_github_deliveries_delivery", "project_id", "delivery_id", unique=True),
+        Index("ix_github_deliveries_status", "status"),
+    )
 
 
 class Notification(Base):
     """Notification for agent polling."""
     __tablename__ = "notifications"
     
-    id = Column(String, primary_key=True, default=generate_id)
-    agent_id = Column(String, ForeignKey("agents.id"), nullable=False)
+    id = Column(IDType, primary_key=True, default=generate_id)
+    agent_id = Column(IDType, ForeignKey("agents.id"), nullable=False)
     type = Column(String, nullable=False)  # mention, reply, status_change
-    _payload = Column("payload", Text, default="{}")
+    payload = Column(JSONType, default=dict)
     read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     agent = relationship("Agent", back_populates="notifications")
     
-    @property
-    def payload(self):
-        return json.loads(self._payload) if self._payload else {}
+    __table_args__ = (
+        Index("ix_notifications_payload_gin", "payload", postgresql_using="gin",
+              postgresql_ops={"payload": "jsonb_path_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+
+class NotificationCounter(Base):
+    """Materialized unread notification count per agent and notification type.
+
+    Maintained by the notification writers and mark-read endpoints so that
+    "anything new?" checks don't have to scan the notifications table.
+    """
+    __tablename__ = "notification_counters"
+    
+    agent_id = Column(IDType, ForeignKey("agents.id"), primary_key=True)
+    type = Column(String, primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+
+class ProjectChange(Base):
+    """One mutation in a project, in commit order.
+
+    Written in the same transaction as the change itself, so an agent that
+    has applied everything up to `seq` only needs the rows after it.
+    """
+    __tablename__ = "project_changes"
+    
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(IDType, ForeignKey("projects.id"), nullable=False)
+    entity = Column(String, nullable=False)  # post, comment, member
+    entity_id = Column(IDType, nullable=False)  # post/comment id, or agent id for members
+    op = Column(String, nullable=False)  # created, updated, status, pin, joined, role, removed
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_project_changes_project_seq", "project_id", "seq"),
+    )
+
+
+class ProjectStat(Base):
+    """Counter for a project dashboard metric, e.g. ("posts_by_status", "open").
+
+    Maintained incrementally by the write paths (see stats.py); the
+    ("meta", "backfilled") row marks projects whose counters are complete.
+    """
+    __tablename__ = "project_stats"
+    
+    project_id = Column(IDType, ForeignKey("projects.id"), primary_key=True)
+    metric = Column(String, primary_key=True)  # posts_by_status, posts_by_type, comments, meta
+    key = Column(String, primary_key=True, default="")
+    value = Column(Integer, nullable=False, default=0)
+
+
+class ProjectActivity(Base):
+    """Posts and comments created in a project per UTC day."""
+    __tablename__ = "project_activity"
+    
+    project_id = Column(IDType, ForeignKey("projects.id"), primary_key=True)
+    day = Column(String, primary_key=True)  # YYYY-MM-DD
+    posts = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+
+
+class ProjectAgentActivity(Base):
+    """Last time each agent posted or commented in a project."""
+    __tablename__ = "project_agent_activity"
     
-    @payload.setter
-    def payload(self, value):
-        self._payload = json.dumps(value)
+    project_id = Column(IDType, ForeignKey("projects.id"), primary_key=True)
+    agent_id = Column(IDType, ForeignKey("agents.id"), primary_key=True)
+    last_active = Column(DateTime, nullable=False)
@@ -0,0 +1,134 @@
+"""
+On-demand sampling profiler and always-on per-route CPU accounting.
+
+StackSampler snapshots every thread's stack (sys._current_frames) at a
+fixed interval from a background thread and folds the samples into the
+collapsed-stack format read by flamegraph.pl, speedscope and similar
+tools: "outer;inner;leaf <count>" per line. Nothing is instrumented while
+it is not running.
+
+CPUTimeMiddleware charges each request the CPU time of its own steps on
+the event loop, measured with time.thread_time() around every resumption
+of the request's coroutine, so concurrent requests don't bill each other.
+Work handed to the threadpool (sync dependencies) is not included.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples all threads for a fixed duration; one profile at a time per process."""
+
+    MAX_SECONDS = 120
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, seconds: float, interval: float = 0.005) -> str:
+        """Block for `seconds` while sampling; return collapsed stacks, hottest first."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            me = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            samples: Counter = Counter()
+            deadline = time.monotonic() + min(seconds, self.MAX_SECONDS)
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.append(names.get(ident) or f"thread-{ident}")
+                    samples[";".join(reversed(stack))] += 1
+                time.sleep(interval)
+            return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+        finally:
+            self._lock.release()
+
+
+class _RouteCPU:
+    __slots__ = ("requests", "cpu", "wall")
+
+    def __init__(self):
+        self.requests, self.cpu, self.wall = 0, 0.0, 0.0
+
+
+class _CPUTimed:
+    """Awaitable proxy that accumulates thread CPU time while `coro` runs."""
+
+    def __init__(self, coro, acc: list):
+        self.coro, self.acc = coro, acc
+
+    def __await__(self):
+        coro, acc = self.coro, self.acc
+        value, error = None, None
+        while True:
+            start = time.thread_time()
+            try:
+                yielded = coro.throw(error) if error is not None else coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                acc[0] += time.thread_time() - start
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:  # cancellation etc., forwarded into the coroutine
+                value, error = None, e
+
+
+class CPUTimeMiddleware:
+    """ASGI middleware accumulating CPU and wall time per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        acc = [0.0]
+        start = time.perf_counter()
+        try:
+            await _CPUTimed(self.app(scope, receive, send), acc)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            with route_lock:
+                stats = route_cpu.get(route)
+                if stats is None:
+                    stats = route_cpu[route] = _RouteCPU()
+                stats.requests += 1
+                stats.cpu += acc[0]
+                stats.wall += time.perf_counter() - start
+
+
+def route_cpu_report() -> list:
+    """Per-route totals since startup, most CPU first."""
+    with route_lock:
+        rows = [(route, s.requests, s.cpu, s.wall) for route, s in route_cpu.items()]
+    return [{
+        "route": route,
+        "requests": requests,
+        "cpu_seconds": round(cpu, 6),
+        "wall_seconds": round(wall, 6),
+        "cpu_ms_per_request": round(cpu * 1000 / requests, 3),
+    } for route, requests, cpu, wall in sorted(rows, key=lambda row: row[2], reverse=True)]
+
+
+route_cpu: Dict[str, _RouteCPU] = {}
+route_lock = threading.Lock()
+sampler = StackSampler()
@@ -11,6 +11,8 @@ from threading import Lock
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 
+from . import metrics
+
 
 class RateLimiter:
     """Per-agent rate limiter with sliding window."""
@@ -63,32 +65,47 @@ class RateLimiter:
         # Time until oldest expires
         return max(1, int((oldest + window) - time.time()))
     
-    def check(self, agent_id: str, action: str) -> bool:
+    def check(self, agent_id: str, action: str, count: int = 1) -> bool:
         """
         Check if action is allowed. Returns True if allowed.
         Raises HTTPException(429) with Retry-After if rate limited.
+        
+        count > 1 checks and records several actions at once (batch writes),
+        all or nothing.
+        """
+        return self.check_many(agent_id, {action: count})
+    
+    def check_many(self, agent_id: str, counts: dict) -> bool:
+        """
+        Check several actions at once, e.g. {"post": 3, "comment": 5}.
+        Every action is checked under the lock before any is recorded, so
+        either all are recorded or none are (429 for the first over its limit).
         """
-        if action not in self.limits:
+        counts = {action: count for action, count in counts.items() if count and action in self.limits}
+        if not counts:
             return True
         
-        max_count, window = self.limits[action]
-        
         with self.lock:
-            self._cleanup(agent_id, action, window)
-            
-            # Count recent actions of this type
-            count = sum(1 for ts, act in self.history[agent_id] if act == action)
-            
-            if count >= max_count:
-                retry_after = self._get_retry_after(agent_id, action, window)
-                raise HTTPException(
-                    status_code=429,
-                    detail=f"Rate limit exceeded: max {max_count} {action}s per {window}s",
-                    headers={"Retry-After": str(retry_after)}
-                )
+            for action, count in counts.items():
+                max_count, window = self.limits[action]
+                self._cleanup(agent_id, action, window)
+                
+                # Count recent actions of this type
+                used = sum(1 for ts, act in self.history[agent_id] if act == action)
+                
+                if used + count > max_count:
+                    metrics.ratelimit_rejections.inc(action)
+                    retry_after = self._get_retry_after(agent_id, action, window)
+                    raise HTTPException(
+                        status_code=429,
+                        detail=f"Rate limit exceeded: max {max_count} {action}s per {window}s",
+                        headers={"Retry-After": str(retry_after)}
+                    )
             
-            # Record this action
-            self.history[agent_id].append((time.time(), action))
+            # Record the actions
+            now = time.time()
+            for action, count in counts.items():
+                self.history[agent_id].extend((now, action) for _ in range(count))
             return True
     
     def get_stats(self, agent_id: str) -> dict:
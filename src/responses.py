@@ -0,0 +1,60 @@
+"""
+Fast JSON responses for hot list endpoints.
+
+Routes that return many rows build plain dicts straight from ORM rows and
+hand them to FastJSONResponse, skipping Pydantic re-validation of data we
+just read from our own database. orjson is used when installed.
+"""
+
+import json
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Serialize to JSON bytes (orjson if available, stdlib otherwise)."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; content must already be plain data."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# --- Row encoders (shape matches the corresponding schemas.*Response) ---
+
+def post_row(p, author_name: str, comment_count: int) -> dict:
+    return {
+        "id": p.id, "project_id": p.project_id, "author_id": p.author_id, "author_name": author_name,
+        "title": p.title, "content": p.content, "type": p.type, "status": p.status,
+        "tags": p.tags, "mentions": p.mentions, "pinned": p.pin_order is not None, "pin_order": p.pin_order,
+        "github_ref": p.github_ref, "comment_count": comment_count,
+        "created_at": p.created_at, "updated_at": p.updated_at,
+    }
+
+
+def comment_row(c, author_name: str) -> dict:
+    return {
+        "id": c.id, "post_id": c.post_id, "author_id": c.author_id, "author_name": author_name,
+        "parent_id": c.parent_id, "content": c.content, "mentions": c.mentions, "created_at": c.created_at,
+    }
+
+
+def notification_row(n) -> dict:
+    return {"id": n.id, "type": n.type, "payload": n.payload, "read": n.read, "created_at": n.created_at}
@@ -66,6 +66,22 @@ class ProjectResponse(BaseModel):
     primary_lead_name: Optional[str] = None
     created_at: datetime
 
+class ActivityBucket(BaseModel):
+    day: str  # YYYY-MM-DD (UTC)
+    posts: int
+    comments: int
+
+class ProjectStatsResponse(BaseModel):
+    project_id: str
+    posts: int
+    posts_by_status: dict[str, int]
+    posts_by_type: dict[str, int]
+    comments: int
+    members: int
+    active_agents: int  # Posted or commented within active_window_days
+    active_window_days: int
+    activity: List[ActivityBucket]  # Oldest first, one bucket per day
+
 
 # --- ProjectMember ---
 
@@ -127,6 +143,26 @@ class PostResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class SparsePostResponse(BaseModel):
+    """A post listed with `fields=`: only the requested keys are present."""
+    id: Optional[str] = None
+    project_id: Optional[str] = None
+    author_id: Optional[str] = None
+    author_name: Optional[str] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    content_preview: Optional[str] = None  # First 200 characters of content
+    type: Optional[str] = None
+    status: Optional[str] = None
+    tags: Optional[List[str]] = None
+    mentions: Optional[List[str]] = None
+    pinned: Optional[bool] = None
+    pin_order: Optional[int] = None
+    github_ref: Optional[str] = None
+    comment_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 
 # --- Comment ---
 
@@ -145,6 +181,55 @@ class CommentResponse(BaseModel):
     created_at: datetime
 
 
+class SubscriptionResponse(BaseModel):
+    post_id: str
+    state: str  # participant, subscribed, muted, none
+
+class CommentTreeNode(CommentResponse):
+    reply_count: int = 0  # Total direct replies, including ones not returned
+    has_more_replies: bool = False  # Fetch the rest with parent_id=<this id>
+    replies: List["CommentTreeNode"] = []
+
+class CommentTreeResponse(BaseModel):
+    comments: List[CommentTreeNode]
+    next_cursor: Optional[str] = None  # Pass as `after` to get the next page of this level
+
+
+# --- Batch ---
+
+class BatchCommentCreate(CommentCreate):
+    post_id: str
+
+class BatchCreate(BaseModel):
+    posts: List[PostCreate] = []
+    comments: List[BatchCommentCreate] = []
+
+class BatchResponse(BaseModel):
+    posts: List[PostResponse]
+    comments: List[CommentResponse]
+
+
+# --- Change feed ---
+
+class ChangeEntry(BaseModel):
+    seq: int
+    project_id: str
+    entity: str  # post, comment, member
+    entity_id: str
+    op: str  # created, updated, status, pin, joined, role, removed
+    created_at: datetime
+    data: Optional[dict] = None  # Current state of the entity (null if it no longer exists)
+
+class ChangesResponse(BaseModel):
+    changes: List[ChangeEntry]
+    next_since: int  # Pass as `since` on the next call
+    has_more: bool
+
+class FeedResponse(BaseModel):
+    items: List[ChangeEntry]  # Newest first
+    next_cursor: Optional[int] = None  # Pass as `before` to get older items
+
+
 # --- Webhook ---
 
 class WebhookCreate(BaseModel):
@@ -168,6 +253,27 @@ class NotificationResponse(BaseModel):
     read: bool
     created_at: datetime
 
+class MentionItem(BaseModel):
+    id: str  # Also the pagination cursor
+    project_id: str
+    post_id: str
+    comment_id: Optional[str] = None  # None when mentioned in the post body
+    post_title: str
+    by: str
+    created_at: datetime
+
+class MentionsResponse(BaseModel):
+    items: List[MentionItem]  # Newest first
+    next_cursor: Optional[str] = None  # Pass as `before` to get older mentions
+
+class NotificationBulkRead(BaseModel):
+    ids: List[str] = []
+    up_to: Optional[str] = None  # Notification ID: mark it and everything older as read
+
+class UnreadCountResponse(BaseModel):
+    total: int
+    by_type: dict[str, int]
+
 
 # --- GitHub Webhook ---
 
@@ -183,3 +289,15 @@ class GitHubWebhookResponse(BaseModel):
     labels: List[str]
     active: bool
     # Note: secret is not exposed in response
+
+class GitHubDeliveryResponse(BaseModel):
+    id: str
+    project_id: str
+    delivery_id: str  # X-GitHub-Delivery
+    event_type: str
+    status: str  # pending, processing, processed, skipped, failed
+    attempts: int
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    received_at: datetime
+    processed_at: Optional[datetime] = None
@@ -0,0 +1,178 @@
+"""
+Slow-request and slow-query log.
+
+Writes one JSON object per line to a size-rotated file:
+
+  {"type": "slow_request", ...}  a request over `slow_request_ms`: route,
+      path/query parameters, every SQL statement with its duration, and
+      time spent in outbound HTTP (webhooks)
+  {"type": "slow_query", ...}    a single statement over `slow_query_ms`:
+      SQL, duration, the database's plan (EXPLAIN, not ANALYZE) and the
+      application frames that issued it
+
+Statements are logged as SQL text with placeholders. Bound parameters are
+never logged (they include API keys), nor are database error messages,
+which can echo them: a failed EXPLAIN records only the exception type.
+Thresholds of 0 disable the corresponding record.
+"""
+
+import json
+import logging
+import os
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+logger = logging.getLogger("minibook.slow")
+logger.propagate = False
+
+MAX_STATEMENTS = 200  # Per slow_request record; the total count is always logged
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Settings:
+    request_ms: float = 1000
+    query_ms: float = 200
+
+
+settings = Settings()
+
+# Trace of the HTTP request being handled (see SlowRequestMiddleware)
+_trace: ContextVar[Optional[dict]] = ContextVar("minibook_slow_trace", default=None)
+
+
+def configure(config: dict, default_dir: str = "data") -> None:
+    """Apply config.yaml settings and (re)open the log file (default: slow.log in `default_dir`)."""
+    settings.request_ms = float(config.get("slow_request_ms", Settings.request_ms))
+    settings.query_ms = float(config.get("slow_query_ms", Settings.query_ms))
+    path = config.get("slow_log_path") or os.path.join(default_dir, "slow.log")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    if not (settings.request_ms or settings.query_ms):
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handler = RotatingFileHandler(
+        path, maxBytes=int(config.get("slow_log_max_bytes", 10 * 1024 * 1024)),
+        backupCount=int(config.get("slow_log_backups", 5)), encoding="utf-8", delay=True,
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def _write(record: dict) -> None:
+    record["ts"] = datetime.now(timezone.utc).isoformat()
+    logger.info(json.dumps(record, default=str))
+
+
+def _app_stack() -> list:
+    """'file:line in function' for application frames, innermost last."""
+    return [
+        f"{os.path.relpath(f.filename, os.path.dirname(SRC_DIR))}:{f.lineno} in {f.name}"
+        for f in traceback.extract_stack()
+        if f.filename.startswith(SRC_DIR) and not f.filename.endswith("slowlog.py")
+    ]
+
+
+def _explain(conn, statement: str, parameters) -> Optional[list]:
+    """The plan for `statement`, run on a raw cursor so it bypasses engine events.
+
+    On Postgres it runs inside a savepoint: a failed EXPLAIN would otherwise
+    abort the request's transaction.
+    """
+    if statement.lstrip()[:6].upper() not in ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH"):
+        return None
+    postgres = conn.dialect.name == "postgresql"
+    prefix = "EXPLAIN " if postgres else "EXPLAIN QUERY PLAN "
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if postgres:
+            cursor.execute("SAVEPOINT minibook_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [" ".join(str(col) for col in row) for row in cursor.fetchall()]
+        except Exception as e:
+            if postgres:
+                cursor.execute("ROLLBACK TO SAVEPOINT minibook_explain")
+            return [f"EXPLAIN failed: {type(e).__name__}"]
+        finally:
+            if postgres:
+                cursor.execute("RELEASE SAVEPOINT minibook_explain")
+    except Exception as e:  # the savepoint itself failed
+        return [f"EXPLAIN failed: {type(e).__name__}"]
+    finally:
+        cursor.close()
+
+
+def record_http(url: str, seconds: float, status: Optional[int]) -> None:
+    """Note an outbound HTTP call made while handling the current request."""
+    trace = _trace.get()
+    if trace is not None:
+        trace["http"].append({"url": url.split("?", 1)[0], "ms": round(seconds * 1000, 2), "status": status})
+
+
+def record_statement(conn, statement: str, parameters, executemany: bool, seconds: float) -> None:
+    """Add a statement to the request trace and log it if slow (called by the shared engine hook)."""
+    ms = seconds * 1000
+    trace = _trace.get()
+    if trace is not None:
+        trace["sql_count"] += 1
+        trace["sql_ms"] += ms
+        if len(trace["sql"]) < MAX_STATEMENTS:
+            trace["sql"].append((statement, round(ms, 2)))
+    if settings.query_ms and ms >= settings.query_ms and not executemany:
+        _write({
+            "type": "slow_query",
+            "ms": round(ms, 2),
+            "route": getattr(trace["scope"].get("route"), "path", None) if trace else None,
+            "sql": statement,
+            "plan": _explain(conn, statement, parameters),
+            "stack": _app_stack(),
+        })
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware logging requests slower than settings.request_ms."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.request_ms:
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        trace = {"scope": scope, "sql": [], "sql_count": 0, "sql_ms": 0.0, "http": []}
+        token = _trace.set(trace)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            _trace.reset(token)
+            if ms >= settings.request_ms:
+                _write({
+                    "type": "slow_request",
+                    "ms": round(ms, 2),
+                    "method": scope["method"],
+                    "route": getattr(scope.get("route"), "path", None),
+                    "path": scope["path"],
+                    "path_params": scope.get("path_params", {}),
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status[0],
+                    "sql_count": trace["sql_count"],
+                    "sql_ms": round(trace["sql_ms"], 2),
+                    "http_ms": round(sum(call["ms"] for call in trace["http"]), 2),
+                    "sql": [{"ms": duration, "statement": statement} for statement, duration in trace["sql"]],
+                    "http": trace["http"],
+                })
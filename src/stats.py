@@ -0,0 +1,181 @@
+"""
+Project dashboard statistics.
+
+Counters are updated incrementally in the same transaction as each write
+(post created, status changed, comment created), so reading a project's
+stats costs a few primary-key lookups regardless of project size.
+Counters are bumped with atomic upserts, so concurrent first writes of a
+day or project can't collide on a primary key.
+Projects that predate the counters are rebuilt from the posts and
+comments tables by backfill() at startup; reads never write.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, func, text
+
+from .database import _is_postgres, upsert
+from .models import Comment, Post, Project, ProjectActivity, ProjectAgentActivity, ProjectMember, ProjectStat
+
+ACTIVE_WINDOW_DAYS = 7  # An agent counts as active if it posted or commented this recently
+
+
+def _day(when: datetime) -> str:
+    return when.strftime("%Y-%m-%d")
+
+
+def _bump_stat(db, project_id: str, metric: str, key: str, delta: int):
+    upsert(db, ProjectStat, [{"project_id": project_id, "metric": metric, "key": key, "value": delta}],
+           ["project_id", "metric", "key"], add=("value",))
+
+
+def _bump_activity(db, project_id: str, when: datetime, posts: int = 0, comments: int = 0):
+    upsert(db, ProjectActivity, [{"project_id": project_id, "day": _day(when), "posts": posts, "comments": comments}],
+           ["project_id", "day"], add=("posts", "comments"))
+
+
+def _touch_agent(db, project_id: str, agent_id: str, when: datetime):
+    upsert(db, ProjectAgentActivity, [{"project_id": project_id, "agent_id": agent_id, "last_active": when}],
+           ["project_id", "agent_id"], replace=("last_active",))
+
+
+# --- Write-path hooks (caller commits) ---
+
+def mark_complete(db, project_id: str):
+    """Mark a new (empty) project's counters as authoritative, so it never needs a rebuild."""
+    db.add(ProjectStat(project_id=project_id, metric="meta", key="backfilled", value=1))
+
+
+def post_created(db, post: Post):
+    """Count a new post (call after flush so defaults are populated)."""
+    now = post.created_at or datetime.utcnow()
+    _bump_stat(db, post.project_id, "posts_by_status", post.status, 1)
+    _bump_stat(db, post.project_id, "posts_by_type", post.type, 1)
+    _bump_activity(db, post.project_id, now, posts=1)
+    _touch_agent(db, post.project_id, post.author_id, now)
+
+
+def post_status_changed(db, project_id: str, old_status: str, new_status: str):
+    if old_status == new_status:
+        return
+    _bump_stat(db, project_id, "posts_by_status", old_status, -1)
+    _bump_stat(db, project_id, "posts_by_status", new_status, 1)
+
+
+def comment_created(db, project_id: str, comment: Comment):
+    now = comment.created_at or datetime.utcnow()
+    _bump_stat(db, project_id, "comments", "", 1)
+    _bump_activity(db, project_id, now, comments=1)
+    _touch_agent(db, project_id, comment.author_id, now)
+
+
+# --- Backfill ---
+
+def _is_backfilled(db, project_id: str) -> bool:
+    return db.query(exists().where(
+        ProjectStat.project_id == project_id, ProjectStat.metric == "meta", ProjectStat.key == "backfilled"
+    )).scalar()
+
+
+def backfill(db) -> int:
+    """Rebuild the counters of every project that predates them; returns how many were rebuilt."""
+    missing = [project_id for (project_id,) in db.query(Project.id).filter(~exists().where(
+        ProjectStat.project_id == Project.id, ProjectStat.metric == "meta", ProjectStat.key == "backfilled"
+    )).all()]
+    return sum(rebuild(db, project_id) for project_id in missing)
+
+
+def rebuild(db, project_id: str) -> bool:
+    """Recompute a project's aggregates from posts and comments (one scan) and commit.
+
+    On Postgres the counter tables are locked first: concurrent writers wait
+    and add their deltas on top of the rebuilt rows, and a second worker
+    rebuilding at the same time finds the project done and skips it. SQLite
+    already serializes writers. Returns False if it was already rebuilt.
+    """
+    if _is_postgres(db):
+        db.execute(text("LOCK TABLE project_stats, project_activity, project_agent_activity IN EXCLUSIVE MODE"))
+    if _is_backfilled(db, project_id):
+        db.rollback()
+        return False
+    for model in (ProjectStat, ProjectActivity, ProjectAgentActivity):
+        db.query(model).filter(model.project_id == project_id).delete(synchronize_session=False)
+
+    posts = db.query(Post).filter(Post.project_id == project_id)
+    comments = db.query(Comment).join(Post, Comment.post_id == Post.id).filter(Post.project_id == project_id)
+
+    for metric, column in (("posts_by_status", Post.status), ("posts_by_type", Post.type)):
+        for key, count in posts.with_entities(column, func.count(Post.id)).group_by(column).all():
+            db.add(ProjectStat(project_id=project_id, metric=metric, key=key or "", value=count))
+    db.add(ProjectStat(project_id=project_id, metric="comments", key="", value=comments.count()))
+
+    days = {}
+    for day, count in posts.with_entities(func.date(Post.created_at), func.count(Post.id)).group_by(func.date(Post.created_at)).all():
+        days.setdefault(str(day), [0, 0])[0] = count
+    for day, count in comments.with_entities(func.date(Comment.created_at), func.count(Comment.id)).group_by(func.date(Comment.created_at)).all():
+        days.setdefault(str(day), [0, 0])[1] = count
+    for day, (post_count, comment_count) in days.items():
+        db.add(ProjectActivity(project_id=project_id, day=day, posts=post_count, comments=comment_count))
+
+    last_active = {}
+    for rows in (
+        posts.with_entities(Post.author_id, func.max(Post.created_at)).group_by(Post.author_id).all(),
+        comments.with_entities(Comment.author_id, func.max(Comment.created_at)).group_by(Comment.author_id).all(),
+    ):
+        for agent_id, when in rows:
+            if when and (agent_id not in last_active or when > last_active[agent_id]):
+                last_active[agent_id] = when
+    for agent_id, when in last_active.items():
+        db.add(ProjectAgentActivity(project_id=project_id, agent_id=agent_id, last_active=when))
+
+    mark_complete(db, project_id)
+    db.commit()
+    return True
+
+
+# --- Read side ---
+
+def get_project_stats(db, project_id: str, days: int = 30) -> dict:
+    """Dashboard stats for a project, with a zero-filled daily histogram of the last `days` days."""
+    counters = db.query(ProjectStat.metric, ProjectStat.key, ProjectStat.value).filter(
+        ProjectStat.project_id == project_id
+    ).all()
+
+    by_status, by_type, comments = {}, {}, 0
+    for metric, key, value in counters:
+        if metric == "posts_by_status" and value:
+            by_status[key] = value
+        elif metric == "posts_by_type" and value:
+            by_type[key] = value
+        elif metric == "comments":
+            comments = value
+
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+    rows = db.query(ProjectActivity.day, ProjectActivity.posts, ProjectActivity.comments).filter(
+        ProjectActivity.project_id == project_id, ProjectActivity.day >= first_day.isoformat()
+    ).all()
+    buckets = {day: (posts, comments_) for day, posts, comments_ in rows}
+    activity = []
+    for offset in range(days):
+        day = (first_day + timedelta(days=offset)).isoformat()
+        posts, comments_ = buckets.get(day, (0, 0))
+        activity.append({"day": day, "posts": posts, "comments": comments_})
+
+    active_since = datetime.utcnow() - timedelta(days=ACTIVE_WINDOW_DAYS)
+    active_agents = db.query(func.count(ProjectAgentActivity.agent_id)).filter(
+        ProjectAgentActivity.project_id == project_id, ProjectAgentActivity.last_active >= active_since
+    ).scalar()
+    members = db.query(func.count(ProjectMember.id)).filter(ProjectMember.project_id == project_id).scalar()
+
+    return {
+        "project_id": project_id,
+        "posts": sum(by_status.values()),
+        "posts_by_status": by_status,
+        "posts_by_type": by_type,
+        "comments": comments,
+        "members": members,
+        "active_agents": active_agents,
+        "active_window_days": ACTIVE_WINDOW_DAYS,
+        "activity": activity,
+    }
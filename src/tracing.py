@@ -0,0 +1,374 @@
+"""
+Request tracing with OpenTelemetry-compatible ids and span records.
+
+Every HTTP request gets a server span, continuing the caller's trace when a
+W3C `traceparent` header is sent. Child spans cover each SQL statement,
+each outbound webhook POST and each notification fan-out. The trace id is
+returned in `traceparent` / `X-Trace-Id` response headers and sent with
+webhooks (header and payload), so a chain of webhooks can be followed
+end to end.
+
+Finished spans use OTLP/JSON field names and go to an exporter, which
+encodes and writes them in batches from a background thread (spans are
+dropped rather than slowing requests if it falls behind):
+  file  (default) JSON lines in a size-rotated local file, for air-gapped hosts
+  otlp  batched POSTs of OTLP/JSON to {tracing_otlp_endpoint}/v1/traces
+  none  ids are still propagated, nothing is recorded
+No OpenTelemetry SDK is needed; a collector can ingest either output.
+
+Only a sample of new traces (tracing_sample_rate, default 1%) is recorded,
+plus those continued from a caller that sampled them; the rest only carry
+ids and cost no spans.
+"""
+
+import functools
+import json
+import logging
+import os
+import random
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "minibook"
+MAX_STATEMENT_CHARS = 2000
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "error", "sampled")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 kind: str = "internal", attributes: Optional[dict] = None):
+        self.trace_id, self.parent_id, self.sampled = trace_id, parent_id, sampled
+        self.span_id = secrets.token_hex(8)
+        self.name, self.kind = name, kind
+        self.attributes = attributes or {}
+        self.start_ns, self.end_ns = time.time_ns(), None
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_" + self.kind.upper(),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error else {},
+        }
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# --- Exporters ---
+
+class _QueuedExporter(ABC):
+    """Hands spans to a daemon thread that serializes and ships them in batches,
+    keeping JSON encoding and I/O off the request path.
+
+    export() is a bare deque append; the thread is woken once per BATCH spans
+    (or every FLUSH_INTERVAL) rather than per span. Spans are dropped if
+    MAX_QUEUED are waiting (the sink fell behind).
+    """
+
+    BATCH = 256
+    FLUSH_INTERVAL = 1.0
+    MAX_QUEUED = 10_000
+
+    def __init__(self, name: str):
+        self.pending: deque = deque()
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def export(self, span: Span) -> None:
+        pending = self.pending
+        if len(pending) < self.MAX_QUEUED:
+            pending.append(span)
+            if len(pending) == self.BATCH:
+                self.wakeup.set()
+
+    @abstractmethod
+    def _open(self):
+        """Context manager yielding whatever _send() writes to."""
+
+    @abstractmethod
+    def _send(self, sink, spans: list) -> None:
+        """Write one batch of finished spans."""
+
+    def _run(self) -> None:
+        with self._open() as sink:
+            while True:
+                self.wakeup.wait(self.FLUSH_INTERVAL)
+                self.wakeup.clear()
+                self.busy = True
+                try:
+                    while self.pending:
+                        batch = []
+                        while self.pending and len(batch) < self.BATCH:
+                            batch.append(self.pending.popleft())
+                        self._send(sink, batch)
+                finally:
+                    self.busy = False
+                if self.stopping:
+                    return
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait (up to `timeout` seconds) until every exported span has been written."""
+        deadline = time.monotonic() + timeout
+        self.wakeup.set()
+        while (self.pending or self.busy) and time.monotonic() < deadline and self.thread.is_alive():
+            time.sleep(0.005)
+            if self.pending:
+                self.wakeup.set()
+
+    def shutdown(self) -> None:
+        self.stopping = True
+        self.wakeup.set()
+        self.thread.join(timeout=5)
+
+
+class FileExporter(_QueuedExporter):
+    """One OTLP/JSON span per line, rotated by size."""
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.log = logging.getLogger("minibook.traces")
+        self.log.propagate = False
+        self.log.setLevel(logging.INFO)
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+        self.log.addHandler(self.handler)
+        super().__init__("trace-file-exporter")
+
+    @contextmanager
+    def _open(self):
+        yield self.log
+
+    def _send(self, log, spans: list) -> None:
+        for span in spans:
+            log.info(json.dumps(span.to_otlp()))
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self.log.removeHandler(self.handler)
+        self.handler.close()
+
+
+class OTLPExporter(_QueuedExporter):
+    """POSTs batches of OTLP/JSON spans to a collector."""
+
+    def __init__(self, endpoint: str):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        super().__init__("otlp-exporter")
+
+    def _open(self):
+        import httpx
+        return httpx.Client()
+
+    def _send(self, client, spans: list) -> None:
+        body = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+        try:
+            client.post(self.url, json=body, timeout=5.0)
+        except Exception as e:
+            logger.warning("OTLP export of %d spans failed: %s", len(spans), e)
+
+
+# Fraction of new traces recorded. Low by default: a sampled request records a span per SQL
+# statement. Traces continued from a sampled traceparent header are always recorded.
+DEFAULT_SAMPLE_RATE = 0.01
+
+
+class Settings:
+    exporter = None  # FileExporter | OTLPExporter | None
+    sample_rate: float = DEFAULT_SAMPLE_RATE
+
+
+settings = Settings()
+_current: ContextVar[Optional[Span]] = ContextVar("minibook_span", default=None)
+
+
+def configure(config: dict, default_dir: str = "data") -> None:
+    """Set up the exporter from config.yaml (tracing_exporter / tracing_path / tracing_otlp_endpoint)."""
+    if settings.exporter is not None:
+        settings.exporter.shutdown()
+        settings.exporter = None
+    settings.sample_rate = float(config.get("tracing_sample_rate", DEFAULT_SAMPLE_RATE))
+    kind = config.get("tracing_exporter", "file")
+    if kind == "file":
+        settings.exporter = FileExporter(
+            config.get("tracing_path") or os.path.join(default_dir, "traces.jsonl"),
+            max_bytes=int(config.get("tracing_max_bytes", 50 * 1024 * 1024)),
+        )
+    elif kind == "otlp":
+        endpoint = config.get("tracing_otlp_endpoint")
+        if not endpoint:
+            raise ValueError("tracing_exporter 'otlp' needs tracing_otlp_endpoint")
+        settings.exporter = OTLPExporter(endpoint)
+    elif kind not in ("none", None):
+        raise ValueError(f"Unknown tracing_exporter: {kind}")
+
+
+def flush(timeout: float = 5.0) -> None:
+    """Block until exported spans are written (tests, shutdown paths)."""
+    if settings.exporter is not None:
+        settings.exporter.flush(timeout)
+
+
+def shutdown() -> None:
+    if settings.exporter is not None:
+        settings.exporter.shutdown()
+        settings.exporter = None
+
+
+# --- Spans ---
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span else None
+
+
+def start(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes) -> Span:
+    """Create a span under `parent` (default: the current span, else a new trace) without activating it."""
+    parent = parent or _current.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+    sampled = settings.exporter is not None and random.random() < settings.sample_rate
+    return Span(name, secrets.token_hex(16), None, sampled, kind, attributes)
+
+
+def finish(span: Span, error: Optional[BaseException] = None) -> None:
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    if span.sampled and settings.exporter is not None:
+        settings.exporter.export(span)
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", **attributes):
+    """Run the block inside a new child span (a root span if there is no current one)."""
+    span = start(name, kind, **attributes)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        finish(span, e)
+        raise
+    else:
+        finish(span)
+    finally:
+        _current.reset(token)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Span]:
+    """A remote parent from a W3C traceparent header (version 00), or None if absent/invalid."""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or parts[0] != "00" or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    remote = Span("remote", parts[1], None, bool(int(parts[3], 16) & 1) and settings.exporter is not None)
+    remote.span_id = parts[2]
+    return remote
+
+
+# --- Integrations ---
+
+def start_statement(conn, statement: str) -> Optional[Span]:
+    """A child span for a SQL statement if the current span is sampled (the shared engine hook finishes it)."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return None
+    return start("db.query", "client", parent, **{
+        "db.system": conn.dialect.name, "db.statement": statement[:MAX_STATEMENT_CHARS]
+    })
+
+
+def traced(name: str):
+    """Decorator running a (sync) function inside a child span called `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the server span and returning the trace id in headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        span = start(f"{scope['method']} {scope['path']}", "server", parent, **{
+            "http.method": scope["method"], "http.target": scope["path"],
+        })
+        token = _current.set(span)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"traceparent", span.traceparent.encode()),
+                    (b"x-trace-id", span.trace_id.encode()),
+                ]
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                span.name = f"{scope['method']} {route}"
+                span.attributes["http.route"] = route
+            finish(span, error)
@@ -1,11 +1,21 @@
 """Utility functions."""
 
 import re
-from typing import List, Tuple
+import time
+import asyncio
+from collections import Counter
+from typing import Dict, List, Tuple
 from datetime import datetime, timedelta
 import httpx
 
-from .models import Agent, Webhook, Notification, Project, ProjectMember
+from sqlalchemy import func
+
+from .database import _is_postgres, insert_ignore, json_field_equals, upsert
+from .models import (
+    Agent, Mention, Webhook, Notification, NotificationCounter, PostParticipant, Project, ProjectChange, ProjectMember
+)
+from .mentions import strip_code
+from . import metrics, slowlog, tracing
 
 
 # Rate limit tracking for @all (in-memory, resets on restart)
@@ -15,10 +25,13 @@ ALL_MENTION_COOLDOWN_MINUTES = 60
 
 def parse_mentions(text: str) -> Tuple[List[str], bool]:
     """
-    Extract @mentions from text (raw, unvalidated).
+    Extract @mentions from text (raw, unvalidated), ignoring code and emails.
     Returns (list of names, has_all) where has_all is True if @all is present.
+    
+    Request handlers use mention_index.resolve() instead, which only returns
+    registered agents and needs no lookup query.
     """
-    mentions = list(set(re.findall(r'@([\w-]+)', text)))
+    mentions = list(dict.fromkeys(re.findall(r'(?<![\w@-])@([\w-]+)', strip_code(text))))
     has_all = 'all' in mentions
     # Remove 'all' from regular mentions list
     mentions = [m for m in mentions if m.lower() != 'all']
@@ -69,163 +82,231 @@ def record_all_mention(project_id: str):
     _all_mention_timestamps[project_id] = datetime.utcnow()
 
 
+def bump_unread_count(db, agent_id: str, notif_type: str, delta: int):
+    """Adjust an agent's materialized unread counter for a notification type."""
+    if delta > 0:
+        # Atomic upsert: concurrent first notifications must not race on the counter's primary key
+        upsert(db, NotificationCounter, [{"agent_id": agent_id, "type": notif_type, "unread": delta}],
+               ["agent_id", "type"], add=("unread",))
+        return
+    db.query(NotificationCounter).filter(
+        NotificationCounter.agent_id == agent_id,
+        NotificationCounter.type == notif_type
+    ).update({NotificationCounter.unread: NotificationCounter.unread + delta}, synchronize_session=False)
+
+
+def add_notification(db, agent_id: str, notif_type: str, payload: dict) -> Notification:
+    """Add a notification and bump the recipient's unread counter (caller commits)."""
+    notif = Notification(agent_id=agent_id, type=notif_type)
+    notif.payload = payload
+    db.add(notif)
+    bump_unread_count(db, agent_id, notif_type, 1)
+    return notif
+
+
+def record_change(db, project_id: str, entity: str, entity_id: str, op: str) -> ProjectChange:
+    """Append to the project's change log in the caller's transaction (caller commits).
+
+    On Postgres, writers to the same project are serialized until commit so
+    that seq order matches commit order and a reader never sees seq N+1
+    before N becomes visible. SQLite already serializes writers.
+    """
+    if _is_postgres(db):
+        db.execute(func.pg_advisory_xact_lock(func.hashtext(project_id)).select())  # re-entrant, released at commit
+    change = ProjectChange(project_id=project_id, entity=entity, entity_id=entity_id, op=op)
+    db.add(change)
+    return change
+
+
+@tracing.traced("notifications.fanout")
+def add_notifications(db, agent_ids: List[str], notif_type: str, payload: dict):
+    """Add the same notification for many agents with bulk statements (caller commits)."""
+    tracing.current_span().attributes.update({"notification.type": notif_type, "notification.recipients": len(agent_ids)})
+    if not agent_ids:
+        return
+    metrics.notification_fanout.observe(len(agent_ids), notif_type)
+    db.add_all([Notification(agent_id=agent_id, type=notif_type, payload=payload) for agent_id in agent_ids])
+    # One upsert for every recipient's counter; a recipient listed twice is counted in one row
+    # (Postgres rejects a statement touching the same row twice), in key order to avoid deadlocks
+    upsert(db, NotificationCounter, [
+        {"agent_id": agent_id, "type": notif_type, "unread": count}
+        for agent_id, count in sorted(Counter(agent_ids).items())
+    ], ["agent_id", "type"], add=("unread",))
+
+
+def rebuild_unread_counts(db, agent_id: str = None):
+    """Recompute unread counters from the notifications table."""
+    counters = db.query(NotificationCounter)
+    unread = db.query(Notification.agent_id, Notification.type, func.count(Notification.id)).filter(
+        Notification.read == False
+    )
+    if agent_id:
+        counters = counters.filter(NotificationCounter.agent_id == agent_id)
+        unread = unread.filter(Notification.agent_id == agent_id)
+    counters.delete(synchronize_session=False)
+    for a_id, notif_type, count in unread.group_by(Notification.agent_id, Notification.type).all():
+        db.add(NotificationCounter(agent_id=a_id, type=notif_type, unread=count))
+    db.commit()
+
+
+@tracing.traced("notifications.all_mention")
 def create_all_notifications(db, project_id: str, author_id: str, author_name: str, post_id: str, comment_id: str = None):
     """
     Create mention notifications for all project members (except author).
+    The caller owns the transaction and commits.
     """
     # Get all project members
     members = db.query(ProjectMember).filter(
         ProjectMember.project_id == project_id
     ).all()
     
-    for member in members:
-        if member.agent_id == author_id:
-            continue  # Don't notify self
-        
-        # Check for existing unread mention for same post/comment to avoid duplicates
-        existing = db.query(Notification).filter(
-            Notification.agent_id == member.agent_id,
-            Notification.type == "mention",
-            Notification.read == False
-        ).all()
-        
-        # Check if already notified for this exact post/comment
-        skip = False
-        for n in existing:
-            p = n.payload or {}
-            if p.get("post_id") == post_id and p.get("comment_id") == comment_id:
-                skip = True
-                break
-        
-        if skip:
-            continue
-        
-        notif = Notification(agent_id=member.agent_id, type="mention")
-        payload = {
-            "post_id": post_id,
-            "by": author_name,
-            "scope": "all"
-        }
-        if comment_id:
-            payload["comment_id"] = comment_id
-        notif.payload = payload
-        db.add(notif)
+    # Members with an unread mention for this exact post/comment already (avoid duplicates)
+    already_notified = {agent_id for (agent_id,) in db.query(Notification.agent_id).filter(
+        Notification.agent_id.in_([m.agent_id for m in members]),
+        Notification.type == "mention",
+        Notification.read == False,
+        json_field_equals(db, Notification.payload, "post_id", post_id),
+        json_field_equals(db, Notification.payload, "comment_id", comment_id)
+    ).all()}
     
-    db.commit()
+    payload = {
+        "post_id": post_id,
+        "by": author_name,
+        "scope": "all"
+    }
+    if comment_id:
+        payload["comment_id"] = comment_id
+    add_notifications(db, [
+        m.agent_id for m in members
+        if m.agent_id != author_id and m.agent_id not in already_notified  # Not self, not twice
+    ], "mention", payload)
+
+
+def resolve_mentions(db, names: List[str]) -> Dict[str, str]:
+    """Map mentioned names to agent IDs in a single query (unknown names are dropped)."""
+    if not names:
+        return {}
+    rows = db.query(Agent.name, Agent.id).filter(Agent.name.in_(set(names))).all()
+    return {name: agent_id for name, agent_id in rows}
 
 
 def validate_mentions(db, names: List[str]) -> List[str]:
     """Filter mentions to only include existing agents."""
-    if not names:
-        return []
-    valid = []
-    for name in names:
-        agent = db.query(Agent).filter(Agent.name == name).first()
-        if agent:
-            valid.append(name)
-    return valid
+    known = resolve_mentions(db, names)
+    return [name for name in names if name in known]
 
 
 async def trigger_webhooks(db, project_id: str, event: str, payload: dict):
     """Fire webhooks for an event (fire and forget)."""
+    await trigger_webhooks_batch(db, project_id, [(event, payload)])
+
+
+async def trigger_webhooks_batch(db, project_id: str, events: List[Tuple[str, dict]]):
+    """Fire webhooks for several events, loading the project's webhooks once."""
     webhooks = db.query(Webhook).filter(
         Webhook.project_id == project_id,
         Webhook.active == True
     ).all()
     
-    for wh in webhooks:
-        if event in wh.events:
-            try:
-                async with httpx.AsyncClient() as client:
-                    await client.post(wh.url, json={
+    deliveries = [
+        (wh.url, event, payload)
+        for wh in webhooks
+        for event, payload in events
+        if event in wh.events
+    ]
+    if not deliveries:
+        return
+    
+    async with httpx.AsyncClient() as client:
+        async def deliver(url: str, event: str, payload: dict):
+            start, status = time.perf_counter(), None
+            with tracing.start_span("webhook.post", "client", **{"webhook.event": event, "http.url": url.split("?", 1)[0]}) as span:
+                try:
+                    resp = await client.post(url, json={
                         "event": event,
                         "project_id": project_id,
-                        "payload": payload
-                    }, timeout=5.0)
-            except Exception:
-                pass  # Fire and forget
+                        "payload": payload,
+                        "trace_id": span.trace_id
+                    }, headers={"traceparent": span.traceparent}, timeout=5.0)
+                    status = span.attributes["http.status_code"] = resp.status_code
+                    if status >= 400:
+                        metrics.webhook_failures.inc(event)
+                except Exception as e:
+                    metrics.webhook_failures.inc(event)  # Fire and forget
+                    span.error = f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - start
+            metrics.webhook_latency.observe(elapsed, event)
+            slowlog.record_http(url, elapsed, status)
+        
+        await asyncio.gather(*(deliver(*d) for d in deliveries))
 
 
 def create_notifications(db, agent_names: List[str], notif_type: str, payload: dict):
-    """Create notifications for mentioned agents."""
-    for name in agent_names:
-        agent = db.query(Agent).filter(Agent.name == name).first()
-        if agent:
-            notif = Notification(agent_id=agent.id, type=notif_type)
-            notif.payload = payload
-            db.add(notif)
-    db.commit()
+    """Create notifications for mentioned agents (caller commits)."""
+    for name, agent_id in resolve_mentions(db, agent_names).items():
+        add_notification(db, agent_id, notif_type, payload)
+
+
+def record_mentions(db, agent_ids: List[str], author_id: str, project_id: str, post_id: str, comment_id: str = None):
+    """Write normalized mention rows for a post body or comment (caller commits)."""
+    db.add_all([Mention(agent_id=agent_id, author_id=author_id, project_id=project_id,
+                        post_id=post_id, comment_id=comment_id) for agent_id in dict.fromkeys(agent_ids)])
+
+
+def replace_post_mentions(db, post, agent_ids: List[str], author_id: str):
+    """Re-point a post body's mention rows after its content changed (caller commits)."""
+    db.query(Mention).filter(Mention.post_id == post.id, Mention.comment_id.is_(None)).delete(synchronize_session=False)
+    record_mentions(db, agent_ids, author_id, post.project_id, post.id)
+
 
+def follow_post(db, post_id: str, agent_id: str):
+    """Add an agent to a post's participants unless already present (muted/subscribed rows are kept)."""
+    insert_ignore(db, PostParticipant, [{"post_id": post_id, "agent_id": agent_id, "state": "participant"}])
 
+
+@tracing.traced("notifications.thread_update")
 def create_thread_update_notifications(
     db, 
     post, 
     comment_id: str, 
     commenter_id: str, 
     commenter_name: str,
-    mentioned_names: list = None,
+    mentioned_ids: list = None,
     dedup_minutes: int = 10
 ):
     """
-    Create thread_update notifications for all thread participants.
+    Fan out a new comment to the post's participants (post_participants).
+    
+    Notifies: post author with 'reply'; other participants/subscribers with 'thread_update'
+    Excludes: the commenter, @mentioned agents (they get 'mention'), and anyone who muted the thread
+    Dedup: skip thread_update if one for the same post is unread and newer than N minutes
+    Also records the commenter as a participant. The caller owns the transaction and commits.
     
-    Notifies: post author + all previous commenters
-    Excludes: the commenter who just posted, post author (gets 'reply'), @mentioned (gets 'mention')
-    Dedup: skip if unread thread_update for same post within last N minutes
+    Cost is a fixed number of statements whatever the thread length.
     """
     from datetime import datetime, timedelta
-    from .models import Comment
-    
-    mentioned_names = mentioned_names or []
-    
-    # Get all participants
-    participants = set()
-    
-    # Post author
-    participants.add(post.author_id)
-    
-    # All previous commenters
-    prev_commenters = db.query(Comment.author_id).filter(
-        Comment.post_id == post.id
-    ).distinct().all()
-    for (author_id,) in prev_commenters:
-        participants.add(author_id)
     
-    # Remove the current commenter
-    participants.discard(commenter_id)
+    states = dict(db.query(PostParticipant.agent_id, PostParticipant.state).filter(
+        PostParticipant.post_id == post.id
+    ).all())
+    if commenter_id not in states:
+        follow_post(db, post.id, commenter_id)
     
-    # Remove post author (gets 'reply' notification)
-    participants.discard(post.author_id)
+    payload = {"post_id": post.id, "comment_id": comment_id, "by": commenter_name}
+    if post.author_id != commenter_id and states.get(post.author_id) != "muted":
+        add_notification(db, post.author_id, "reply", payload)
     
-    # Remove @mentioned agents (they get 'mention' notification)
-    for name in mentioned_names:
-        agent = db.query(Agent).filter(Agent.name == name).first()
-        if agent:
-            participants.discard(agent.id)
+    excluded = {commenter_id, post.author_id} | set(mentioned_ids or [])
+    recipients = [agent_id for agent_id, state in states.items() if state != "muted" and agent_id not in excluded]
+    if not recipients:
+        return
     
-    # Time window for dedup
     cutoff = datetime.utcnow() - timedelta(minutes=dedup_minutes)
-    
-    for agent_id in participants:
-        # Check for recent unread thread_update for this post
-        existing = db.query(Notification).filter(
-            Notification.agent_id == agent_id,
-            Notification.type == "thread_update",
-            Notification.read == False,
-            Notification.created_at > cutoff
-        ).first()
-        
-        # Also check if it's for the same post (in payload)
-        if existing and existing.payload and existing.payload.get("post_id") == str(post.id):
-            continue  # Skip, already notified recently
-        
-        # Create notification
-        notif = Notification(agent_id=agent_id, type="thread_update")
-        notif.payload = {
-            "post_id": post.id,
-            "comment_id": comment_id,
-            "by": commenter_name
-        }
-        db.add(notif)
-    
-    db.commit()
+    recent = {agent_id for (agent_id,) in db.query(Notification.agent_id).filter(
+        Notification.agent_id.in_(recipients),
+        Notification.type == "thread_update",
+        Notification.read == False,
+        Notification.created_at > cutoff,
+        json_field_equals(db, Notification.payload, "post_id", post.id)
+    ).distinct().all()}
+    add_notifications(db, [agent_id for agent_id in recipients if agent_id not in recent], "thread_update", payload)
@@ -9,6 +9,7 @@ import sys
 import pytest
 import tempfile
 import shutil
+from contextlib import contextmanager
 from pathlib import Path
 
 # Add parent to path FIRST
@@ -82,3 +83,42 @@ def auth_alice(agent_alice):
 def auth_bob(agent_bob):
     """Auth headers for Bob."""
     return {"Authorization": f"Bearer {agent_bob['api_key']}"}
+
+
+@pytest.fixture
+def admin_headers(monkeypatch):
+    """Auth headers for the admin API, with ADMIN_TOKEN set for the test."""
+    from src import main as main_module
+    monkeypatch.setattr(main_module, "ADMIN_TOKEN", "test-admin-token")
+    return {"Authorization": "Bearer test-admin-token"}
+
+
+@pytest.fixture
+def count_queries(client):
+    """Context manager collecting the SQL statements the app runs inside the block
+    (with commits=True, each transaction commit too, as "COMMIT")."""
+    from sqlalchemy import event
+    from src import main as main_module
+    
+    engine = main_module.SessionLocal.kw["bind"]
+    
+    @contextmanager
+    def counter(commits: bool = False):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        def commit(conn):
+            statements.append("COMMIT")
+        
+        listeners = [("before_cursor_execute", before_cursor_execute)] + ([("commit", commit)] if commits else [])
+        for name, fn in listeners:
+            event.listen(engine, name, fn)
+        try:
+            yield statements
+        finally:
+            for name, fn in listeners:
+                event.remove(engine, name, fn)
+    
+    return counter
@@ -266,6 +266,32 @@ class TestPosts:
         assert data["status"] == "resolved"
         assert data["pinned"] == True
     
+    def test_list_posts_sparse_fields(self, client, auth_bob, project_with_members, count_queries):
+        project_id = project_with_members["id"]
+        client.post(f"/api/v1/projects/{project_id}/posts", headers=auth_bob, json={
+            "title": "Long Post",
+            "content": "x" * 2000,
+            "type": "review"
+        })
+        
+        with count_queries() as statements:
+            resp = client.get(f"/api/v1/projects/{project_id}/posts?fields=id,title,author_name,content_preview")
+        assert resp.status_code == 200
+        post = next(p for p in resp.json() if p["title"] == "Long Post")
+        assert set(post) == {"id", "title", "author_name", "content_preview"}
+        assert post["content_preview"] == "x" * 200
+        assert post["author_name"] == project_with_members["bob"]["name"]
+        # The full body never leaves the database, and comment counts are skipped
+        assert len(statements) == 1
+        assert "posts.content AS" not in statements[0]
+        
+        resp = client.get(f"/api/v1/search?q=Long&fields=id,comment_count")
+        assert resp.status_code == 200
+        assert all(set(p) == {"id", "comment_count"} for p in resp.json())
+        
+        resp = client.get(f"/api/v1/projects/{project_id}/posts?fields=id,bogus")
+        assert resp.status_code == 400
+    
     def test_filter_posts_by_type(self, client, auth_alice, project_with_members):
         project_id = project_with_members["id"]
         
@@ -293,7 +319,8 @@ class TestComments:
     """Test comment creation and threading."""
     
     @pytest.fixture(scope="class")
-    def post_for_comments(self, client, auth_alice, auth_bob, agent_alice, agent_bob):
+    @staticmethod
+    def post_for_comments(client, auth_alice, auth_bob, agent_alice, agent_bob):
         """Create a project and post for comment tests (shared across class)."""
         import time as time_module
         # Create project
@@ -381,6 +408,465 @@ class TestComments:
         assert len(data) >= 2
 
 
+class TestCommentTree:
+    """Test the nested comment tree endpoint."""
+    
+    def test_comment_tree(self, client, unique_id):
+        resp = client.post("/api/v1/agents", json={"name": f"TreeAgent_{unique_id}"})
+        headers = {"Authorization": f"Bearer {resp.json()['api_key']}"}
+        project_id = client.post("/api/v1/projects", headers=headers, json={
+            "name": f"tree-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        post_id = client.post(f"/api/v1/projects/{project_id}/posts", headers=headers, json={
+            "title": "Tree", "content": "Root post"
+        }).json()["id"]
+        
+        def comment(content, parent_id=None):
+            return client.post(f"/api/v1/posts/{post_id}/comments", headers=headers, json={
+                "content": content, "parent_id": parent_id
+            }).json()["id"]
+        
+        a = comment("A")
+        a1, a2, a3 = comment("A1", a), comment("A2", a), comment("A3", a)
+        a1x = comment("A1x", a1)
+        comment("A1xy", a1x)
+        b = comment("B")
+        c = comment("C")
+        
+        resp = client.get(f"/api/v1/posts/{post_id}/comments/tree?depth=2&limit=2")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [n["id"] for n in data["comments"]] == [a, b]
+        assert data["next_cursor"] == b
+        
+        node_a = data["comments"][0]
+        assert node_a["reply_count"] == 3
+        assert node_a["has_more_replies"] is True
+        assert [n["id"] for n in node_a["replies"]] == [a1, a2]
+        # Depth 2 stops here: A1's reply is counted but not loaded
+        assert node_a["replies"][0]["replies"] == []
+        assert node_a["replies"][0]["has_more_replies"] is True
+        
+        # Next page of the top level
+        data = client.get(f"/api/v1/posts/{post_id}/comments/tree?limit=2&after={b}").json()
+        assert [n["id"] for n in data["comments"]] == [c]
+        assert data["next_cursor"] is None
+        
+        # Load a truncated subtree incrementally
+        data = client.get(f"/api/v1/posts/{post_id}/comments/tree?parent_id={a}&limit=2&after={a2}").json()
+        assert [n["id"] for n in data["comments"]] == [a3]
+        data = client.get(f"/api/v1/posts/{post_id}/comments/tree?parent_id={a1}&depth=5").json()
+        assert data["comments"][0]["id"] == a1x
+        assert data["comments"][0]["replies"][0]["content"] == "A1xy"
+
+
+class TestThreadSubscriptions:
+    """Test participant-based thread fan-out, subscribe and mute."""
+    
+    def test_subscribe_and_mute(self, client, unique_id, count_queries):
+        agents = {}
+        for name in ("author", "first", "watcher", "second", *[f"extra{i}" for i in range(4)]):
+            data = client.post("/api/v1/agents", json={"name": f"Thread{name}_{unique_id}"}).json()
+            agents[name] = {"headers": {"Authorization": f"Bearer {data['api_key']}"}}
+        
+        def unread(name):
+            return client.get("/api/v1/notifications/unread-count", headers=agents[name]["headers"]).json()["by_type"]
+        
+        project_id = client.post("/api/v1/projects", headers=agents["author"]["headers"], json={
+            "name": f"thread-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        post_id = client.post(f"/api/v1/projects/{project_id}/posts", headers=agents["author"]["headers"], json={
+            "title": "Thread", "content": "x"
+        }).json()["id"]
+        
+        def comment(name):
+            resp = client.post(f"/api/v1/posts/{post_id}/comments", headers=agents[name]["headers"], json={"content": "hi"})
+            assert resp.status_code == 200
+        
+        comment("first")
+        assert client.get(f"/api/v1/posts/{post_id}/subscription", headers=agents["first"]["headers"]).json()["state"] == "participant"
+        resp = client.post(f"/api/v1/posts/{post_id}/subscribe", headers=agents["watcher"]["headers"])
+        assert resp.json() == {"post_id": post_id, "state": "subscribed"}
+        
+        comment("second")
+        assert unread("author") == {"reply": 2}
+        assert unread("first") == {"thread_update": 1}
+        assert unread("watcher") == {"thread_update": 1}
+        
+        client.post(f"/api/v1/posts/{post_id}/mute", headers=agents["author"]["headers"])
+        client.post(f"/api/v1/posts/{post_id}/mute", headers=agents["watcher"]["headers"])
+        comment("first")
+        assert unread("author") == {"reply": 2}
+        assert unread("watcher") == {"thread_update": 1}
+        assert unread("second") == {"thread_update": 1}
+        
+        # Fan-out cost does not grow with the number of participants
+        def read_all():
+            for agent in agents.values():
+                client.post("/api/v1/notifications/read-all", headers=agent["headers"])
+        
+        read_all()
+        with count_queries() as small:
+            comment("second")
+        for i in range(4):
+            comment(f"extra{i}")
+        comment("first")
+        read_all()
+        with count_queries() as large:
+            comment("second")
+        assert len(large) == len(small)
+        
+        assert client.post("/api/v1/posts/does-not-exist/mute", headers=agents["author"]["headers"]).status_code == 404
+
+
+class TestMentions:
+    """Test the normalized mentions index behind /agents/me/mentions."""
+
+    def test_mentions_of_me(self, client, unique_id):
+        agents = {}
+        for name in ("writer", "target"):
+            data = client.post("/api/v1/agents", json={"name": f"Mention{name}_{unique_id}"}).json()
+            agents[name] = {"name": data["name"], "headers": {"Authorization": f"Bearer {data['api_key']}"}}
+        writer, target = agents["writer"], agents["target"]
+
+        def mentions(**params):
+            resp = client.get("/api/v1/agents/me/mentions", headers=target["headers"], params=params)
+            assert resp.status_code == 200
+            return resp.json()
+
+        project_id = client.post("/api/v1/projects", headers=writer["headers"], json={
+            "name": f"mention-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        post_id = client.post(f"/api/v1/projects/{project_id}/posts", headers=writer["headers"], json={
+            "title": "Ping", "content": f"@{target['name']} @{target['name']} @nobody_{unique_id}"
+        }).json()["id"]
+        comment_id = client.post(f"/api/v1/posts/{post_id}/comments", headers=writer["headers"], json={
+            "content": f"again @{target['name']}"
+        }).json()["id"]
+
+        items = mentions()["items"]
+        assert [(m["post_id"], m["comment_id"]) for m in items] == [(post_id, comment_id), (post_id, None)]
+        assert items[0]["post_title"] == "Ping"
+        assert items[0]["by"] == writer["name"]
+        assert items[0]["project_id"] == project_id
+
+        # Editing the post body replaces its mention rows; comment mentions are kept
+        client.patch(f"/api/v1/posts/{post_id}", headers=writer["headers"], json={"content": "no one"})
+        assert [m["comment_id"] for m in mentions()["items"]] == [comment_id]
+        client.patch(f"/api/v1/posts/{post_id}", headers=writer["headers"], json={"content": f"@{target['name']}"})
+
+        page = mentions(limit=1)
+        assert len(page["items"]) == 1 and page["next_cursor"]
+        rest = mentions(limit=1, before=page["next_cursor"])
+        assert rest["next_cursor"] is None
+        assert {page["items"][0]["comment_id"], rest["items"][0]["comment_id"]} == {comment_id, None}
+
+        assert client.get("/api/v1/agents/me/mentions", headers=writer["headers"]).json()["items"] == []
+        assert client.get("/api/v1/agents/me/mentions").status_code == 401
+
+    def test_code_and_emails_are_not_mentions(self, client, unique_id):
+        writer = client.post("/api/v1/agents", json={"name": f"Codewriter_{unique_id}"}).json()
+        target = client.post("/api/v1/agents", json={"name": f"Codetarget_{unique_id}"}).json()
+        headers = {"Authorization": f"Bearer {writer['api_key']}"}
+        name = target["name"]
+        project_id = client.post("/api/v1/projects", headers=headers, json={
+            "name": f"mention-code-{unique_id}", "description": "Test"
+        }).json()["id"]
+
+        content = (
+            f"```python\n@{name}\ndef f(): pass\n```\n"
+            f"Inline `@{name}` and mail me at ops@{name}.\n"
+            f"@{name}x is someone else; @nobody too. Real: @{name}."
+        )
+        post = client.post(f"/api/v1/projects/{project_id}/posts", headers=headers, json={
+            "title": "Code", "content": content
+        }).json()
+        assert post["mentions"] == [name]
+
+        post = client.post(f"/api/v1/projects/{project_id}/posts", headers=headers, json={
+            "title": "Code", "content": f"```\n@{name}\n```"
+        }).json()
+        assert post["mentions"] == []
+
+    def test_agent_registered_by_another_worker(self, client, unique_id):
+        """Names missing from this process's index are still resolved from the database."""
+        from src import main as main_module
+        from src.models import Agent
+
+        writer = client.post("/api/v1/agents", json={"name": f"Workerwriter_{unique_id}"}).json()
+        headers = {"Authorization": f"Bearer {writer['api_key']}"}
+        project_id = client.post("/api/v1/projects", headers=headers, json={
+            "name": f"mention-worker-{unique_id}", "description": "Test"
+        }).json()["id"]
+        db = main_module.SessionLocal()
+        try:
+            elsewhere = Agent(name=f"Elsewhere_{unique_id}")  # Bypasses this process's mention index
+            db.add(elsewhere)
+            db.commit()
+            name, agent_id = elsewhere.name, elsewhere.id
+        finally:
+            db.close()
+
+        post = client.post(f"/api/v1/projects/{project_id}/posts", headers=headers, json={
+            "title": "Hello", "content": f"@{name} welcome"
+        }).json()
+        assert post["mentions"] == [name]
+        assert main_module.mention_index.find(f"@{name}")[0] == {name: agent_id}
+    
+    def test_unknown_names_are_looked_up_once_per_reload(self, client, unique_id, count_queries):
+        from src import main as main_module
+        from src.mentions import mention_index
+        
+        body = f"@property and @decorator_{unique_id} everywhere"
+        db = main_module.SessionLocal()
+        try:
+            with count_queries() as statements:
+                assert mention_index.resolve(db, body) == ({}, False)
+            assert len(statements) == 1
+            with count_queries() as statements:
+                assert mention_index.resolve(db, body) == ({}, False)
+            assert statements == []
+            
+            mention_index.load(db)  # The periodic reload forgets them
+            with count_queries() as statements:
+                mention_index.resolve(db, body)
+            assert len(statements) == 1
+        finally:
+            db.close()
+
+
+@pytest.fixture(scope="module")
+def batch_project(client, unique_id):
+    """Fresh agents (so earlier tests don't eat the rate limit) and a shared project."""
+    agents = {}
+    for role in ("writer", "reader"):
+        resp = client.post("/api/v1/agents", json={"name": f"Batch{role}_{unique_id}"})
+        data = resp.json()
+        agents[role] = {"name": data["name"], "headers": {"Authorization": f"Bearer {data['api_key']}"}}
+    proj_resp = client.post("/api/v1/projects", headers=agents["reader"]["headers"], json={
+        "name": f"batch-test-{unique_id}",
+        "description": "Test"
+    })
+    project_id = proj_resp.json()["id"]
+    client.post(f"/api/v1/projects/{project_id}/join", headers=agents["writer"]["headers"], json={"role": "developer"})
+    post_resp = client.post(f"/api/v1/projects/{project_id}/posts", headers=agents["reader"]["headers"], json={
+        "title": "Review target",
+        "content": "Please review"
+    })
+    return {"project_id": project_id, "post_id": post_resp.json()["id"], **agents}
+
+
+class TestBatch:
+    """Test batch creation of posts and comments."""
+    
+    def test_batch_create(self, client, batch_project):
+        writer, reader = batch_project["writer"], batch_project["reader"]
+        project_id, post_id = batch_project["project_id"], batch_project["post_id"]
+        client.post("/api/v1/notifications/read-all", headers=reader["headers"])
+        
+        resp = client.post(f"/api/v1/projects/{project_id}/batch", headers=writer["headers"], json={
+            "posts": [{"title": "Finding A", "content": f"cc @{reader['name']}", "tags": ["review"]}],
+            "comments": [
+                {"post_id": post_id, "content": "src/a.py: looks fine"},
+                {"post_id": post_id, "content": f"src/b.py: @{reader['name']} typo here"},
+            ]
+        })
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        assert [p["title"] for p in data["posts"]] == ["Finding A"]
+        assert data["posts"][0]["status"] == "open"
+        assert data["posts"][0]["mentions"] == [reader["name"]]
+        assert len(data["comments"]) == 2
+        assert data["comments"][1]["mentions"] == [reader["name"]]
+        
+        comments = client.get(f"/api/v1/posts/{post_id}/comments").json()
+        assert len(comments) == 2
+        
+        # 2 mentions + 2 replies (reader authored the target post)
+        counts = client.get("/api/v1/notifications/unread-count", headers=reader["headers"]).json()
+        assert counts["by_type"] == {"mention": 2, "reply": 2}
+    
+    def test_batch_is_all_or_nothing(self, client, batch_project):
+        writer, project_id, post_id = batch_project["writer"], batch_project["project_id"], batch_project["post_id"]
+        before = len(client.get(f"/api/v1/posts/{post_id}/comments").json())
+        
+        resp = client.post(f"/api/v1/projects/{project_id}/batch", headers=writer["headers"], json={
+            "comments": [
+                {"post_id": post_id, "content": "valid"},
+                {"post_id": "does-not-exist", "content": "invalid"},
+            ]
+        })
+        assert resp.status_code == 400
+        assert "comments[1]" in resp.json()["detail"]
+        assert len(client.get(f"/api/v1/posts/{post_id}/comments").json()) == before
+    
+    def test_batch_respects_rate_limit(self, client, batch_project):
+        writer, project_id = batch_project["writer"], batch_project["project_id"]
+        resp = client.post(f"/api/v1/projects/{project_id}/batch", headers=writer["headers"], json={
+            "posts": [{"title": f"Spam {i}", "content": "x"} for i in range(11)]
+        })
+        assert resp.status_code == 429
+        assert "Retry-After" in resp.headers
+
+    def test_rejected_batch_charges_nothing(self, client, batch_project):
+        writer, project_id, post_id = batch_project["writer"], batch_project["project_id"], batch_project["post_id"]
+        resp = client.post(f"/api/v1/projects/{project_id}/batch", headers=writer["headers"], json={
+            "posts": [{"title": f"Finding {i}", "content": "x"} for i in range(8)],
+            "comments": [{"post_id": post_id, "content": f"note {i}"} for i in range(61)]
+        })
+        assert resp.status_code == 429
+        assert "comment" in resp.json()["detail"]
+
+        # The 8 posts were not recorded against the post limit (1 used of 10)
+        resp = client.post(f"/api/v1/projects/{project_id}/batch", headers=writer["headers"], json={
+            "posts": [{"title": f"Finding {i}", "content": "x"} for i in range(9)]
+        })
+        assert resp.status_code == 200, resp.text
+
+
+class TestChanges:
+    """Test the incremental change feed."""
+    
+    def test_changes_since(self, client, unique_id):
+        agents = []
+        for role in ("lead", "dev"):
+            data = client.post("/api/v1/agents", json={"name": f"Changes{role}_{unique_id}"}).json()
+            agents.append({"id": data["id"], "headers": {"Authorization": f"Bearer {data['api_key']}"}})
+        lead, dev = agents
+        project_id = client.post("/api/v1/projects", headers=lead["headers"], json={
+            "name": f"changes-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        client.post(f"/api/v1/projects/{project_id}/join", headers=dev["headers"], json={"role": "developer"})
+        post_id = client.post(f"/api/v1/projects/{project_id}/posts", headers=lead["headers"], json={
+            "title": "Synced", "content": "v1"
+        }).json()["id"]
+        
+        first = client.get(f"/api/v1/projects/{project_id}/changes").json()
+        assert [(c["entity"], c["op"]) for c in first["changes"]] == [
+            ("member", "joined"), ("member", "joined"), ("post", "created")
+        ]
+        assert first["changes"][2]["data"]["title"] == "Synced"
+        assert first["has_more"] is False
+        
+        # Only the deltas come back after a cursor
+        comment_id = client.post(f"/api/v1/posts/{post_id}/comments", headers=dev["headers"], json={
+            "content": "looks good"
+        }).json()["id"]
+        client.patch(f"/api/v1/posts/{post_id}", headers=dev["headers"], json={"status": "resolved", "pinned": True})
+        delta = client.get(f"/api/v1/projects/{project_id}/changes", params={"since": first["next_since"]}).json()
+        assert [(c["entity"], c["entity_id"], c["op"]) for c in delta["changes"]] == [
+            ("comment", comment_id, "created"), ("post", post_id, "status"), ("post", post_id, "pin")
+        ]
+        assert delta["changes"][1]["data"]["status"] == "resolved"
+        assert delta["changes"][1]["data"]["comment_count"] == 1
+        
+        page = client.get(f"/api/v1/projects/{project_id}/changes", params={"since": 0, "limit": 2}).json()
+        assert len(page["changes"]) == 2 and page["has_more"] is True
+        
+        empty = client.get(f"/api/v1/projects/{project_id}/changes", params={"since": delta["next_since"]}).json()
+        assert empty == {"changes": [], "next_since": delta["next_since"], "has_more": False}
+
+
+class TestFeed:
+    """Test the cross-project activity feed."""
+    
+    def test_feed_merges_member_projects(self, client, unique_id, count_queries):
+        agents = []
+        for role in ("reader", "other"):
+            data = client.post("/api/v1/agents", json={"name": f"Feed{role}_{unique_id}"}).json()
+            agents.append({"headers": {"Authorization": f"Bearer {data['api_key']}"}})
+        reader, other = agents
+        projects = []
+        for i in range(3):
+            projects.append(client.post("/api/v1/projects", headers=other["headers"], json={
+                "name": f"feed-test-{unique_id}-{i}", "description": "Test"
+            }).json()["id"])
+        # reader follows the first two projects only
+        for project_id in projects[:2]:
+            client.post(f"/api/v1/projects/{project_id}/join", headers=reader["headers"], json={"role": "dev"})
+        for i, project_id in enumerate(projects):
+            client.post(f"/api/v1/projects/{project_id}/posts", headers=other["headers"], json={
+                "title": f"Feed post {i}", "content": "x"
+            })
+        
+        page = client.get("/api/v1/feed", headers=reader["headers"], params={"limit": 3}).json()
+        assert [(i["entity"], i["project_id"]) for i in page["items"]] == [
+            ("post", projects[1]), ("post", projects[0]), ("member", projects[1])
+        ]
+        assert page["items"][0]["data"]["title"] == "Feed post 1"
+        
+        rest = client.get("/api/v1/feed", headers=reader["headers"], params={"before": page["next_cursor"]}).json()
+        assert all(i["project_id"] in projects[:2] for i in rest["items"])
+        assert [i["seq"] for i in page["items"] + rest["items"]] == sorted(
+            (i["seq"] for i in page["items"] + rest["items"]), reverse=True
+        )
+        assert rest["next_cursor"] is None
+        
+        # A repeated request is served from the per-agent cache
+        with count_queries() as uncached:
+            client.get("/api/v1/feed", headers=reader["headers"], params={"limit": 2})
+        with count_queries() as cached:
+            client.get("/api/v1/feed", headers=reader["headers"], params={"limit": 2})
+        assert len(cached) < len(uncached)
+        
+        assert client.get("/api/v1/feed").status_code == 401
+
+
+class TestProjectStats:
+    """Test incrementally maintained project stats."""
+    
+    def test_stats(self, client, unique_id):
+        from datetime import datetime
+        from src import main as main_module, stats as stats_module
+        from src.models import ProjectStat, ProjectActivity, ProjectAgentActivity
+        
+        agents = []
+        for role in ("lead", "dev"):
+            data = client.post("/api/v1/agents", json={"name": f"Stats{role}_{unique_id}"}).json()
+            agents.append({"headers": {"Authorization": f"Bearer {data['api_key']}"}})
+        lead, dev = agents
+        project_id = client.post("/api/v1/projects", headers=lead["headers"], json={
+            "name": f"stats-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        client.post(f"/api/v1/projects/{project_id}/join", headers=dev["headers"], json={"role": "dev"})
+        
+        post_ids = [client.post(f"/api/v1/projects/{project_id}/posts", headers=lead["headers"], json={
+            "title": f"Stat {i}", "content": "x", "type": post_type
+        }).json()["id"] for i, post_type in enumerate(["discussion", "discussion", "question"])]
+        client.patch(f"/api/v1/posts/{post_ids[2]}", headers=dev["headers"], json={"status": "resolved"})
+        for _ in range(2):
+            client.post(f"/api/v1/posts/{post_ids[0]}/comments", headers=dev["headers"], json={"content": "ok"})
+        
+        stats = client.get(f"/api/v1/projects/{project_id}/stats", params={"days": 7}).json()
+        assert stats["posts"] == 3
+        assert stats["posts_by_status"] == {"open": 2, "resolved": 1}
+        assert stats["posts_by_type"] == {"discussion": 2, "question": 1}
+        assert stats["comments"] == 2
+        assert stats["members"] == 2
+        assert stats["active_agents"] == 2
+        assert len(stats["activity"]) == 7
+        assert stats["activity"][-1] == {"day": datetime.utcnow().strftime("%Y-%m-%d"), "posts": 3, "comments": 2}
+        
+        # Projects without counters (created before they existed) are rebuilt at startup, not on read
+        db = main_module.SessionLocal()
+        try:
+            for model in (ProjectStat, ProjectActivity, ProjectAgentActivity):
+                db.query(model).filter(model.project_id == project_id).delete()
+            db.commit()
+        finally:
+            db.close()
+        assert client.get(f"/api/v1/projects/{project_id}/stats", params={"days": 7}).json()["posts"] == 0
+        main_module.backfill_project_stats()
+        assert client.get(f"/api/v1/projects/{project_id}/stats", params={"days": 7}).json() == stats
+        db = main_module.SessionLocal()
+        try:
+            assert stats_module.backfill(db) == 0  # Nothing left to rebuild
+        finally:
+            db.close()
+        
+        assert client.get("/api/v1/projects/does-not-exist/stats").status_code == 404
+
+
 class TestNotifications:
     """Test notification system."""
     
@@ -435,6 +921,104 @@ class TestNotifications:
     def test_mark_all_read(self, client, auth_bob):
         resp = client.post("/api/v1/notifications/read-all", headers=auth_bob)
         assert resp.status_code == 200
+    
+    def test_unread_count(self, client, auth_alice, auth_bob, agent_bob):
+        # Start from a clean slate
+        client.post("/api/v1/notifications/read-all", headers=auth_bob)
+        resp = client.get("/api/v1/notifications/unread-count", headers=auth_bob)
+        assert resp.status_code == 200
+        assert resp.json() == {"total": 0, "by_type": {}}
+        
+        proj_resp = client.post("/api/v1/projects", headers=auth_alice, json={
+            "name": f"unread-test-{time.time()}",
+            "description": "Test"
+        })
+        project_id = proj_resp.json()["id"]
+        client.post(f"/api/v1/projects/{project_id}/join", headers=auth_bob, json={"role": "developer"})
+        
+        # Bob's post gets a mention from Alice's post and a reply from Alice's comment
+        post_resp = client.post(f"/api/v1/projects/{project_id}/posts", headers=auth_bob, json={
+            "title": "Unread Test",
+            "content": "Test"
+        })
+        post_id = post_resp.json()["id"]
+        client.post(f"/api/v1/projects/{project_id}/posts", headers=auth_alice, json={
+            "title": "Ping",
+            "content": f"@{agent_bob['name']} ping"
+        })
+        client.post(f"/api/v1/posts/{post_id}/comments", headers=auth_alice, json={"content": "Reply"})
+        
+        data = client.get("/api/v1/notifications/unread-count", headers=auth_bob).json()
+        assert data == {"total": 2, "by_type": {"mention": 1, "reply": 1}}
+        
+        # Marking one read decrements its type, and is idempotent
+        notifs = client.get("/api/v1/notifications?unread_only=true", headers=auth_bob).json()
+        reply = next(n for n in notifs if n["type"] == "reply")
+        client.post(f"/api/v1/notifications/{reply['id']}/read", headers=auth_bob)
+        client.post(f"/api/v1/notifications/{reply['id']}/read", headers=auth_bob)
+        data = client.get("/api/v1/notifications/unread-count", headers=auth_bob).json()
+        assert data == {"total": 1, "by_type": {"mention": 1}}
+        
+        client.post("/api/v1/notifications/read-all", headers=auth_bob)
+        data = client.get("/api/v1/notifications/unread-count", headers=auth_bob).json()
+        assert data["total"] == 0
+    
+    def test_bulk_mark_read(self, client, auth_alice, auth_bob, agent_bob):
+        client.post("/api/v1/notifications/read-all", headers=auth_bob)
+        proj_resp = client.post("/api/v1/projects", headers=auth_alice, json={
+            "name": f"bulk-read-test-{time.time()}",
+            "description": "Test"
+        })
+        project_id = proj_resp.json()["id"]
+        for i in range(4):
+            client.post(f"/api/v1/projects/{project_id}/posts", headers=auth_bob, json={
+                "title": f"Bulk {i}",
+                "content": f"@{agent_bob['name']} self-mention {i}"
+            })
+        notifs = client.get("/api/v1/notifications?unread_only=true", headers=auth_bob).json()
+        assert len(notifs) == 4  # newest first
+        
+        # Explicit id list
+        resp = client.post("/api/v1/notifications/read", headers=auth_bob, json={"ids": [notifs[0]["id"]]})
+        assert resp.status_code == 200
+        assert resp.json()["updated"] == 1
+        
+        # Cursor: the second-oldest and everything before it
+        resp = client.post("/api/v1/notifications/read", headers=auth_bob, json={"up_to": notifs[2]["id"]})
+        assert resp.json()["updated"] == 2
+        
+        remaining = client.get("/api/v1/notifications?unread_only=true", headers=auth_bob).json()
+        assert [n["id"] for n in remaining] == [notifs[1]["id"]]
+        assert client.get("/api/v1/notifications/unread-count", headers=auth_bob).json()["total"] == 1
+        
+        assert client.post("/api/v1/notifications/read", headers=auth_bob, json={}).status_code == 400
+    
+    def test_bulk_mark_read_with_equal_timestamps(self, client, unique_id):
+        """One fan-out gives notifications the same created_at; up_to must not pass the cursor."""
+        from datetime import datetime
+        from src import main as main_module
+        from src.models import Notification
+        from src.utils import rebuild_unread_counts
+        
+        data = client.post("/api/v1/agents", json={"name": f"Tied_{unique_id}"}).json()
+        headers = {"Authorization": f"Bearer {data['api_key']}"}
+        created_at = datetime.utcnow()
+        db = main_module.SessionLocal()
+        try:
+            db.add_all([Notification(agent_id=data["id"], type="mention", payload={"n": i}, created_at=created_at)
+                        for i in range(4)])
+            db.commit()
+            rebuild_unread_counts(db, data["id"])
+        finally:
+            db.close()
+        
+        notifs = client.get("/api/v1/notifications?unread_only=true", headers=headers).json()
+        assert len(notifs) == 4
+        resp = client.post("/api/v1/notifications/read", headers=headers, json={"up_to": notifs[1]["id"]})
+        assert resp.json()["updated"] == 3
+        remaining = client.get("/api/v1/notifications?unread_only=true", headers=headers).json()
+        assert [n["id"] for n in remaining] == [notifs[0]["id"]]
+        assert client.get("/api/v1/notifications/unread-count", headers=headers).json()["total"] == 1
 
 
 class TestSearch:
@@ -499,6 +1083,24 @@ class TestTags:
             # Tags may be present
             pass  # Don't require specific tags, just verify endpoint
 
+    def test_tags_are_queried_in_database(self, client, unique_id):
+        resp = client.post("/api/v1/agents", json={"name": f"TagAgent_{unique_id}"})
+        headers = {"Authorization": f"Bearer {resp.json()['api_key']}"}
+        project_id = client.post("/api/v1/projects", headers=headers, json={
+            "name": f"tags-db-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        for title, tags in [("One", ["bug", "urgent"]), ("Two", ["feature", "urgent"]), ("Three", ["bugfix"])]:
+            client.post(f"/api/v1/projects/{project_id}/posts", headers=headers, json={
+                "title": f"tagdb {title}", "content": "Test", "tags": tags
+            })
+        
+        resp = client.get(f"/api/v1/projects/{project_id}/tags")
+        assert resp.json() == ["bug", "bugfix", "feature", "urgent"]
+        
+        # Tag filter is exact membership, not substring
+        resp = client.get(f"/api/v1/search?q=tagdb&project_id={project_id}&tag=bug")
+        assert [p["title"] for p in resp.json()] == ["tagdb One"]
+
 
 class TestWebhooks:
     """Test webhook configuration."""
@@ -561,6 +1163,128 @@ class TestWebhooks:
         assert resp.status_code == 200
 
 
+class TestGitHubWebhook:
+    """Test asynchronous GitHub webhook ingestion."""
+    
+    SECRET = "gh-test-secret"
+    
+    def deliver(self, client, project_id, payload, delivery_id, event="pull_request"):
+        import hashlib, hmac, json
+        body = json.dumps(payload).encode()
+        signature = "sha256=" + hmac.new(self.SECRET.encode(), body, hashlib.sha256).hexdigest()
+        return client.post(f"/api/v1/github-webhook/{project_id}", content=body, headers={
+            "Content-Type": "application/json", "X-GitHub-Event": event,
+            "X-GitHub-Delivery": delivery_id, "X-Hub-Signature-256": signature,
+        })
+    
+    def wait_for(self, client, admin_headers, delivery_id, statuses):
+        import time
+        for _ in range(100):
+            deliveries = client.get("/api/v1/admin/github-deliveries", headers=admin_headers).json()
+            match = [d for d in deliveries if d["delivery_id"] == delivery_id]
+            if match and match[0]["status"] in statuses:
+                return match[0]
+            time.sleep(0.05)
+        raise AssertionError(f"delivery {delivery_id} never reached {statuses}")
+    
+    def test_delivery_is_queued_and_processed(self, client, unique_id, admin_headers, monkeypatch, count_queries):
+        from src.github_worker import delivery_worker
+        monkeypatch.setattr(delivery_worker, "MAX_ATTEMPTS", 1)
+        
+        data = client.post("/api/v1/agents", json={"name": f"GhOwner_{unique_id}"}).json()
+        headers = {"Authorization": f"Bearer {data['api_key']}"}
+        project_id = client.post("/api/v1/projects", headers=headers, json={
+            "name": f"github-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        client.post(f"/api/v1/projects/{project_id}/github-webhook", headers=headers, json={"secret": self.SECRET})
+        
+        pr = {"action": "opened", "repository": {"full_name": "acme/widgets"}, "pull_request": {
+            "number": 7, "title": "Speed up", "user": {"login": "octo"},
+            "html_url": f"https://github.com/acme/widgets/pull/7?{unique_id}", "body": "details"
+        }}
+        resp = self.deliver(client, project_id, pr, f"d1-{unique_id}")
+        assert resp.status_code == 202
+        assert resp.json() == {"status": "queued", "delivery_id": f"d1-{unique_id}"}
+        
+        done = self.wait_for(client, admin_headers, f"d1-{unique_id}", {"processed"})
+        assert done["result"]["action"] == "post_created"
+        posts = client.get(f"/api/v1/projects/{project_id}/posts").json()
+        assert [p["title"] for p in posts] == ["🔀 PR #7: Speed up"]
+        
+        # GitHub redelivery of the same delivery is acknowledged but not processed again
+        resp = self.deliver(client, project_id, pr, f"d1-{unique_id}")
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "duplicate"
+        
+        # With the config cached, acknowledging a delivery is a single INSERT
+        with count_queries() as statements:
+            assert self.deliver(client, project_id, pr, f"d2-{unique_id}").status_code == 202
+        # (anything from the claim UPDATE on is the background worker)
+        claim = next((i for i, sql in enumerate(statements) if sql.startswith("UPDATE github_deliveries")), len(statements))
+        assert len(statements[:claim]) == 1 and statements[0].startswith("INSERT INTO github_deliveries")
+        assert client.post(f"/api/v1/github-webhook/{project_id}", content=b"{}", headers={
+            "X-GitHub-Event": "pull_request", "X-Hub-Signature-256": "sha256=bad"
+        }).status_code == 401
+        
+        # A payload that fails processing is recorded and can be replayed
+        broken = {"action": "opened", "pull_request": {"html_url": f"https://github.com/acme/widgets/pull/8?{unique_id}"}}
+        self.deliver(client, project_id, broken, f"d3-{unique_id}")
+        failed = self.wait_for(client, admin_headers, f"d3-{unique_id}", {"failed"})
+        assert "KeyError" in failed["error"]
+        assert f"d3-{unique_id}" in [d["delivery_id"] for d in client.get(
+            "/api/v1/admin/github-deliveries", headers=admin_headers, params={"status": "failed", "project_id": project_id}
+        ).json()]
+        
+        resp = client.post(f"/api/v1/admin/github-deliveries/{failed['id']}/replay", headers=admin_headers)
+        assert resp.status_code == 202
+        assert resp.json()["status"] == "pending"
+        assert self.wait_for(client, admin_headers, f"d3-{unique_id}", {"failed"})["attempts"] == 1
+        assert len(client.get(f"/api/v1/projects/{project_id}/posts").json()) == 1
+        
+        # Deleting the config invalidates the cached copy
+        client.delete(f"/api/v1/projects/{project_id}/github-webhook", headers=headers)
+        assert self.deliver(client, project_id, pr, f"d4-{unique_id}").status_code == 404
+    
+    def test_leases_and_retention(self, client, unique_id):
+        from datetime import datetime, timedelta
+        from src import main as main_module
+        from src.github_worker import delivery_worker
+        from src.models import GitHubDelivery
+        
+        data = client.post("/api/v1/agents", json={"name": f"GhLease_{unique_id}"}).json()
+        project_id = client.post("/api/v1/projects", headers={"Authorization": f"Bearer {data['api_key']}"}, json={
+            "name": f"github-lease-{unique_id}", "description": "Test"
+        }).json()["id"]
+        now = datetime.utcnow()
+        rows = {
+            "live": ("processing", now - timedelta(seconds=5), now),  # another worker is on it
+            "abandoned": ("processing", now - timedelta(hours=1), now - timedelta(hours=1)),
+            "old-processed": ("processed", None, now - timedelta(days=30)),
+            "old-failed": ("failed", None, now - timedelta(days=30)),
+            "recent": ("processed", None, now),
+        }
+        db = main_module.SessionLocal()
+        try:
+            ids = {}
+            for name, (status, claimed_at, received_at) in rows.items():
+                delivery = GitHubDelivery(project_id=project_id, delivery_id=f"{name}-{unique_id}", event_type="ping",
+                                          payload="{}", status=status, claimed_at=claimed_at, received_at=received_at)
+                db.add(delivery)
+                db.flush()
+                ids[name] = delivery.id
+            db.commit()
+            
+            assert delivery_worker.maintain() == [ids["abandoned"]]
+            
+            db.expire_all()
+            left = dict(db.query(GitHubDelivery.id, GitHubDelivery.status).filter(
+                GitHubDelivery.project_id == project_id
+            ).all())
+            assert left == {ids["live"]: "processing", ids["abandoned"]: "pending", ids["recent"]: "processed"}
+        finally:
+            db.close()
+
+
 class TestSkillEndpoints:
     """Test skill discovery endpoints."""
     
@@ -591,3 +1315,279 @@ class TestRateLimit:
         # Each category should have limit info
         for category, info in data.items():
             assert "limit" in info or "remaining" in info
+
+
+class TestMetrics:
+    """Test the Prometheus /metrics endpoint."""
+    
+    def test_metrics(self, client, unique_id, auth_alice, agent_bob):
+        client.get("/health")
+        client.get("/api/v1/projects")
+        project_id = client.post("/api/v1/projects", headers=auth_alice, json={
+            "name": f"metrics-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        client.post(f"/api/v1/projects/{project_id}/posts", headers=auth_alice, json={
+            "title": "Metrics", "content": f"@{agent_bob['name']} look"
+        })
+        name = f"Metrics_{unique_id}"
+        statuses = [client.post("/api/v1/agents", json={"name": name}).status_code for _ in range(6)]
+        assert statuses[-1] == 429
+        client.get(f"/api/v1/agents/by-name/{name}")
+        
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        text = resp.text
+        assert 'minibook_http_requests_total{method="GET",route="/health",status="200"}' in text
+        # Route templates, not raw paths, so label cardinality stays bounded
+        assert 'route="/api/v1/agents/by-name/{name}"' in text
+        assert name not in text
+        assert 'minibook_http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in text
+        assert 'minibook_db_statements_per_request_count{method="GET",route="/api/v1/projects"}' in text
+        assert "minibook_db_connection_checkout_seconds_count" in text
+        assert 'minibook_ratelimit_rejections_total{action="register"}' in text
+        assert 'minibook_notification_fanout_size_count{type="mention"}' in text
+        
+        statements = [line for line in text.splitlines()
+                      if line.startswith('minibook_db_statements_per_request_sum{method="GET",route="/api/v1/projects"}')]
+        assert float(statements[0].split()[-1]) >= 1
+
+
+class TestSlowLog:
+    """Test the slow-request / slow-query JSON log."""
+    
+    def test_slow_request_and_query(self, client, auth_alice, test_db_dir):
+        import json
+        import os
+        from src import main as main_module, slowlog
+        
+        path = os.path.join(test_db_dir, "slow.log")
+        slowlog.configure({"slow_request_ms": 0.001, "slow_query_ms": 0.001, "slow_log_path": path})
+        try:
+            resp = client.get("/api/v1/search", params={"q": "slowlog"}, headers=auth_alice)
+            assert resp.status_code == 200
+        finally:
+            slowlog.configure(main_module.config, default_dir=test_db_dir)
+        # Without slow_log_path the log goes next to the database, not into the working directory
+        assert slowlog.logger.handlers[0].baseFilename == os.path.abspath(path)
+        
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        request = next(r for r in records if r["type"] == "slow_request")
+        assert request["route"] == "/api/v1/search"
+        assert request["query"] == "q=slowlog"
+        assert request["sql_count"] == len(request["sql"]) >= 1
+        assert all("statement" in s and "ms" in s for s in request["sql"])
+        assert "http_ms" in request
+        
+        query = next(r for r in records if r["type"] == "slow_query" and r["sql"].lstrip().startswith("SELECT"))
+        assert query["route"] == "/api/v1/search"
+        assert query["plan"]  # EXPLAIN QUERY PLAN rows
+        assert any(frame.startswith("src/main.py") for frame in query["stack"])
+        
+        # A failed EXPLAIN records the error type only; driver messages can echo parameters
+        with main_module.SessionLocal.kw["bind"].connect() as conn:
+            assert slowlog._explain(conn, "SELECT * FROM no_such_table WHERE id = ?", ("secret",)) == [
+                "EXPLAIN failed: OperationalError"
+            ]
+
+
+class TestProfiler:
+    """Test the admin sampling profiler and per-route CPU accounting."""
+    
+    def test_profile(self, client, admin_headers, auth_alice):
+        assert client.post("/api/v1/admin/profile", params={"seconds": 0.2}).status_code == 401
+        
+        resp = client.post("/api/v1/admin/profile", headers=admin_headers, params={"seconds": 0.2, "interval_ms": 2})
+        assert resp.status_code == 200
+        lines = resp.text.splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) >= 1 and ";" in stack
+    
+    def test_route_cpu(self, client, admin_headers, auth_alice):
+        for _ in range(3):
+            client.get("/api/v1/projects", headers=auth_alice)
+        routes = {r["route"]: r for r in client.get("/api/v1/admin/profile/routes", headers=admin_headers).json()}
+        projects = routes["/api/v1/projects"]
+        assert projects["requests"] >= 3
+        assert 0 < projects["cpu_seconds"] <= projects["wall_seconds"] + 0.05
+
+
+class TestTracing:
+    """Test trace propagation and the JSON-lines span exporter."""
+    
+    def test_trace_propagation(self, client, agent_bob, unique_id, test_db_dir, monkeypatch):
+        import json
+        import os
+        import httpx
+        
+        writer = client.post("/api/v1/agents", json={"name": f"Tracer_{unique_id}"}).json()
+        auth = {"Authorization": f"Bearer {writer['api_key']}"}
+        sent = []
+        
+        async def fake_post(self, url, json=None, headers=None, **kwargs):
+            sent.append({"url": url, "json": json, "headers": headers})
+            return httpx.Response(204)
+        
+        monkeypatch.setattr(httpx.AsyncClient, "post", fake_post)
+        
+        project_id = client.post("/api/v1/projects", headers=auth, json={
+            "name": f"trace-test-{unique_id}", "description": "Test"
+        }).json()["id"]
+        client.post(f"/api/v1/projects/{project_id}/webhooks", headers=auth, json={
+            "url": "https://example.com/hook", "events": ["new_post"]
+        })
+        
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        resp = client.post(f"/api/v1/projects/{project_id}/posts", headers={
+            **auth, "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"
+        }, json={"title": "Traced", "content": f"@{agent_bob['name']}"})
+        assert resp.status_code == 200
+        assert resp.headers["x-trace-id"] == trace_id
+        assert resp.headers["traceparent"].startswith(f"00-{trace_id}-")
+        
+        # Trace id travels with the webhook, in the body and as the parent of the receiver's work
+        assert sent[-1]["json"]["trace_id"] == trace_id
+        assert sent[-1]["headers"]["traceparent"].split("-")[1] == trace_id
+        
+        # A fresh trace id per request without an incoming header
+        other = client.get("/health").headers["x-trace-id"]
+        assert len(other) == 32 and other != trace_id
+        
+        from src import tracing
+        tracing.flush()  # spans are written from the exporter thread
+        with open(os.path.join(test_db_dir, "traces.jsonl")) as f:
+            spans = [s for s in map(json.loads, f) if s["traceId"] == trace_id]
+        server = next(s for s in spans if s["kind"] == "SPAN_KIND_SERVER")
+        assert server["name"] == "POST /api/v1/projects/{project_id}/posts"
+        assert server["parentSpanId"] == "00f067aa0ba902b7"
+        by_name = {s["name"]: s for s in spans}
+        assert by_name["notifications.fanout"]["parentSpanId"] == server["spanId"]
+        assert by_name["webhook.post"]["spanId"] == sent[-1]["headers"]["traceparent"].split("-")[2]
+        queries = [s for s in spans if s["name"] == "db.query"]
+        assert all(q["parentSpanId"] for q in queries)
+        assert any(q["parentSpanId"] == server["spanId"] for q in queries)
+
+
+class TestIds:
+    """Test time-ordered ids and the IDType column type."""
+    
+    def test_uuid7_is_ordered_within_a_millisecond(self, monkeypatch):
+        import uuid
+        from src import models
+        
+        frozen = 1_700_000_000_000 * 1_000_000
+        monkeypatch.setattr(models, "_uuid7_last", (0, 0))
+        monkeypatch.setattr(models.time, "time_ns", lambda: frozen)
+        ids = [models.generate_id() for _ in range(5000)]  # More than the 4096-id sequence
+        assert len(set(ids)) == len(ids)
+        assert sorted(ids) == ids  # Strings sort like the ids, which is what id cursors rely on
+        assert all(uuid.UUID(i).version == 7 for i in ids)
+        assert uuid.UUID(ids[0]).int >> 80 == frozen // 1_000_000
+        
+        # A clock stepping backwards still yields increasing ids
+        monkeypatch.setattr(models.time, "time_ns", lambda: frozen - 5_000_000_000)
+        assert models.generate_id() > ids[-1]
+    
+    def test_id_type_binding(self, monkeypatch):
+        from sqlalchemy import String
+        from sqlalchemy.dialects import postgresql, sqlite
+        from sqlalchemy.dialects.postgresql import UUID
+        from src import database
+        from src.database import IDType
+        
+        pg, lite = postgresql.dialect(), sqlite.dialect()
+        value = "0190F0C2-6C1A-7ABC-8DEF-0123456789AB"
+        
+        monkeypatch.setattr(database, "COMPACT_IDS", False)
+        assert isinstance(IDType().load_dialect_impl(pg), String)
+        assert IDType().process_bind_param(value, pg) == value
+        assert IDType().process_bind_param("not-a-uuid", pg) == "not-a-uuid"
+        
+        monkeypatch.setattr(database, "COMPACT_IDS", True)
+        assert isinstance(IDType().load_dialect_impl(pg), UUID)
+        assert IDType().process_bind_param(value, pg) == value.lower()
+        assert IDType().process_bind_param("not-a-uuid", pg) is None  # Matches no row instead of a cast error
+        assert IDType().process_bind_param(None, pg) is None
+        assert isinstance(IDType().load_dialect_impl(lite), String)  # SQLite always stores text
+        assert IDType().process_bind_param("not-a-uuid", lite) == "not-a-uuid"
+    
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_ids_round_trip(self, client, unique_id, monkeypatch, compact):
+        from src import database
+        monkeypatch.setattr(database, "COMPACT_IDS", compact)
+        
+        created = client.post("/api/v1/agents", json={"name": f"Ids{int(compact)}_{unique_id}"}).json()
+        headers = {"Authorization": f"Bearer {created['api_key']}"}
+        project = client.post("/api/v1/projects", headers=headers, json={
+            "name": f"ids-test-{int(compact)}-{unique_id}", "description": "Test"
+        }).json()
+        assert client.get(f"/api/v1/projects/{project['id']}").json()["id"] == project["id"]
+        assert client.get(f"/api/v1/agents/{created['id']}/profile").json()["agent"]["id"] == created["id"]
+    
+    def test_malformed_ids_are_not_found(self, client, auth_alice):
+        for url in ("/api/v1/projects/not-a-uuid", "/api/v1/posts/not-a-uuid",
+                    "/api/v1/agents/not-a-uuid/profile", "/api/v1/projects/not-a-uuid/stats"):
+            assert client.get(url, headers=auth_alice).status_code == 404, url
+        resp = client.get("/api/v1/agents/me/mentions", params={"before": "not-a-uuid"}, headers=auth_alice)
+        assert resp.status_code == 200
+
+
+class TestWriteTransactions:
+    """Test that each write is one transaction, committed once."""
+    
+    @pytest.fixture
+    def writer(self, client, unique_id, request):
+        """A fresh writer and a reader they mention, per test."""
+        suffix = f"{unique_id}_{request.node.name}"
+        data = client.post("/api/v1/agents", json={"name": f"Txn_{suffix}"}).json()
+        headers = {"Authorization": f"Bearer {data['api_key']}"}
+        reader = client.post("/api/v1/agents", json={"name": f"TxnReader_{suffix}"}).json()
+        return {"name": data["name"], "headers": headers, "reader": reader,
+                "reader_headers": {"Authorization": f"Bearer {reader['api_key']}"}}
+    
+    def test_single_commit_per_write(self, client, count_queries, writer, unique_id):
+        headers = writer["headers"]
+        with count_queries(commits=True) as statements:
+            project_id = client.post("/api/v1/projects", headers=headers, json={
+                "name": f"txn-test-{unique_id}", "description": "Test"
+            }).json()["id"]
+        assert statements.count("COMMIT") == 1
+        
+        with count_queries(commits=True) as statements:
+            post_id = client.post(f"/api/v1/projects/{project_id}/posts", headers=headers, json={
+                "title": "One commit", "content": f"@{writer['reader']['name']} please look"
+            }).json()["id"]
+        assert statements.count("COMMIT") == 1
+        
+        with count_queries(commits=True) as statements:
+            client.post(f"/api/v1/posts/{post_id}/comments", headers=headers, json={"content": "Still one"})
+        assert statements.count("COMMIT") == 1
+    
+    def test_failed_fan_out_leaves_nothing_behind(self, client, writer, unique_id, monkeypatch):
+        from src import main as main_module
+        
+        headers = writer["headers"]
+        project_id = client.post("/api/v1/projects", headers=headers, json={
+            "name": f"txn-rollback-{unique_id}", "description": "Test"
+        }).json()["id"]
+        
+        def fail(*args, **kwargs):
+            raise RuntimeError("mention rows failed")
+        
+        # Fails after the post, change log, stats and notifications were written
+        monkeypatch.setattr(main_module, "record_mentions", fail)
+        with pytest.raises(RuntimeError):
+            client.post(f"/api/v1/projects/{project_id}/posts", headers=headers, json={
+                "title": "Half written", "content": f"@{writer['reader']['name']} please look"
+            })
+        monkeypatch.undo()
+        
+        assert client.get(f"/api/v1/projects/{project_id}/posts").json() == []
+        assert client.get(f"/api/v1/projects/{project_id}/stats").json()["posts"] == 0
+        changes = client.get(f"/api/v1/projects/{project_id}/changes", headers=headers).json()
+        assert [c["entity"] for c in changes["changes"]] == ["member"]
+        reader = writer["reader_headers"]
+        assert client.get("/api/v1/notifications", headers=reader).json() == []
+        assert client.get("/api/v1/notifications/unread-count", headers=reader).json()["total"] == 0
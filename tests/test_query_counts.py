@@ -0,0 +1,69 @@
+"""
+SQL statement budgets per route.
+
+Each list endpoint must run a fixed number of statements regardless of how
+many rows it returns. The data set is grown between two measurements; any
+per-row (N+1) query shows up as a budget overrun on the larger one.
+"""
+
+import pytest
+
+
+# route template -> max statements per request (auth lookup included where needed)
+BUDGETS = {
+    "/api/v1/projects": 1,
+    "/api/v1/admin/projects": 1,
+    "/api/v1/projects/{project_id}/members": 1,
+    "/api/v1/admin/projects/{project_id}/members": 1,
+    "/api/v1/projects/{project_id}/posts": 2,
+    "/api/v1/search?q=budget": 2,
+    "/api/v1/posts/{post_id}": 2,
+    "/api/v1/posts/{post_id}/comments": 1,
+    "/api/v1/projects/{project_id}/changes": 6,
+    "/api/v1/projects/{project_id}/stats": 5,
+    "/api/v1/agents/{agent_id}/profile": 4,
+}
+
+@pytest.fixture(scope="module")
+def budget_data(client, unique_id):
+    """A project whose members each post and comment, so every list has many authors."""
+    agents = []
+    data = {}
+    
+    def ensure_agents(count):
+        while len(agents) < count:
+            i = len(agents)
+            resp = client.post("/api/v1/agents", json={"name": f"Budget{i}_{unique_id}"})
+            agents.append(resp.json()["id"])
+            headers = {"Authorization": f"Bearer {resp.json()['api_key']}"}
+            # Each agent leads a project of their own and joins the shared one
+            own = client.post("/api/v1/projects", headers=headers, json={
+                "name": f"budget-test-{unique_id}-{i}", "description": "Test"
+            }).json()["id"]
+            data.setdefault("project_id", own)
+            if own != data["project_id"]:
+                client.post(f"/api/v1/projects/{data['project_id']}/join", headers=headers, json={"role": "dev"})
+            post_id = client.post(f"/api/v1/projects/{data['project_id']}/posts", headers=headers, json={
+                "title": f"budget post {i}", "content": "budget"
+            }).json()["id"]
+            data.setdefault("post_id", post_id)
+            client.post(f"/api/v1/posts/{data['post_id']}/comments", headers=headers, json={
+                "content": f"comment {i}"
+            })
+        data["agent_id"] = agents[0]
+        return data
+    
+    return ensure_agents
+
+
+@pytest.mark.parametrize("route", list(BUDGETS))
+def test_statement_budget(client, count_queries, budget_data, admin_headers, route):
+    for size in (2, 6):
+        url = route.format(**budget_data(size))
+        with count_queries() as statements:
+            resp = client.get(url, headers=admin_headers)
+        assert resp.status_code == 200, resp.text
+        assert len(statements) <= BUDGETS[route], (
+            f"{url} ran {len(statements)} statements with {size} agents "
+            f"(budget {BUDGETS[route]}):\n" + "\n".join(statements)
+        )